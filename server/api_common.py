@@ -0,0 +1,181 @@
+"""
+Éléments communs à l'API Flask (app.py) et à sa version ASGI (async_app.py).
+
+Ce module ne dépend ni du framework web ni du pilote MySQL : configuration,
+requêtes du catalogue, pagination par curseur, jetons JWT et caches. Chaque
+application n'y ajoute que ses décorateurs et son accès à la base.
+"""
+
+import datetime
+import hashlib
+import hmac
+import os
+
+import jwt
+
+from token_cache import TokenCache
+from response_cache import ResponseCache
+
+# Clé secrète pour JWT (à stocker de façon sécurisée dans un vrai environnement)
+SECRET_KEY = 'codelearn_secret_key'
+
+# Configuration de la connexion MySQL
+DB_CONFIG = {
+    'host': "localhost",
+    'user': "root",
+    'password': "password",
+    'database': "codelearn",
+}
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+# Pagination par curseur (keyset sur id) : ?limit=<n>&after=<dernier id reçu>
+# Sans limit, une page de DEFAULT_PAGE_SIZE ; la liste entière se demande
+# explicitement avec ?stream=1 (réponse envoyée par lots)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+def parse_keyset_params(args, default_limit=DEFAULT_PAGE_SIZE):
+    # Lève ValueError si limit ou after ne sont pas des entiers valides ;
+    # default_limit=None (mode stream) laisse la liste sans limite
+    after = int(args.get('after', 0))
+    limit = args.get('limit')
+    limit = int(limit) if limit is not None else default_limit
+    if after < 0 or (limit is not None and not 0 < limit <= MAX_PAGE_SIZE):
+        raise ValueError
+    return limit, after
+
+def parse_stream_flag(args):
+    return args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+def keyset_query(query, params, limit):
+    # Lit une ligne de plus que la page pour savoir s'il en reste
+    return query + " LIMIT %s", params + (limit + 1,)
+
+def keyset_page(rows, limit):
+    # Les lignes ont été lues avec keyset_query
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, rows[-1]['id'] if has_more else None
+
+# Colonnes publiques des cours et du plan des modules (le contenu des modules est chargé à part)
+COURSE_COLUMNS = ('id', 'name', 'description', 'language_id', 'level', 'duration',
+                  'image', 'price', 'is_premium', 'created_at', 'updated_at')
+MODULE_OUTLINE_COLUMNS = ('id', 'title', 'description', 'order_num', 'duration', 'updated_at')
+
+COURSE_DETAIL_QUERY = """
+    SELECT {course_columns}, {module_columns}
+    FROM courses c
+    LEFT JOIN modules m ON m.course_id = c.id
+    WHERE c.id = %s
+    ORDER BY m.order_num
+""".format(
+    course_columns=', '.join(f'c.{col}' for col in COURSE_COLUMNS),
+    module_columns=', '.join(f'm.{col} AS module_{col}' for col in MODULE_OUTLINE_COLUMNS),
+)
+
+# Requêtes de lecture des routes, dont database/check_explain.py vérifie les plans
+USER_BY_EMAIL_QUERY = "SELECT * FROM users WHERE email = %s"
+
+# Les listes sont lues par id croissant à partir de `after` ; LIMIT est ajouté par la route
+COURSES_QUERY = f"SELECT {', '.join(COURSE_COLUMNS)} FROM courses WHERE id > %s ORDER BY id"
+
+MODULE_QUERY = """
+    SELECT id, course_id, title, description, content, order_num, duration
+    FROM modules
+    WHERE id = %s AND course_id = %s
+"""
+
+USER_CERTIFICATES_QUERY = """
+    SELECT c.*, cs.name as course_name
+    FROM certificates c
+    JOIN courses cs ON c.course_id = cs.id
+    WHERE c.user_id = %s AND c.id > %s
+    ORDER BY c.id
+"""
+
+CERTIFICATE_QUERY = """
+    SELECT c.*, cs.name as course_name, u.name as user_name
+    FROM certificates c
+    JOIN courses cs ON c.course_id = cs.id
+    JOIN users u ON c.user_id = u.id
+    WHERE c.id = %s
+"""
+
+def course_from_rows(rows):
+    # Regroupe les lignes de COURSE_DETAIL_QUERY en un cours et son plan de modules
+    course = {col: rows[0][col] for col in COURSE_COLUMNS}
+    course['modules'] = [
+        {col: row[f'module_{col}'] for col in MODULE_OUTLINE_COLUMNS}
+        for row in rows
+        if row['module_id'] is not None
+    ]
+    return course
+
+# Jetons déjà vérifiés : évite de refaire le décodage et la vérification HMAC à chaque requête
+token_cache = TokenCache(
+    maxsize=env_int('TOKEN_CACHE_SIZE', 10000),
+    ttl=env_int('TOKEN_CACHE_TTL', 300),
+)
+
+def create_token(user_id):
+    return jwt.encode({
+        'user_id': user_id,
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
+    }, SECRET_KEY, algorithm="HS256")
+
+def bearer_token(headers):
+    auth_header = headers.get('Authorization', '').split(" ")
+    return auth_header[1] if len(auth_header) > 1 else None
+
+def verify_token(token):
+    # Contenu du jeton, ou None s'il est invalide ou expiré
+    data = token_cache.get(token)
+    if data is None:
+        try:
+            data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        except:
+            return None
+        if 'user_id' not in data:
+            return None
+        token_cache.set(token, data)
+    return data
+
+# Cache des réponses du catalogue public (cours et détail d'un cours)
+response_cache = ResponseCache(
+    maxsize=env_int('RESPONSE_CACHE_SIZE', 1000),
+    ttl=env_int('RESPONSE_CACHE_TTL', 60),
+)
+
+def compute_etag(*versions):
+    # ETag fort dérivé des couples (id, updated_at) des lignes renvoyées
+    return hashlib.sha1(repr(versions).encode()).hexdigest()
+
+# Clé des outils qui écrivent dans courses ou modules (POST /api/catalog/invalidate) ;
+# la route est refusée tant qu'elle n'est pas définie
+CATALOG_ADMIN_KEY = os.environ.get('CATALOG_ADMIN_KEY')
+
+def catalog_key_valid(headers):
+    key = headers.get('X-Catalog-Key', '')
+    return bool(CATALOG_ADMIN_KEY) and hmac.compare_digest(key.encode(), CATALOG_ADMIN_KEY.encode())
+
+def parse_catalog_invalidation(data):
+    # course_id de la requête d'invalidation (None : tout le catalogue) ; ValueError s'il est invalide
+    course_id = (data or {}).get('course_id')
+    if course_id is not None and (isinstance(course_id, bool) or not isinstance(course_id, int)):
+        raise ValueError
+    return course_id
+
+def cache_stats():
+    # Compteurs des caches du processus (GET /api/cache/stats)
+    return {'tokens': token_cache.stats(), 'responses': response_cache.stats()}
+
+def invalidate_catalog_cache(course_id=None):
+    # À appeler après toute écriture sur courses ou modules
+    if course_id is None:
+        response_cache.invalidate('/api/courses')
+    else:
+        response_cache.invalidate('/api/courses?', f'/api/courses/{course_id}?')
@@ -1,45 +1,105 @@
 
-from flask import Flask, jsonify, request, make_response
+from flask import Flask, Response, jsonify, request, make_response, g, stream_with_context
 from flask_cors import CORS
 import mysql.connector
-import os
-import jwt
-import datetime
-from functools import wraps
+from functools import wraps, partial
+from db_pool import ConnectionPool
+from api_common import (
+    SECRET_KEY, DB_CONFIG, DEFAULT_PAGE_SIZE, STREAM_BATCH_SIZE, USER_BY_EMAIL_QUERY, COURSES_QUERY,
+    COURSE_DETAIL_QUERY, MODULE_QUERY, USER_CERTIFICATES_QUERY, CERTIFICATE_QUERY,
+    env_int, parse_keyset_params, parse_stream_flag, keyset_query, keyset_page, course_from_rows,
+    create_token, bearer_token, verify_token, response_cache, compute_etag,
+    catalog_key_valid, parse_catalog_invalidation, invalidate_catalog_cache, cache_stats,
+)
 
 app = Flask(__name__)
 CORS(app)
 
-# Clé secrète pour JWT (à stocker de façon sécurisée dans un vrai environnement)
-app.config['SECRET_KEY'] = 'codelearn_secret_key'
+app.config['SECRET_KEY'] = SECRET_KEY
+
+# Pool de connexions partagé par toutes les requêtes
+db_pool = ConnectionPool(
+    partial(mysql.connector.connect, **DB_CONFIG),
+    pool_size=env_int('DB_POOL_SIZE', 5),
+    max_overflow=env_int('DB_POOL_MAX_OVERFLOW', 10),
+    timeout=env_int('DB_POOL_TIMEOUT', 30),
+    recycle_uses=env_int('DB_POOL_RECYCLE_USES', None),
+    recycle_seconds=env_int('DB_POOL_RECYCLE_SECONDS', 3600),
+)
 
-# Configuration de la connexion MySQL
 def get_db_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="password",
-        database="codelearn"
-    )
+    # close() rend la connexion au pool ; celles oubliées après une exception
+    # sont rendues à la fin de la requête
+    conn = db_pool.connect()
+    g.setdefault('db_connections', []).append(conn)
+    return conn
+
+@app.teardown_appcontext
+def release_db_connections(exception=None):
+    for conn in g.pop('db_connections', []):
+        conn.close()
+
+def get_keyset_params(default_limit=DEFAULT_PAGE_SIZE):
+    return parse_keyset_params(request.args, default_limit)
+
+def wants_stream():
+    return parse_stream_flag(request.args)
+
+def stream_json_rows(key, conn, cursor):
+    # Écrit les lignes au fur et à mesure de la lecture du curseur
+    def generate():
+        try:
+            yield '{"%s": [' % key
+            separator = ''
+            while True:
+                rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield separator + app.json.dumps(row)
+                    separator = ','
+            yield ']}'
+        finally:
+            cursor.close()
+            conn.close()
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def cached_response(f):
+    # Sert la réponse depuis le cache, ou un 304 si If-None-Match correspond déjà
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if wants_stream():
+            return f(*args, **kwargs)
+
+        key = request.full_path
+        entry = response_cache.get(key)
+        if entry is None:
+            response = make_response(f(*args, **kwargs))
+            etag, _ = response.get_etag()
+            if response.status_code != 200 or not etag:
+                return response
+            entry = response_cache.set(key, etag, response.get_data(), response.mimetype)
+
+        response = Response(entry.body, mimetype=entry.mimetype)
+        response.set_etag(entry.etag)
+        return response.make_conditional(request)
+
+    return decorated
 
 # Décorateur pour vérifier le token JWT
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            token = auth_header.split(" ")[1] if len(auth_header.split(" ")) > 1 else None
+        token = bearer_token(request.headers)
 
         if not token:
             return jsonify({'message': 'Token manquant!'}), 401
 
-        try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user_id = data['user_id']
-        except:
+        data = verify_token(token)
+        if data is None:
             return jsonify({'message': 'Token invalide!'}), 401
+        current_user_id = data['user_id']
 
         return f(current_user_id, *args, **kwargs)
 
@@ -57,7 +117,7 @@ def login():
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM users WHERE email = %s", (auth.get('email'),))
+        cursor.execute(USER_BY_EMAIL_QUERY, (auth.get('email'),))
         user = cursor.fetchone()
         
         cursor.close()
@@ -70,13 +130,8 @@ def login():
         if auth.get('password') != user['password']:  # Simplification pour l'exemple
             return make_response('Mot de passe incorrect', 401)
         
-        token = jwt.encode({
-            'user_id': user['id'],
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
-        }, app.config['SECRET_KEY'], algorithm="HS256")
-        
         return jsonify({
-            'token': token,
+            'token': create_token(user['id']),
             'user': {
                 'id': user['id'],
                 'name': user['name'],
@@ -119,15 +174,9 @@ def register():
         cursor.close()
         conn.close()
         
-        # Générer un token JWT
-        token = jwt.encode({
-            'user_id': user_id,
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
-        }, app.config['SECRET_KEY'], algorithm="HS256")
-        
         return jsonify({
             'message': 'Utilisateur créé avec succès',
-            'token': token,
+            'token': create_token(user_id),
             'user_id': user_id
         }), 201
         
@@ -135,47 +184,89 @@ def register():
         return make_response(f'Erreur: {str(e)}', 500)
 
 # Routes des cours
+
 @app.route('/api/courses', methods=['GET'])
+@cached_response
 def get_courses():
+    try:
+        limit, after = get_keyset_params(default_limit=None if wants_stream() else DEFAULT_PAGE_SIZE)
+    except ValueError:
+        return make_response('Paramètres de pagination invalides', 400)
+    
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM courses")
-        courses = cursor.fetchall()
+        query = COURSES_QUERY
+        params = (after,)
+        
+        if wants_stream():
+            if limit is not None:
+                query += " LIMIT %s"
+                params += (limit,)
+            cursor.execute(query, params)
+            return stream_json_rows('courses', conn, cursor)
+        
+        cursor.execute(*keyset_query(query, params, limit))
+        courses, next_after = keyset_page(cursor.fetchall(), limit)
         
         cursor.close()
         conn.close()
         
-        return jsonify({'courses': courses})
+        response = jsonify({'courses': courses, 'next_after': next_after})
+        response.set_etag(compute_etag(
+            [(course['id'], course['updated_at']) for course in courses], next_after
+        ))
+        return response
         
     except Exception as e:
         return make_response(f'Erreur: {str(e)}', 500)
 
 @app.route('/api/courses/<int:course_id>', methods=['GET'])
+@cached_response
 def get_course(course_id):
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM courses WHERE id = %s", (course_id,))
-        course = cursor.fetchone()
+        # Le cours et le plan de ses modules en une seule requête
+        cursor.execute(COURSE_DETAIL_QUERY, (course_id,))
+        rows = cursor.fetchall()
         
-        if not course:
-            cursor.close()
-            conn.close()
+        cursor.close()
+        conn.close()
+        
+        if not rows:
             return make_response('Cours non trouvé', 404)
         
-        # Récupérer les modules du cours
-        cursor.execute("SELECT * FROM modules WHERE course_id = %s ORDER BY order_num", (course_id,))
-        modules = cursor.fetchall()
+        course = course_from_rows(rows)
         
-        course['modules'] = modules
+        response = jsonify({'course': course})
+        response.set_etag(compute_etag(
+            (course['id'], course['updated_at']),
+            [(module['id'], module['updated_at']) for module in course['modules']],
+        ))
+        return response
+        
+    except Exception as e:
+        return make_response(f'Erreur: {str(e)}', 500)
+
+@app.route('/api/courses/<int:course_id>/modules/<int:module_id>', methods=['GET'])
+def get_module(course_id, module_id):
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        
+        cursor.execute(MODULE_QUERY, (module_id, course_id))
+        module = cursor.fetchone()
         
         cursor.close()
         conn.close()
         
-        return jsonify({'course': course})
+        if not module:
+            return make_response('Module non trouvé', 404)
+        
+        return jsonify({'module': module})
         
     except Exception as e:
         return make_response(f'Erreur: {str(e)}', 500)
@@ -184,23 +275,32 @@ def get_course(course_id):
 @app.route('/api/certificates', methods=['GET'])
 @token_required
 def get_user_certificates(current_user_id):
+    try:
+        limit, after = get_keyset_params(default_limit=None if wants_stream() else DEFAULT_PAGE_SIZE)
+    except ValueError:
+        return make_response('Paramètres de pagination invalides', 400)
+    
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("""
-            SELECT c.*, cs.name as course_name 
-            FROM certificates c
-            JOIN courses cs ON c.course_id = cs.id
-            WHERE c.user_id = %s
-        """, (current_user_id,))
+        query = USER_CERTIFICATES_QUERY
+        params = (current_user_id, after)
         
-        certificates = cursor.fetchall()
+        if wants_stream():
+            if limit is not None:
+                query += " LIMIT %s"
+                params += (limit,)
+            cursor.execute(query, params)
+            return stream_json_rows('certificates', conn, cursor)
+        
+        cursor.execute(*keyset_query(query, params, limit))
+        certificates, next_after = keyset_page(cursor.fetchall(), limit)
         
         cursor.close()
         conn.close()
         
-        return jsonify({'certificates': certificates})
+        return jsonify({'certificates': certificates, 'next_after': next_after})
         
     except Exception as e:
         return make_response(f'Erreur: {str(e)}', 500)
@@ -211,13 +311,7 @@ def get_certificate(certificate_id):
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("""
-            SELECT c.*, cs.name as course_name, u.name as user_name
-            FROM certificates c
-            JOIN courses cs ON c.course_id = cs.id
-            JOIN users u ON c.user_id = u.id
-            WHERE c.id = %s
-        """, (certificate_id,))
+        cursor.execute(CERTIFICATE_QUERY, (certificate_id,))
         
         certificate = cursor.fetchone()
         
@@ -234,6 +328,28 @@ def get_certificate(certificate_id):
     except Exception as e:
         return make_response(f'Erreur: {str(e)}', 500)
 
+# Routes du catalogue
+@app.route('/api/catalog/invalidate', methods=['POST'])
+def invalidate_catalog():
+    # L'API n'écrit pas le catalogue : les outils qui modifient courses ou modules
+    # appellent cette route pour vider le cache des réponses
+    if not catalog_key_valid(request.headers):
+        return make_response('Clé du catalogue invalide', 403)
+    try:
+        course_id = parse_catalog_invalidation(request.get_json(silent=True))
+    except ValueError:
+        return make_response('Identifiant de cours invalide', 400)
+    
+    invalidate_catalog_cache(course_id)
+    return jsonify({'message': 'Cache du catalogue vidé', 'course_id': course_id})
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    # Compteurs hits/misses des caches de ce processus (jetons JWT, réponses du catalogue)
+    if not catalog_key_valid(request.headers):
+        return make_response('Clé du catalogue invalide', 403)
+    return jsonify(cache_stats())
+
 # Routes des paiements
 @app.route('/api/payments', methods=['POST'])
 @token_required
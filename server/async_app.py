@@ -0,0 +1,367 @@
+"""
+Version asynchrone (ASGI) de l'API Flask de app.py.
+
+Mêmes routes et mêmes réponses, servies par Quart avec un pool de connexions
+aiomysql : une requête qui attend MySQL ne bloque plus de thread.
+
+Dépendances : quart, quart-cors, aiomysql et un serveur ASGI (hypercorn, uvicorn).
+Lancement : hypercorn async_app:app --bind 0.0.0.0:5000
+"""
+
+from quart import Quart, Response, jsonify, request, make_response
+from quart_cors import cors
+import aiomysql
+from functools import wraps
+
+from api_common import (
+    SECRET_KEY, DB_CONFIG, DEFAULT_PAGE_SIZE, STREAM_BATCH_SIZE, USER_BY_EMAIL_QUERY, COURSES_QUERY,
+    COURSE_DETAIL_QUERY, MODULE_QUERY, USER_CERTIFICATES_QUERY, CERTIFICATE_QUERY,
+    env_int, parse_keyset_params, parse_stream_flag, keyset_query, keyset_page, course_from_rows,
+    create_token, bearer_token, verify_token, response_cache, compute_etag,
+    catalog_key_valid, parse_catalog_invalidation, invalidate_catalog_cache, cache_stats,
+)
+
+app = Quart(__name__)
+app = cors(app, allow_origin='*')
+
+app.config['SECRET_KEY'] = SECRET_KEY
+
+db_pool = None
+
+@app.before_serving
+async def create_db_pool():
+    global db_pool
+    # autocommit : une lecture ne laisse pas de transaction ouverte, sinon
+    # Pool.release() fermerait la connexion au lieu de la remettre dans le pool
+    db_pool = await aiomysql.create_pool(
+        host=DB_CONFIG['host'],
+        user=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        db=DB_CONFIG['database'],
+        minsize=env_int('DB_POOL_SIZE', 5),
+        maxsize=env_int('DB_POOL_SIZE', 5) + env_int('DB_POOL_MAX_OVERFLOW', 10),
+        pool_recycle=env_int('DB_POOL_RECYCLE_SECONDS', 3600),
+        autocommit=True,
+    )
+
+@app.after_serving
+async def close_db_pool():
+    db_pool.close()
+    await db_pool.wait_closed()
+
+async def fetch_all(query, params=()):
+    async with db_pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchall()
+
+async def fetch_one(query, params=()):
+    async with db_pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchone()
+
+def get_keyset_params(default_limit=DEFAULT_PAGE_SIZE):
+    return parse_keyset_params(request.args, default_limit)
+
+def wants_stream():
+    return parse_stream_flag(request.args)
+
+def stream_json_rows(key, query, params):
+    # Curseur non bufferisé : les lignes sont écrites au fil de la lecture
+    async def generate():
+        async with db_pool.acquire() as conn:
+            async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+                await cursor.execute(query, params)
+                yield '{"%s": [' % key
+                separator = ''
+                while True:
+                    rows = await cursor.fetchmany(STREAM_BATCH_SIZE)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield separator + app.json.dumps(row)
+                        separator = ','
+                yield ']}'
+
+    return Response(generate(), mimetype='application/json')
+
+def cached_response(f):
+    # Sert la réponse depuis le cache, ou un 304 si If-None-Match correspond déjà
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+        if wants_stream():
+            return await f(*args, **kwargs)
+
+        key = request.full_path
+        entry = response_cache.get(key)
+        if entry is None:
+            response = await make_response(await f(*args, **kwargs))
+            etag, _ = response.get_etag()
+            if response.status_code != 200 or not etag:
+                return response
+            entry = response_cache.set(key, etag, await response.get_data(), response.mimetype)
+
+        response = Response(entry.body, mimetype=entry.mimetype)
+        response.set_etag(entry.etag)
+        await response.make_conditional(request)
+        return response
+
+    return decorated
+
+# Décorateur pour vérifier le token JWT
+def token_required(f):
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+        token = bearer_token(request.headers)
+
+        if not token:
+            return jsonify({'message': 'Token manquant!'}), 401
+
+        data = verify_token(token)
+        if data is None:
+            return jsonify({'message': 'Token invalide!'}), 401
+
+        return await f(data['user_id'], *args, **kwargs)
+
+    return decorated
+
+# Routes d'authentification
+@app.route('/api/auth/login', methods=['POST'])
+async def login():
+    auth = await request.get_json()
+
+    if not auth or not auth.get('email') or not auth.get('password'):
+        return await make_response('Données de connexion manquantes', 401)
+
+    try:
+        user = await fetch_one(USER_BY_EMAIL_QUERY, (auth.get('email'),))
+
+        if not user:
+            return await make_response('Utilisateur non trouvé', 401)
+
+        # Dans un vrai environnement, il faudrait vérifier le mot de passe hashé
+        if auth.get('password') != user['password']:  # Simplification pour l'exemple
+            return await make_response('Mot de passe incorrect', 401)
+
+        return jsonify({
+            'token': create_token(user['id']),
+            'user': {
+                'id': user['id'],
+                'name': user['name'],
+                'email': user['email']
+            }
+        })
+
+    except Exception as e:
+        return await make_response(f'Erreur: {str(e)}', 500)
+
+@app.route('/api/auth/register', methods=['POST'])
+async def register():
+    data = await request.get_json()
+
+    if not data or not data.get('name') or not data.get('email') or not data.get('password'):
+        return await make_response('Données d\'inscription manquantes', 400)
+
+    try:
+        async with db_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                # Vérifier si l'email existe déjà
+                await cursor.execute("SELECT id FROM users WHERE email = %s", (data.get('email'),))
+                if await cursor.fetchone():
+                    return await make_response('Cet email est déjà utilisé', 409)
+
+                # Créer le nouvel utilisateur
+                await cursor.execute(
+                    "INSERT INTO users (name, email, password) VALUES (%s, %s, %s)",
+                    (data.get('name'), data.get('email'), data.get('password'))  # Le mot de passe devrait être hashé
+                )
+                await conn.commit()
+                user_id = cursor.lastrowid
+
+        return jsonify({
+            'message': 'Utilisateur créé avec succès',
+            'token': create_token(user_id),
+            'user_id': user_id
+        }), 201
+
+    except Exception as e:
+        return await make_response(f'Erreur: {str(e)}', 500)
+
+# Routes des cours
+@app.route('/api/courses', methods=['GET'])
+@cached_response
+async def get_courses():
+    try:
+        limit, after = get_keyset_params(default_limit=None if wants_stream() else DEFAULT_PAGE_SIZE)
+    except ValueError:
+        return await make_response('Paramètres de pagination invalides', 400)
+
+    try:
+        query = COURSES_QUERY
+        params = (after,)
+
+        if wants_stream():
+            if limit is not None:
+                query += " LIMIT %s"
+                params += (limit,)
+            return stream_json_rows('courses', query, params)
+
+        rows = await fetch_all(*keyset_query(query, params, limit))
+        courses, next_after = keyset_page(rows, limit)
+
+        response = jsonify({'courses': courses, 'next_after': next_after})
+        response.set_etag(compute_etag(
+            [(course['id'], course['updated_at']) for course in courses], next_after
+        ))
+        return response
+
+    except Exception as e:
+        return await make_response(f'Erreur: {str(e)}', 500)
+
+@app.route('/api/courses/<int:course_id>', methods=['GET'])
+@cached_response
+async def get_course(course_id):
+    try:
+        # Le cours et le plan de ses modules en une seule requête
+        rows = await fetch_all(COURSE_DETAIL_QUERY, (course_id,))
+
+        if not rows:
+            return await make_response('Cours non trouvé', 404)
+
+        course = course_from_rows(rows)
+
+        response = jsonify({'course': course})
+        response.set_etag(compute_etag(
+            (course['id'], course['updated_at']),
+            [(module['id'], module['updated_at']) for module in course['modules']],
+        ))
+        return response
+
+    except Exception as e:
+        return await make_response(f'Erreur: {str(e)}', 500)
+
+@app.route('/api/courses/<int:course_id>/modules/<int:module_id>', methods=['GET'])
+async def get_module(course_id, module_id):
+    try:
+        module = await fetch_one(MODULE_QUERY, (module_id, course_id))
+
+        if not module:
+            return await make_response('Module non trouvé', 404)
+
+        return jsonify({'module': module})
+
+    except Exception as e:
+        return await make_response(f'Erreur: {str(e)}', 500)
+
+# Routes des certificats
+@app.route('/api/certificates', methods=['GET'])
+@token_required
+async def get_user_certificates(current_user_id):
+    try:
+        limit, after = get_keyset_params(default_limit=None if wants_stream() else DEFAULT_PAGE_SIZE)
+    except ValueError:
+        return await make_response('Paramètres de pagination invalides', 400)
+
+    try:
+        query = USER_CERTIFICATES_QUERY
+        params = (current_user_id, after)
+
+        if wants_stream():
+            if limit is not None:
+                query += " LIMIT %s"
+                params += (limit,)
+            return stream_json_rows('certificates', query, params)
+
+        rows = await fetch_all(*keyset_query(query, params, limit))
+        certificates, next_after = keyset_page(rows, limit)
+
+        return jsonify({'certificates': certificates, 'next_after': next_after})
+
+    except Exception as e:
+        return await make_response(f'Erreur: {str(e)}', 500)
+
+@app.route('/api/certificates/<int:certificate_id>', methods=['GET'])
+async def get_certificate(certificate_id):
+    try:
+        certificate = await fetch_one(CERTIFICATE_QUERY, (certificate_id,))
+
+        if not certificate:
+            return await make_response('Certificat non trouvé', 404)
+
+        return jsonify({'certificate': certificate})
+
+    except Exception as e:
+        return await make_response(f'Erreur: {str(e)}', 500)
+
+# Routes du catalogue
+@app.route('/api/catalog/invalidate', methods=['POST'])
+async def invalidate_catalog():
+    # L'API n'écrit pas le catalogue : les outils qui modifient courses ou modules
+    # appellent cette route pour vider le cache des réponses
+    if not catalog_key_valid(request.headers):
+        return await make_response('Clé du catalogue invalide', 403)
+    try:
+        course_id = parse_catalog_invalidation(await request.get_json(silent=True))
+    except ValueError:
+        return await make_response('Identifiant de cours invalide', 400)
+
+    invalidate_catalog_cache(course_id)
+    return jsonify({'message': 'Cache du catalogue vidé', 'course_id': course_id})
+
+@app.route('/api/cache/stats', methods=['GET'])
+async def get_cache_stats():
+    # Compteurs hits/misses des caches de ce processus (jetons JWT, réponses du catalogue)
+    if not catalog_key_valid(request.headers):
+        return await make_response('Clé du catalogue invalide', 403)
+    return jsonify(cache_stats())
+
+# Routes des paiements
+@app.route('/api/payments', methods=['POST'])
+@token_required
+async def create_payment(current_user_id):
+    data = await request.get_json()
+
+    if not data or not data.get('plan_id') or not data.get('card_number'):
+        return await make_response('Données de paiement manquantes', 400)
+
+    try:
+        # Simuler un traitement de paiement (dans un vrai environnement, utiliser une API de paiement)
+        payment_status = "completed"  # Simuler une réussite
+
+        async with db_pool.acquire() as conn:
+            # Paiement et abonnement dans une même transaction (le pool est en autocommit) ;
+            # en cas d'erreur, le pool ferme la connexion et la transaction est annulée
+            await conn.begin()
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """INSERT INTO payments
+                       (user_id, plan_id, amount, status, payment_date)
+                       VALUES (%s, %s, %s, %s, NOW())""",
+                    (current_user_id, data.get('plan_id'), data.get('amount'), payment_status)
+                )
+                payment_id = cursor.lastrowid
+
+                # Si le paiement est réussi, créer un abonnement
+                if payment_status == "completed":
+                    await cursor.execute(
+                        """INSERT INTO subscriptions
+                           (user_id, plan_id, start_date, end_date, status)
+                           VALUES (%s, %s, NOW(), DATE_ADD(NOW(), INTERVAL 1 MONTH), 'active')""",
+                        (current_user_id, data.get('plan_id'))
+                    )
+
+                await conn.commit()
+
+        return jsonify({
+            'message': 'Paiement traité avec succès',
+            'payment_id': payment_id,
+            'status': payment_status
+        }), 201
+
+    except Exception as e:
+        return await make_response(f'Erreur: {str(e)}', 500)
+
+# Point d'entrée principal (serveur de développement ; utiliser hypercorn/uvicorn en production)
+if __name__ == '__main__':
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,98 @@
+"""
+Micro-benchmark du cache des jetons JWT (token_cache) sur les routes
+authentifiées de app.py : GET /api/certificates et POST /api/payments.
+
+Les requêtes passent par le client de test Flask, sans serveur HTTP ; la
+base est remplacée par une connexion en mémoire qui répond immédiatement,
+pour que la mesure ne contienne que le travail de l'API elle-même :
+
+    cd server && python benchmark_token_cache.py -n 5000
+
+Chaque route est mesurée deux fois avec le même jeton : en vidant le cache
+avant chaque requête (vérification HMAC complète), puis avec le cache. Le
+script affiche les latences et le gain par requête, puis les compteurs de
+token_cache.stats() (également servis par GET /api/cache/stats).
+"""
+
+import argparse
+import statistics
+import time
+
+import app as api
+from api_common import create_token, token_cache
+
+
+class MemoryCursor:
+    lastrowid = 1
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class MemoryConnection:
+    def cursor(self, dictionary=False):
+        return MemoryCursor()
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemoryPool:
+    def connect(self):
+        return MemoryConnection()
+
+
+def measure(client, method, path, headers, body, requests, cached):
+    token = headers['Authorization'].split(" ")[1]
+    latencies = []
+    for _ in range(requests):
+        if not cached:
+            token_cache.invalidate(token)
+        started = time.perf_counter()
+        response = client.open(path, method=method, headers=headers, json=body)
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code < 400, response.status_code
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure le gain du cache des jetons JWT par requête.")
+    parser.add_argument('-n', '--requests', type=int, default=2000, help="Requêtes par mesure")
+    args = parser.parse_args()
+
+    api.db_pool = MemoryPool()
+    client = api.app.test_client()
+    headers = {'Authorization': f'Bearer {create_token(1)}'}
+    routes = [
+        ('GET', '/api/certificates', None),
+        ('POST', '/api/payments', {'plan_id': 1, 'amount': 9.99, 'card_number': '4242424242424242'}),
+    ]
+
+    for method, path, body in routes:
+        # Première requête hors mesure (imports, compilation des routes)
+        client.open(path, method=method, headers=headers, json=body)
+        without_cache = measure(client, method, path, headers, body, args.requests, cached=False)
+        with_cache = measure(client, method, path, headers, body, args.requests, cached=True)
+        print(f"{method:4} {path}")
+        print(f"  sans cache : médiane {without_cache[0]:.3f} ms, p95 {without_cache[1]:.3f} ms")
+        print(f"  avec cache : médiane {with_cache[0]:.3f} ms, p95 {with_cache[1]:.3f} ms")
+        print(f"  gain       : {(without_cache[0] - with_cache[0]) * 1000:.0f} µs par requête")
+
+    print(f"token_cache : {token_cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
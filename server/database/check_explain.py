@@ -0,0 +1,106 @@
+"""
+Vérifie les plans d'exécution (EXPLAIN) des requêtes de app.py.
+
+Échoue (code de sortie 1) si une requête parcourt entièrement une table
+volumineuse, ce qui signale un index manquant après une évolution du schéma.
+
+Usage : python database/check_explain.py [--min-rows 1000]
+(depuis le dossier server/, base codelearn migrée)
+"""
+
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector
+
+from api_common import (
+    DB_CONFIG, USER_BY_EMAIL_QUERY, COURSES_QUERY, COURSE_DETAIL_QUERY, MODULE_QUERY,
+    USER_CERTIFICATES_QUERY, CERTIFICATE_QUERY,
+)
+
+# Requêtes de lecture de app.py, avec des paramètres représentatifs
+QUERIES = [
+    ("login", USER_BY_EMAIL_QUERY, ('admin@example.com',)),
+    ("courses", COURSES_QUERY + " LIMIT %s", (0, 51)),
+    ("course_detail", COURSE_DETAIL_QUERY, (1,)),
+    ("module", MODULE_QUERY, (1, 1)),
+    ("user_certificates", USER_CERTIFICATES_QUERY + " LIMIT %s", (1, 0, 51)),
+    ("certificate", CERTIFICATE_QUERY, (1,)),
+]
+
+# Types d'accès correspondant à un parcours complet (de la table ou d'un index)
+FULL_SCAN_TYPES = ('ALL', 'index')
+
+# Tables citées après FROM / JOIN, avec leur alias éventuel
+TABLE_REFERENCE_RE = re.compile(r'\b(?:FROM|JOIN)\s+`?(\w+)`?(?:\s+(?:AS\s+)?`?(\w+)`?)?', re.IGNORECASE)
+SQL_KEYWORDS = {'where', 'on', 'using', 'join', 'left', 'right', 'inner', 'outer', 'cross', 'natural',
+                'straight_join', 'order', 'group', 'having', 'limit', 'union', 'for'}
+
+
+def table_aliases(query):
+    # EXPLAIN donne l'alias dans la colonne `table` (c, cs, m...) : on le ramène au nom de la table
+    aliases = {}
+    for table, alias in TABLE_REFERENCE_RE.findall(query):
+        aliases[table] = table
+        if alias and alias.lower() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def table_sizes(cursor):
+    cursor.execute(
+        "SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s",
+        (DB_CONFIG['database'],)
+    )
+    return {row['TABLE_NAME']: row['TABLE_ROWS'] or 0 for row in cursor.fetchall()}
+
+
+def check(min_rows):
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor(dictionary=True)
+    sizes = table_sizes(cursor)
+    failures = []
+
+    for name, query, params in QUERIES:
+        aliases = table_aliases(query)
+        cursor.execute("EXPLAIN " + query, params)
+        for row in cursor.fetchall():
+            alias = row['table']
+            table = aliases.get(alias, alias)
+            print(f"{name:20} {table or '-':15} type={row['type']} key={row['key']} rows={row['rows']} extra={row['Extra']}")
+            if table is None or table.startswith('<'):
+                # Ligne sans table réelle (constante, <derivedN>, <subqueryN>)
+                continue
+            if table not in sizes:
+                failures.append(f"{name}: table {table} introuvable dans {DB_CONFIG['database']}")
+                continue
+            rows = sizes[table]
+            if row['type'] in FULL_SCAN_TYPES and rows >= min_rows:
+                failures.append(f"{name}: parcours complet de {table} ({rows} lignes)")
+
+    cursor.close()
+    conn.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--min-rows', type=int, default=1000,
+                        help="taille à partir de laquelle un parcours complet est refusé")
+    args = parser.parse_args()
+
+    failures = check(args.min_rows)
+    if failures:
+        print("\nParcours complets détectés :")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nAucun parcours complet sur une table volumineuse.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+-- Migration 001 : index composites et couvrants pour les chemins d'accès de l'API
+-- À appliquer après schema.sql : mysql -u root -p codelearn < migrations/001_access_path_indexes.sql
+-- Rejouable : les index déjà présents sont ignorés (MySQL n'a pas de CREATE INDEX IF NOT EXISTS)
+USE codelearn;
+
+-- Suivi des migrations appliquées
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+DROP PROCEDURE IF EXISTS create_index_if_missing;
+
+DELIMITER //
+CREATE PROCEDURE create_index_if_missing(IN p_table VARCHAR(64), IN p_index VARCHAR(64), IN p_columns VARCHAR(255))
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_table AND INDEX_NAME = p_index
+    ) THEN
+        SET @ddl = CONCAT('CREATE INDEX ', p_index, ' ON ', p_table, ' (', p_columns, ')');
+        PREPARE statement FROM @ddl;
+        EXECUTE statement;
+        DEALLOCATE PREPARE statement;
+    END IF;
+END //
+DELIMITER ;
+
+-- Seuls les chemins d'accès des requêtes vérifiées par check_explain.py sont indexés :
+-- l'API ne fait qu'insérer dans payments et subscriptions, un index y ralentirait chaque écriture
+
+-- Plan d'un cours : modules d'un cours triés par ordre (GET /api/courses/<id>)
+CALL create_index_if_missing('modules', 'idx_modules_course_order', 'course_id, order_num');
+
+-- Certificats d'un utilisateur, parcourus par id (GET /api/certificates?after=)
+CALL create_index_if_missing('certificates', 'idx_certificates_user_id', 'user_id, id');
+
+DROP PROCEDURE create_index_if_missing;
+
+INSERT IGNORE INTO schema_migrations (version) VALUES ('001_access_path_indexes');
@@ -1,5 +1,6 @@
 
 -- Création de la base de données
+-- Les évolutions ultérieures (index, etc.) sont dans database/migrations/, à appliquer dans l'ordre
 CREATE DATABASE IF NOT EXISTS codelearn;
 USE codelearn;
 
@@ -0,0 +1,251 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Levée quand aucune connexion ne se libère avant la fin du délai d'attente."""
+
+
+class _ConnectionRecord:
+    """Connexion brute et ses compteurs de recyclage."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.uses = 0
+
+
+class PooledConnection:
+    """
+    Connexion empruntée au pool.
+
+    Se comporte comme la connexion sous-jacente ; close() la rend au pool
+    au lieu de la fermer, et peut être appelée plusieurs fois sans effet.
+    """
+
+    def __init__(self, pool, record):
+        self._pool = pool
+        self._record = record
+
+    def __getattr__(self, name):
+        if self._record is None:
+            raise AttributeError("Connexion déjà rendue au pool")
+        return getattr(self._record.raw, name)
+
+    @property
+    def closed(self):
+        return self._record is None
+
+    def close(self):
+        if self._record is not None:
+            record, self._record = self._record, None
+            self._pool._release(record)
+
+    def invalidate(self):
+        """Ferme réellement la connexion (par exemple après une erreur réseau)."""
+        if self._record is not None:
+            record, self._record = self._record, None
+            self._pool._discard(record)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Pool de connexions thread-safe.
+
+    - pool_size : nombre de connexions conservées au repos
+    - max_overflow : connexions supplémentaires autorisées lors des pics,
+      fermées dès leur retour
+    - timeout : délai maximal (secondes) d'attente d'une connexion libre
+    - recycle_uses / recycle_seconds : une connexion est remplacée après
+      N emprunts ou T secondes d'existence
+    - pre_ping : vérifie que la connexion est vivante avant de la prêter
+
+    `creator` est un appelable sans argument qui ouvre une connexion DB-API ;
+    n'importe quelle base locale (sqlite3 par exemple) peut donc remplacer
+    MySQL pour les essais.
+    """
+
+    def __init__(self, creator, pool_size=5, max_overflow=10, timeout=30.0,
+                 recycle_uses=None, recycle_seconds=None, pre_ping=True):
+        if pool_size < 1:
+            raise ValueError("pool_size doit être au moins 1")
+        if max_overflow < 0:
+            raise ValueError("max_overflow ne peut pas être négatif")
+
+        self._creator = creator
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle_uses = recycle_uses
+        self.recycle_seconds = recycle_seconds
+        self.pre_ping = pre_ping
+
+        self._idle = deque()
+        self._total = 0
+        self._in_use = 0
+        self._cond = threading.Condition(threading.Lock())
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._invalidated = 0
+
+    def connect(self, timeout=None):
+        """Emprunte une connexion ; bloque au plus `timeout` secondes."""
+        timeout = self.timeout if timeout is None else timeout
+
+        while True:
+            record = self._checkout_record(timeout)
+            if record is None:
+                # Emplacement réservé : on ouvre la connexion hors du verrou
+                try:
+                    record = _ConnectionRecord(self._creator())
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._created += 1
+            elif not self._is_usable(record):
+                self._discard(record)
+                continue
+
+            record.uses += 1
+            return PooledConnection(self, record)
+
+    def _checkout_record(self, timeout):
+        # Renvoie une connexion au repos, ou None si un nouvel emplacement a été réservé
+        with self._cond:
+            self._checkouts += 1
+            started = None
+            while True:
+                if self._idle or self._total < self.pool_size + self.max_overflow:
+                    if started is not None:
+                        self._wait_time += time.monotonic() - started
+                    self._in_use += 1
+                    if self._idle:
+                        return self._idle.pop()
+                    self._total += 1
+                    return None
+
+                now = time.monotonic()
+                if started is None:
+                    started = now
+                    self._waits += 1
+                remaining = timeout - (now - started)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    self._wait_time += now - started
+                    raise PoolTimeout(
+                        f"Aucune connexion disponible après {timeout:.1f}s "
+                        f"(pool_size={self.pool_size}, max_overflow={self.max_overflow})"
+                    )
+                self._cond.wait(remaining)
+
+    def _is_usable(self, record):
+        if self._is_expired(record):
+            with self._cond:
+                self._recycled += 1
+            return False
+        if self.pre_ping and not self._ping(record.raw):
+            with self._cond:
+                self._invalidated += 1
+            return False
+        return True
+
+    def _is_expired(self, record):
+        if self.recycle_uses is not None and record.uses >= self.recycle_uses:
+            return True
+        if (self.recycle_seconds is not None
+                and time.monotonic() - record.created_at >= self.recycle_seconds):
+            return True
+        return False
+
+    @staticmethod
+    def _ping(raw):
+        try:
+            # mysql.connector expose ping() ; les autres pilotes DB-API non
+            if hasattr(raw, 'ping'):
+                raw.ping(reconnect=False)
+            else:
+                cursor = raw.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _release(self, record):
+        # Annuler une éventuelle transaction laissée ouverte par la requête
+        try:
+            record.raw.rollback()
+        except Exception:
+            self._discard(record)
+            return
+
+        expired = self._is_expired(record)
+        with self._cond:
+            self._in_use -= 1
+            if len(self._idle) < self.pool_size and not expired:
+                self._idle.append(record)
+                self._cond.notify()
+                return
+            if expired:
+                self._recycled += 1
+            self._total -= 1
+            self._cond.notify()
+        self._close_raw(record)
+
+    def _discard(self, record):
+        with self._cond:
+            self._in_use -= 1
+            self._total -= 1
+            self._cond.notify()
+        self._close_raw(record)
+
+    @staticmethod
+    def _close_raw(record):
+        try:
+            record.raw.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """Ferme toutes les connexions au repos."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for record in idle:
+            self._close_raw(record)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'total': self._total,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'overflow': max(self._total - self.pool_size, 0),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time': round(self._wait_time, 6),
+                'timeouts': self._timeouts,
+                'created': self._created,
+                'recycled': self._recycled,
+                'invalidated': self._invalidated,
+            }
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+class CertificatesConfig(AppConfig):
+    name = 'certificates'
+    verbose_name = "Certificats"
+
+    def ready(self):
+        from . import signals  # noqa: F401
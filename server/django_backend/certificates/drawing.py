@@ -0,0 +1,106 @@
+"""
+Certificate drawing, run in the processes of certificates.rendering.
+
+Pillow only, no Django: the render pool starts fresh interpreters that
+import nothing but this module. A job draws one certificate from its
+inputs onto the template (a background image, or a plain bordered page)
+and writes the PNG or PDF file atomically (temporary file + rename), so
+concurrent renders of the same artifact are harmless.
+"""
+
+import os
+import tempfile
+from datetime import date
+
+from PIL import Image, ImageDraw, ImageFont
+
+# A4 landscape at 150 dpi
+PAGE_SIZE = (1754, 1240)
+RESOLUTION = 150
+
+INK = (33, 37, 41)
+ACCENT = (13, 110, 253)
+MUTED = (108, 117, 125)
+VOID = (220, 53, 69)
+
+def _font(path, size):
+    try:
+        return ImageFont.truetype(path, size)
+    except OSError:
+        return ImageFont.load_default()
+
+def _centered(draw, y, text, font, fill, width):
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    draw.text(((width - (right - left)) / 2, y), text, font=font, fill=fill)
+
+def _fit(draw, text, path, size, max_width):
+    # Shrink long names and course titles until they fit on one line
+    font = _font(path, size)
+    while size > 24 and draw.textlength(text, font=font) > max_width:
+        size -= 4
+        font = _font(path, size)
+    return font
+
+def _page(template):
+    if template and template.get('background'):
+        with Image.open(template['background']) as background:
+            return background.convert('RGB').resize(PAGE_SIZE)
+    page = Image.new('RGB', PAGE_SIZE, 'white')
+    draw = ImageDraw.Draw(page)
+    width, height = PAGE_SIZE
+    draw.rectangle((40, 40, width - 40, height - 40), outline=ACCENT, width=12)
+    draw.rectangle((70, 70, width - 70, height - 70), outline=MUTED, width=2)
+    return page
+
+def _void_stamp(page, font_path):
+    # Invalidated certificates keep their layout under a diagonal stamp
+    stamp = Image.new('RGBA', PAGE_SIZE, (0, 0, 0, 0))
+    _centered(ImageDraw.Draw(stamp), PAGE_SIZE[1] / 2 - 80, "CERTIFICAT INVALIDE", _font(font_path, 120),
+              VOID + (150,), PAGE_SIZE[0])
+    stamp = stamp.rotate(20, resample=Image.BICUBIC)
+    return Image.alpha_composite(page.convert('RGBA'), stamp).convert('RGB')
+
+def draw_certificate(inputs, template):
+    """
+    Draw a certificate page from its inputs (see rendering.certificate_inputs).
+    """
+    page = _page(template)
+    draw = ImageDraw.Draw(page)
+    width = PAGE_SIZE[0]
+    regular, bold = template['font'], template['bold_font']
+    issue_date = date.fromisoformat(inputs['issue_date']).strftime('%d/%m/%Y')
+
+    _centered(draw, 190, "CodeLearn", _font(bold, 56), ACCENT, width)
+    _centered(draw, 300, "Certificat de réussite", _font(bold, 84), INK, width)
+    _centered(draw, 450, "Décerné à", _font(regular, 40), MUTED, width)
+    _centered(draw, 520, inputs['holder'], _fit(draw, inputs['holder'], bold, 96, width - 300), INK, width)
+    _centered(draw, 680, "pour avoir terminé le cours", _font(regular, 40), MUTED, width)
+    _centered(draw, 750, inputs['course'], _fit(draw, inputs['course'], bold, 64, width - 300), INK, width)
+    _centered(draw, 960, f"Délivré le {issue_date}", _font(regular, 36), INK, width)
+    if inputs.get('expiry_date'):
+        expiry_date = date.fromisoformat(inputs['expiry_date']).strftime('%d/%m/%Y')
+        _centered(draw, 1010, f"Valable jusqu'au {expiry_date}", _font(regular, 32), MUTED, width)
+    _centered(draw, 1080, f"N° {inputs['certificate_id']}", _font(regular, 32), MUTED, width)
+
+    if not inputs['is_valid']:
+        page = _void_stamp(page, bold)
+    return page
+
+def render(inputs, template, file_format, path):
+    """
+    Draw a certificate and write it to `path` as 'png' or 'pdf'. Returns `path`.
+    """
+    page = draw_certificate(inputs, template)
+    directory = os.path.dirname(path)
+    fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            if file_format == 'pdf':
+                page.save(output, 'PDF', resolution=RESOLUTION)
+            else:
+                page.save(output, 'PNG', optimize=True)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return path
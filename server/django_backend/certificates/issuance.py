@@ -0,0 +1,111 @@
+"""
+Bulk certificate issuance.
+
+Every (user, course) progress row that is completed and has no certificate
+yet is found with one anti-join (NOT EXISTS on certificates) and gets its
+certificate, chunk by chunk, with one bulk INSERT per chunk. The same query
+drives resuming: an interrupted run leaves the issued pairs out of the next
+one, and `after` (the last progress id reported) skips what was already
+scanned.
+
+The INSERT has no IGNORE: pairs certified in the meantime and drawn ids
+already in use are checked first, and the rare insert that still conflicts
+with a concurrent one fails, rolls back and retries the chunk.
+"""
+
+import secrets
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from users import stats
+from users.models import UserCourseProgress
+
+from .models import Certificate
+
+# Progress rows handled per INSERT
+CHUNK_SIZE = 1000
+
+# Attempts at drawing unused certificate ids, and at inserting a chunk
+MAX_ID_ATTEMPTS = 3
+
+def new_certificate_id():
+    return f"CL-{secrets.token_hex(4).upper()}"
+
+def eligible_progress(course_id=None):
+    """
+    Completed progress rows without a certificate, in id order.
+    """
+    queryset = UserCourseProgress.objects.filter(
+        Q(completed=True) | Q(progress_percentage__gte=100)
+    ).filter(
+        ~Exists(Certificate.objects.filter(user_id=OuterRef('user_id'), course_id=OuterRef('course_id')))
+    )
+    if course_id is not None:
+        queryset = queryset.filter(course_id=course_id)
+    return queryset.order_by('pk')
+
+def _draw_ids(count):
+    # `count` certificate ids, distinct and not stored yet
+    ids = set()
+    for _ in range(MAX_ID_ATTEMPTS):
+        drawn = {new_certificate_id() for _ in range(count - len(ids))}
+        ids |= drawn - set(Certificate.objects.filter(certificate_id__in=drawn).values_list('certificate_id', flat=True))
+        if len(ids) == count:
+            return list(ids)
+    raise RuntimeError("Impossible de tirer des identifiants de certificat inutilisés")
+
+def _issue_chunk(rows):
+    # rows: [(progress id, user id, course id, course title)]. Returns the number issued.
+    pending = {(user_id, course_id): title for progress_id, user_id, course_id, title in rows}
+    for attempt in range(MAX_ID_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                # Pairs certified since the chunk was read (by `generate`) are left out, so the
+                # INSERT has no conflict to skip; one certified concurrently makes it fail and retry
+                certified = set(Certificate.objects.filter(
+                    user_id__in={user_id for user_id, course_id in pending},
+                    course_id__in={course_id for user_id, course_id in pending},
+                ).values_list('user_id', 'course_id'))
+                pending = {pair: title for pair, title in pending.items() if pair not in certified}
+                if not pending:
+                    return 0
+                Certificate.objects.bulk_create([
+                    Certificate(user_id=user_id, course_id=course_id, title=title, certificate_id=certificate_id)
+                    for ((user_id, course_id), title), certificate_id in zip(pending.items(), _draw_ids(len(pending)))
+                ])
+                # bulk_create bypasses the post_save signal that keeps the dashboard counters
+                stats.increment('total_certificates', len(pending))
+                stats.increment_daily('certificates_issued', timezone.now(), len(pending))
+            return len(pending)
+        except IntegrityError:
+            if attempt == MAX_ID_ATTEMPTS - 1:
+                raise
+
+def issue_certificates(course_id=None, chunk_size=CHUNK_SIZE, after=0, progress=None):
+    """
+    Issue a certificate for every eligible (user, course) pair.
+
+    `progress(issued, scanned, total, last_id)` is called after each chunk;
+    `last_id` can be passed back as `after` to resume an interrupted run.
+    Returns the number of certificates issued.
+    """
+    queryset = eligible_progress(course_id).filter(pk__gt=after)
+    total = queryset.count()
+    issued = scanned = 0
+    last_id = after
+    while True:
+        rows = list(queryset.filter(pk__gt=last_id).values_list(
+            'pk', 'user_id', 'course_id', 'course__title'
+        )[:chunk_size])
+        if not rows:
+            break
+        issued += _issue_chunk(rows)
+        scanned += len(rows)
+        last_id = rows[-1][0]
+        if progress is not None:
+            progress(issued, scanned, total, last_id)
+        if len(rows) < chunk_size:
+            break
+    return issued
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from certificates.issuance import CHUNK_SIZE, issue_certificates
+
+class Command(BaseCommand):
+    help = "Issue a certificate to every learner who completed a course and has none yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, help="Only this course id")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Certificates inserted per query")
+        parser.add_argument('--after', type=int, default=0,
+                            help="Resume after this progress id (the last one reported by an interrupted run)")
+
+    def handle(self, *args, **options):
+        def report(issued, scanned, total, last_id):
+            self.stdout.write(f"{scanned}/{total} progressions traitées, {issued} certificats émis (dernier id : {last_id})")
+
+        issued = issue_certificates(
+            course_id=options['course'], chunk_size=options['chunk_size'], after=options['after'], progress=report
+        )
+        self.stdout.write(self.style.SUCCESS(f"{issued} certificats émis."))
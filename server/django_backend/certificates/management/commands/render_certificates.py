@@ -0,0 +1,47 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from django.core.management.base import BaseCommand
+
+from certificates.models import Certificate
+from certificates.rendering import FORMATS, Artifact, render_pool
+
+class Command(BaseCommand):
+    help = "Render the missing certificate files into the artifact cache (e.g. after a template change)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, help="Only the certificates of this course id")
+        parser.add_argument('--format', choices=list(FORMATS), action='append', dest='formats',
+                            help="File format to render (repeatable, default: all)")
+
+    def handle(self, *args, **options):
+        formats = options['formats'] or list(FORMATS)
+        queryset = Certificate.objects.select_related('user', 'course').order_by('pk')
+        if options['course']:
+            queryset = queryset.filter(course_id=options['course'])
+
+        pending = {}
+        rendered = 0
+        try:
+            for certificate in queryset.iterator(chunk_size=500):
+                for file_format in formats:
+                    artifact = Artifact(certificate, file_format)
+                    if artifact.is_cached():
+                        continue
+                    pending[artifact.submit()] = artifact
+                    # Keep a bounded number of jobs queued in the pool
+                    if len(pending) >= render_pool.size * 4:
+                        done = self._collect(pending, FIRST_COMPLETED)
+                        if (rendered + done) // 100 > rendered // 100:
+                            self.stdout.write(f"{rendered + done} fichiers générés...")
+                        rendered += done
+            rendered += self._collect(pending)
+        finally:
+            render_pool.close()
+        self.stdout.write(self.style.SUCCESS(f"{rendered} fichiers de certificat générés."))
+
+    def _collect(self, pending, return_when='ALL_COMPLETED'):
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            future.result()
+            pending.pop(future).finish()
+        return len(done)
@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-18 12:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Certificate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255, verbose_name='Titre')),
+                ('issue_date', models.DateTimeField(auto_now_add=True, verbose_name="Date d'émission")),
+                ('certificate_id', models.CharField(max_length=50, unique=True, verbose_name='ID du certificat')),
+                ('expiry_date', models.DateTimeField(blank=True, null=True, verbose_name="Date d'expiration")),
+                ('is_valid', models.BooleanField(default=True, verbose_name='Est valide')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='certificates', to='courses.course', verbose_name='Cours')),
+            ],
+            options={
+                'verbose_name': 'Certificat',
+                'verbose_name_plural': 'Certificats',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 12:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('certificates', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='certificates', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='certificate',
+            unique_together={('user', 'course')},
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+def revoke_invalid_certificates(apps, schema_editor):
+    Certificate = apps.get_model('certificates', 'Certificate')
+    RevokedCertificate = apps.get_model('certificates', 'RevokedCertificate')
+    RevokedCertificate.objects.bulk_create([
+        RevokedCertificate(certificate_id=certificate_id)
+        for certificate_id in Certificate.objects.filter(is_valid=False).values_list('certificate_id', flat=True)
+    ], batch_size=1000)
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('certificates', '0003_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedCertificate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('certificate_id', models.CharField(max_length=50, unique=True, verbose_name='ID du certificat')),
+                ('revoked_at', models.DateTimeField(auto_now_add=True, verbose_name='Révoqué le')),
+            ],
+            options={
+                'verbose_name': 'Certificat révoqué',
+                'verbose_name_plural': 'Certificats révoqués',
+            },
+        ),
+        migrations.RunPython(revoke_invalid_certificates, migrations.RunPython.noop),
+    ]
@@ -18,6 +18,25 @@ class Certificate(models.Model):
         verbose_name = "Certificat"
         verbose_name_plural = "Certificats"
         unique_together = ['user', 'course']
+        indexes = [
+            # Pagination par curseur (CertificatePagination) : liste admin et liste d'un utilisateur
+            models.Index(fields=['issue_date', 'id'], name='certificate_issue_idx'),
+            models.Index(fields=['user', 'issue_date', 'id'], name='certificate_user_issue_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.course.title} - {self.certificate_id}"
+
+class RevokedCertificate(models.Model):
+    """
+    Id of an invalidated or deleted certificate, checked by the public token verification.
+    """
+    certificate_id = models.CharField(max_length=50, unique=True, verbose_name="ID du certificat")
+    revoked_at = models.DateTimeField(auto_now_add=True, verbose_name="Révoqué le")
+    
+    class Meta:
+        verbose_name = "Certificat révoqué"
+        verbose_name_plural = "Certificats révoqués"
+    
+    def __str__(self):
+        return self.certificate_id
@@ -0,0 +1,184 @@
+"""
+Certificate rendering (PNG and PDF) with an on-disk artifact cache.
+
+Certificates are drawn by certificates/drawing.py in a pool of worker
+processes, so a burst of downloads does not hold the web workers' GIL or
+render more pages at once than POOL_SIZE. Each artifact is stored under a
+hash of everything drawn on it (certificate fields, holder name, course
+title, validity, template, drawing version) and is therefore re-rendered
+when any of them changes, e.g. when a certificate is invalidated or its
+course renamed; the superseded files of the certificate are then removed.
+The hash doubles as the download's ETag.
+"""
+
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from . import drawing
+from .tokens import holder_name
+
+FORMATS = {
+    'png': 'image/png',
+    'pdf': 'application/pdf',
+}
+
+# Bump when drawing.py changes, to re-render every cached artifact
+DRAWING_VERSION = 1
+
+class RenderUnavailable(Exception):
+    """
+    The render pool could not draw a file in time (busy, or its workers keep dying).
+    """
+
+def _setting(name, default):
+    return getattr(settings, 'CERTIFICATE_RENDERING', {}).get(name, default)
+
+def certificate_inputs(certificate):
+    """
+    Everything drawn on a certificate (needs certificate.user and certificate.course).
+    """
+    return {
+        'certificate_id': certificate.certificate_id,
+        'holder': holder_name(certificate.user),
+        'title': certificate.title,
+        'course': certificate.course.title,
+        'issue_date': certificate.issue_date.date().isoformat(),
+        'expiry_date': certificate.expiry_date.date().isoformat() if certificate.expiry_date else None,
+        'is_valid': certificate.is_valid,
+    }
+
+def template_inputs():
+    template = {
+        'background': _setting('TEMPLATE', None),
+        'font': _setting('FONT', 'DejaVuSans.ttf'),
+        'bold_font': _setting('BOLD_FONT', 'DejaVuSans-Bold.ttf'),
+    }
+    if template['background']:
+        # Replacing the template file changes the key of every artifact
+        stat = os.stat(template['background'])
+        template['background_version'] = [stat.st_mtime_ns, stat.st_size]
+    return template
+
+def artifact_key(inputs, template, file_format):
+    payload = json.dumps([DRAWING_VERSION, file_format, inputs, template], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def artifact_path(certificate_id, key, file_format):
+    return os.path.join(_setting('DIR', 'certificate_artifacts'), f"{certificate_id}-{key[:32]}.{file_format}")
+
+def remove_artifacts(certificate_id, keep=()):
+    """
+    Delete the cached files of a certificate, except the paths in `keep`.
+    """
+    pattern = os.path.join(glob.escape(_setting('DIR', 'certificate_artifacts')), f"{glob.escape(certificate_id)}-*")
+    for path in glob.glob(pattern):
+        if path not in keep:
+            try:
+                os.unlink(path)
+            except OSError:
+                # Already removed, or still open where that prevents unlinking (Windows):
+                # the next render of the certificate retries
+                pass
+
+class RenderPool:
+    """
+    Worker processes drawing certificates, started on first use.
+
+    Workers are spawned (not forked) so they do not inherit the web
+    worker's threads and connections; they only import drawing.py. A worker
+    that dies (killed, out of memory) breaks the whole executor: the next
+    submit replaces it with a new one.
+    """
+
+    def __init__(self, size=2):
+        self.size = size
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, *args):
+        with self._lock:
+            if self._executor is not None:
+                try:
+                    return self._executor.submit(drawing.render, *args)
+                except BrokenProcessPool:
+                    self._executor.shutdown(wait=False)
+            self._executor = ProcessPoolExecutor(self.size, mp_context=multiprocessing.get_context('spawn'))
+            return self._executor.submit(drawing.render, *args)
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+render_pool = RenderPool(size=_setting('POOL_SIZE', 2))
+
+class Artifact:
+    """
+    A certificate file, identified by its inputs; `path` exists once rendered.
+    """
+
+    def __init__(self, certificate, file_format):
+        self.certificate_id = certificate.certificate_id
+        self.file_format = file_format
+        self.content_type = FORMATS[file_format]
+        self.inputs = certificate_inputs(certificate)
+        self.template = template_inputs()
+        self.key = artifact_key(self.inputs, self.template, file_format)
+        self.path = artifact_path(self.certificate_id, self.key, file_format)
+        self.filename = f"certificat-{self.certificate_id}.{file_format}"
+
+    def is_cached(self):
+        return os.path.exists(self.path)
+
+    def submit(self, pool=None):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        return (pool or render_pool).submit(self.inputs, self.template, self.file_format, self.path)
+
+    def finish(self):
+        # Drop the renders superseded by this one; the current file of the other format stays
+        remove_artifacts(self.certificate_id, keep={
+            artifact_path(self.certificate_id, artifact_key(self.inputs, self.template, file_format), file_format)
+            for file_format in FORMATS
+        })
+
+    def render(self, pool=None):
+        """
+        Render the file unless it is cached; returns self.
+
+        Raises RenderUnavailable when the render takes longer than the TIMEOUT
+        setting, or fails twice because a pool worker died.
+        """
+        if not self.is_cached():
+            timeout = _setting('TIMEOUT', 30)
+            try:
+                try:
+                    self.submit(pool).result(timeout=timeout)
+                except BrokenProcessPool:
+                    # Submitting again replaces the broken executor
+                    self.submit(pool).result(timeout=timeout)
+            except (FutureTimeoutError, BrokenProcessPool) as error:
+                raise RenderUnavailable(str(error) or type(error).__name__) from error
+            self.finish()
+        return self
+
+    def open(self, pool=None):
+        """
+        Render the file unless it is cached and open it for reading.
+
+        An open file stays readable when a newer render of the certificate
+        removes it (finish), so a download in progress is not cut short.
+        """
+        try:
+            return open(self.render(pool).path, 'rb')
+        except FileNotFoundError:
+            # Removed between the render and the open: render it again
+            return open(self.render(pool).path, 'rb')
@@ -1,19 +1,31 @@
 
+from django.urls import reverse
 from rest_framework import serializers
 from .models import Certificate
+from .tokens import holder_name, make_token
 
 class CertificateSerializer(serializers.ModelSerializer):
     course_title = serializers.CharField(source='course.title', read_only=True)
     user_name = serializers.SerializerMethodField()
+    verification_token = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Certificate
         fields = ['id', 'user', 'course', 'course_title', 'title', 
                  'issue_date', 'certificate_id', 'expiry_date', 
-                 'is_valid', 'user_name']
+                 'is_valid', 'user_name', 'verification_token', 'download_url']
         read_only_fields = ['id', 'user', 'course', 'course_title', 
                            'issue_date', 'certificate_id']
     
     def get_user_name(self, obj):
-        user = obj.user
-        return f"{user.first_name} {user.last_name}" if user.first_name and user.last_name else user.username
+        return holder_name(obj.user)
+    
+    def get_verification_token(self, obj):
+        # Shared in public links, checked by the verify_token endpoint without a database lookup
+        return make_token(obj)
+    
+    def get_download_url(self, obj):
+        url = reverse('certificate-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Certificate, RevokedCertificate
+from .rendering import remove_artifacts
+from .tokens import revoked_certificates
+
+# Signed tokens stay verifiable as long as the certificate id is not revoked
+
+def _revoke(certificate_id):
+    RevokedCertificate.objects.get_or_create(certificate_id=certificate_id)
+    transaction.on_commit(revoked_certificates.invalidate)
+
+@receiver(post_save, sender=Certificate)
+def certificate_saved(sender, instance, created, **kwargs):
+    if not instance.is_valid:
+        _revoke(instance.certificate_id)
+    elif not created and RevokedCertificate.objects.filter(certificate_id=instance.certificate_id).delete()[0]:
+        transaction.on_commit(revoked_certificates.invalidate)
+
+@receiver(post_delete, sender=Certificate)
+def certificate_deleted(sender, instance, **kwargs):
+    _revoke(instance.certificate_id)
+    transaction.on_commit(lambda: remove_artifacts(instance.certificate_id))
@@ -0,0 +1,120 @@
+import os
+import tempfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from codelearn.files import file_response
+
+from courses.models import Course
+from users.models import User, UserCourseProgress
+from .issuance import issue_certificates
+from .rendering import RenderPool, render_pool
+from .models import Certificate
+
+class CertificateIssuanceTests(TestCase):
+    """
+    Bulk issuance certifies every completed pair once, without INSERT IGNORE.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(
+            title="Cours", description="Description", language='python', level='beginner',
+            duration='2h', instructor="Instructeur", is_published=True
+        )
+        cls.users = [
+            User.objects.create_user(username=f'diplome-{number}', email=f'diplome-{number}@example.com',
+                                     password='secret')
+            for number in range(4)
+        ]
+        for user in cls.users:
+            UserCourseProgress.objects.create(user=user, course=cls.course, progress_percentage=100, completed=True)
+
+    def test_issues_every_completed_pair_once(self):
+        self.assertEqual(issue_certificates(chunk_size=3), 4)
+        self.assertEqual(issue_certificates(), 0)
+        self.assertEqual(Certificate.objects.filter(course=self.course).count(), 4)
+
+    def test_pairs_certified_meanwhile_are_left_out(self):
+        Certificate.objects.create(user=self.users[0], course=self.course, title="Cours", certificate_id='CL-EXISTANT')
+        with mock.patch('certificates.issuance.eligible_progress') as eligible:
+            # The chunk was read before the certificate above was generated
+            eligible.return_value = UserCourseProgress.objects.filter(course=self.course).order_by('pk')
+            self.assertEqual(issue_certificates(), 3)
+        self.assertEqual(Certificate.objects.get(user=self.users[0]).certificate_id, 'CL-EXISTANT')
+
+    def test_taken_ids_are_drawn_again(self):
+        other = Course.objects.create(
+            title="Autre", description="Description", language='python', level='beginner',
+            duration='2h', instructor="Instructeur"
+        )
+        Certificate.objects.create(user=self.users[0], course=other, title="Autre", certificate_id='CL-PRIS')
+        ids = iter(['CL-PRIS', 'CL-1', 'CL-2', 'CL-3', 'CL-4', 'CL-5'])
+        with mock.patch('certificates.issuance.new_certificate_id', lambda: next(ids)):
+            self.assertEqual(issue_certificates(), 4)
+        self.assertEqual(Certificate.objects.filter(certificate_id='CL-PRIS').count(), 1)
+
+class RenderPoolTests(SimpleTestCase):
+    """
+    A pool whose executor broke (a worker died) starts a new one.
+    """
+
+    def test_broken_executor_is_replaced(self):
+        pool = RenderPool(size=1)
+        broken = mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool
+        pool._executor = broken
+        with mock.patch('certificates.rendering.ProcessPoolExecutor') as executor:
+            pool.submit('inputs')
+        broken.shutdown.assert_called_once_with(wait=False)
+        self.assertIs(pool._executor, executor.return_value)
+        executor.return_value.submit.assert_called_once()
+
+class CertificateDownloadTests(APITestCase):
+    """
+    Downloads answer 503 when the render times out, and an open file outlives its removal.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        user = User.objects.create_user(username='diplome', email='diplome@example.com', password='secret')
+        course = Course.objects.create(
+            title="Cours", description="Description", language='python', level='beginner',
+            duration='2h', instructor="Instructeur", is_published=True
+        )
+        self.certificate = Certificate.objects.create(user=user, course=course, title="Cours", certificate_id='CL-TEST')
+        self.client.force_authenticate(user)
+
+    def test_render_timeout_is_503(self):
+        settings = {'DIR': self.directory, 'TIMEOUT': 0.01}
+        with override_settings(CERTIFICATE_RENDERING=settings), \
+                mock.patch.object(render_pool, 'submit', return_value=Future()):
+            response = self.client.get(f'/api/certificates/{self.certificate.pk}/download/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_streamed_file_survives_its_removal(self):
+        path = os.path.join(self.directory, 'certificat.pdf')
+        with open(path, 'wb') as file:
+            file.write(b'x' * 200000)
+        response = file_response(RequestFactory().get('/'), path, 'application/pdf', 'etag')
+        # A newer render of the certificate removes the file before the download starts
+        os.unlink(path)
+        self.assertEqual(len(b''.join(response.streaming_content)), 200000)
+        response.close()
+
+class CertificateRouteTests(SimpleTestCase):
+    """
+    The public token check and the detail verification have distinct route names.
+    """
+
+    def test_verify_routes(self):
+        self.assertEqual(reverse('certificate-verify', args=[1]), '/api/certificates/1/verify/')
+        self.assertEqual(reverse('certificate-verify-token'), '/api/certificates/verify/')
@@ -0,0 +1,93 @@
+"""
+Signed certificate tokens, verifiable without a database lookup.
+
+A token is the certificate's public details (certificate id, holder name,
+course title, issue date) signed with HMAC-SHA256 under SECRET_KEY
+(django.core.signing, compressed, URL-safe). The public verify endpoint
+only checks the signature and the revocation set, so employer traffic on
+shared links never reaches the database.
+
+The revocation set holds the ids of invalidated and deleted certificates
+(RevokedCertificate rows). Each process keeps it in memory and reloads it
+every CERTIFICATE_REVOCATION_REFRESH seconds; the process that revokes a
+certificate reloads it at once.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+
+SALT = 'certificates.token'
+
+def holder_name(user):
+    return f"{user.first_name} {user.last_name}" if user.first_name and user.last_name else user.username
+
+def make_token(certificate):
+    """
+    Signed token for a certificate (needs certificate.user).
+    """
+    return signing.Signer(salt=SALT).sign_object({
+        'c': certificate.certificate_id,
+        'u': holder_name(certificate.user),
+        't': certificate.title,
+        'd': certificate.issue_date.date().isoformat(),
+    }, compress=True)
+
+def read_token(token):
+    """
+    Certificate details from a token, or None if the signature does not match.
+    """
+    try:
+        payload = signing.Signer(salt=SALT).unsign_object(token)
+    except (signing.BadSignature, ValueError):
+        return None
+    return {
+        'certificateId': payload['c'],
+        'userName': payload['u'],
+        'courseName': payload['t'],
+        'issueDate': payload['d'],
+    }
+
+class RevocationSet:
+    """
+    In-memory set of revoked certificate ids, reloaded periodically.
+    """
+
+    def __init__(self, refresh):
+        self.refresh = refresh
+        self._ids = frozenset()
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def reload(self):
+        from .models import RevokedCertificate
+
+        ids = frozenset(RevokedCertificate.objects.values_list('certificate_id', flat=True))
+        with self._lock:
+            self._ids = ids
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        # Reload on next use, i.e. after the revoking transaction has committed
+        self._loaded_at = None
+
+    def __contains__(self, certificate_id):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.refresh:
+            self.reload()
+        return certificate_id in self._ids
+
+revoked_certificates = RevocationSet(settings.CERTIFICATE_REVOCATION_REFRESH)
+
+def check_token(token):
+    """
+    (status, details): 'valid', 'revoked' or 'invalid' (bad signature, details None).
+    """
+    details = read_token(token)
+    if details is None:
+        return 'invalid', None
+    if details['certificateId'] in revoked_certificates:
+        return 'revoked', details
+    return 'valid', details
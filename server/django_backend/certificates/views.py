@@ -2,11 +2,18 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.http import HttpResponseNotModified
 from django.shortcuts import get_object_or_404
 from .models import Certificate
 from .serializers import CertificateSerializer
 import uuid
 from users.models import UserCourseProgress, User
+from codelearn.pagination import CertificatePagination
+from codelearn.exports import export_response, parse_export_params
+from codelearn.files import file_response, not_modified
+from .issuance import issue_certificates
+from .rendering import FORMATS, Artifact, RenderUnavailable
+from .tokens import check_token
 
 class IsAdminUser(permissions.BasePermission):
     """
@@ -20,24 +27,29 @@ class CertificateViewSet(viewsets.ModelViewSet):
     API endpoint for certificates.
     """
     serializer_class = CertificateSerializer
+    pagination_class = CertificatePagination
     
     def get_permissions(self):
         """
         Permissions basées sur l'action:
         - Les actions administratives nécessitent des privilèges d'admin
         - Les utilisateurs peuvent voir leurs propres certificats
+        - La vérification par jeton signé est publique
         """
-        if self.action in ['list', 'update', 'partial_update', 'destroy', 'validate', 'invalidate']:
+        if self.action == 'verify_token':
+            permission_classes = [permissions.AllowAny]
+        elif self.action in ['list', 'update', 'partial_update', 'destroy', 'validate', 'invalidate', 'export', 'issue_bulk']:
             permission_classes = [IsAdminUser]
-        else:  # retrieve, generate, verify
+        else:  # retrieve, generate, verify, download
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
         user = self.request.user
+        queryset = Certificate.objects.select_related('course', 'user').order_by('-issue_date', '-id')
         if user.is_admin:
-            return Certificate.objects.all().order_by('-issue_date')
-        return Certificate.objects.filter(user=self.request.user).order_by('-issue_date')
+            return queryset
+        return queryset.filter(user=self.request.user)
     
     @action(detail=False, methods=['post'])
     def generate(self, request):
@@ -92,6 +104,31 @@ class CertificateViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(certificate)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
+    @action(detail=False, methods=['post'])
+    def issue_bulk(self, request):
+        """
+        Issue a certificate to every learner who completed a course and has none yet (admin only).
+        
+        Optional `course_id` limits issuance to one course; `after` resumes
+        after the last progress id returned by an interrupted call.
+        """
+        params = {}
+        for name in ('course_id', 'after'):
+            value = request.data.get(name)
+            if value in (None, ''):
+                continue
+            try:
+                params[name] = int(value)
+            except (TypeError, ValueError):
+                return Response({'error': f'{name} doit être un entier'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        report = {'issued': 0, 'scanned': 0, 'total': 0, 'last_id': params.get('after', 0)}
+        def progress(issued, scanned, total, last_id):
+            report.update(issued=issued, scanned=scanned, total=total, last_id=last_id)
+        
+        issue_certificates(course_id=params.get('course_id'), after=params.get('after', 0), progress=progress)
+        return Response(report)
+    
     @action(detail=True, methods=['get'])
     def verify(self, request, pk=None):
         """
@@ -116,6 +153,57 @@ class CertificateViewSet(viewsets.ModelViewSet):
                 'message': 'Le certificat n\'est pas valide'
             }, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['get'], url_path='verify', url_name='verify-token', authentication_classes=[])
+    def verify_token(self, request):
+        """
+        Verify a certificate from its signed token (public, no database lookup).
+        """
+        certificate_status, details = check_token(request.query_params.get('token', ''))
+        if certificate_status == 'valid':
+            return Response({
+                'status': 'valid',
+                'message': 'Le certificat est valide',
+                'data': details
+            })
+        if certificate_status == 'revoked':
+            return Response({
+                'status': 'invalid',
+                'message': 'Le certificat a été révoqué'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'status': 'invalid',
+            'message': 'Le certificat n\'est pas valide'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        Download the certificate as a PDF or PNG file (file_format=pdf|png).
+        
+        The file is rendered once and then served from the artifact cache,
+        with ETag/Last-Modified validation and byte ranges. 503 (with Retry-After)
+        when the render pool cannot draw it in time.
+        """
+        file_format = request.query_params.get('file_format', 'pdf')
+        if file_format not in FORMATS:
+            return Response({'error': f"file_format doit être l'un de : {', '.join(FORMATS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        artifact = Artifact(self.get_object(), file_format)
+        if 'If-None-Match' in request.headers and not_modified(request, artifact.key):
+            # The key covers every input of the file: the client's copy is current, rendered here or not
+            response = HttpResponseNotModified()
+            response['ETag'] = f'"{artifact.key}"'
+            return response
+        try:
+            file = artifact.open()
+        except RenderUnavailable:
+            response = Response({'error': 'Le rendu du certificat est momentanément indisponible, réessayez plus tard'},
+                                status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response['Retry-After'] = '30'
+            return response
+        return file_response(request, file, artifact.content_type, artifact.key,
+                             filename=artifact.filename, as_attachment=request.query_params.get('inline') != '1')
+    
     @action(detail=True, methods=['post'])
     def validate(self, request, pk=None):
         """
@@ -143,3 +231,32 @@ class CertificateViewSet(viewsets.ModelViewSet):
             'status': 'success',
             'message': 'Le certificat a été invalidé'
         })
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream all certificates as CSV or NDJSON (admin only).
+        
+        Filters: user_id, course_id, is_valid, since/until (issue date).
+        """
+        try:
+            export_format, conditions = parse_export_params(
+                request.query_params, 'issue_date',
+                {'user_id': 'user_id', 'course_id': 'course_id', 'is_valid': 'is_valid'},
+                boolean_filters=['is_valid'],
+            )
+            queryset = Certificate.objects.filter(**conditions)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return export_response(queryset, [
+            ('id', 'id'),
+            ('certificate_id', 'certificate_id'),
+            ('user_id', 'user_id'),
+            ('user_email', 'user__email'),
+            ('course_id', 'course_id'),
+            ('title', 'title'),
+            ('issue_date', 'issue_date'),
+            ('expiry_date', 'expiry_date'),
+            ('is_valid', 'is_valid'),
+        ], export_format, 'certificates')
@@ -0,0 +1,123 @@
+import os
+import re
+
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header, http_date, parse_etags, parse_http_date_safe
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Whether the client's cached copy is current (If-None-Match, else If-Modified-Since).
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or f'"{etag}"' in etags or f'W/"{etag}"' in etags
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return last_modified is not None and if_modified_since is not None and int(last_modified) <= if_modified_since
+
+def _byte_range(request, size, etag, last_modified):
+    # (start, end) inclusive, None to send the whole file, or 'unsatisfiable'.
+    # Only single ranges are honored; a client sending several gets the whole file.
+    match = RANGE_RE.match(request.headers.get('Range', '').replace(' ', ''))
+    if match is None:
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range is not None:
+        if_range_date = parse_http_date_safe(if_range)
+        if if_range != f'"{etag}"' and (if_range_date is None or int(last_modified) > if_range_date):
+            return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if not length:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'unsatisfiable'
+    return start, end
+
+class FileRange:
+    """
+    Iterator over `length` bytes of an open file from `start`; the response closes the file.
+
+    Reading from a file opened up front, rather than opening `path` when the
+    response starts streaming, keeps the download intact if the file is
+    removed or replaced meanwhile (POSIX keeps an unlinked open file readable).
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.start = start
+        self.length = length
+
+    def __iter__(self):
+        self.file.seek(self.start)
+        length = self.length
+        while length > 0:
+            chunk = self.file.read(min(FILE_CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+    def close(self):
+        self.file.close()
+
+def file_response(request, file, content_type, etag, filename=None, as_attachment=False):
+    """
+    Serve a file with ETag/Last-Modified validation and single byte-range requests.
+
+    `file` is a path or a file opened in binary mode, which the response closes.
+    `etag` must change whenever the file content does (e.g. a content hash).
+    """
+    if isinstance(file, (str, os.PathLike)):
+        file = open(file, 'rb')
+    try:
+        return _file_response(request, file, content_type, etag, filename, as_attachment)
+    except BaseException:
+        file.close()
+        raise
+
+def _file_response(request, file, content_type, etag, filename, as_attachment):
+    stat = os.fstat(file.fileno())
+    size, last_modified = stat.st_size, stat.st_mtime
+    headers = {
+        'ETag': f'"{etag}"',
+        'Last-Modified': http_date(last_modified),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private, max-age=0, must-revalidate',
+    }
+    if not_modified(request, etag, last_modified):
+        file.close()
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    byte_range = _byte_range(request, size, etag, last_modified) if request.method == 'GET' else None
+    if byte_range == 'unsatisfiable':
+        file.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    start, end = byte_range or (0, size - 1)
+
+    response = StreamingHttpResponse(FileRange(file, start, end - start + 1), content_type=content_type,
+                                     status=206 if byte_range else 200)
+    for name, value in headers.items():
+        response[name] = value
+    response['Content-Length'] = str(end - start + 1)
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    if filename:
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    return response
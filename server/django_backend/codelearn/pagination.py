@@ -0,0 +1,27 @@
+from rest_framework.pagination import CursorPagination
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination for large, append-mostly tables.
+
+    Pages are fetched with `WHERE <ordering column> < <cursor>` on an index
+    instead of COUNT(*) + OFFSET, so any page costs the same. Subclasses set
+    `ordering` to columns covered by a composite index, ending with the
+    primary key so the order is total.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+class PaymentPagination(KeysetPagination):
+    ordering = ('-payment_date', '-id')
+
+class SubscriptionPagination(KeysetPagination):
+    ordering = ('-start_date', '-id')
+
+class CertificatePagination(KeysetPagination):
+    ordering = ('-issue_date', '-id')
+
+class ProgressPagination(KeysetPagination):
+    # last_accessed changes on every update and would make rows jump between pages
+    ordering = ('-id',)
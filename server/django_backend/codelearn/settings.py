@@ -106,13 +106,52 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Course full-text search index (SQLite file, rebuilt with `manage.py rebuild_search_index`)
+SEARCH_INDEX_PATH = os.path.join(BASE_DIR, 'search_index.sqlite3')
+
+# In-memory title autocomplete, fully refreshed at most this often (seconds)
+SUGGEST_INDEX_MAX_AGE = 300
+
+# Learning-time heartbeats: pending seconds are journaled in this SQLite file and
+# added to User.total_learning_time at most every HEARTBEAT_FLUSH_INTERVAL seconds.
+# One ping credits at most HEARTBEAT_MAX_SECONDS, and never more than the time
+# since the user's previous ping.
+HEARTBEAT_JOURNAL_PATH = os.path.join(BASE_DIR, 'heartbeats.sqlite3')
+HEARTBEAT_FLUSH_INTERVAL = 60
+HEARTBEAT_MAX_SECONDS = 120
+
+# Certificate ids revoked since the last reload are still accepted by the public
+# token verification for at most CERTIFICATE_REVOCATION_REFRESH seconds.
+CERTIFICATE_REVOCATION_REFRESH = 60
+
+# Certificate files (PDF/PNG): rendered by POOL_SIZE worker processes from TEMPLATE
+# (a background image, or a plain page when None) and cached in DIR
+CERTIFICATE_RENDERING = {
+    'DIR': os.path.join(BASE_DIR, 'certificate_artifacts'),
+    'TEMPLATE': None,
+    'FONT': 'DejaVuSans.ttf',
+    'BOLD_FONT': 'DejaVuSans-Bold.ttf',
+    'POOL_SIZE': 2,
+    'TIMEOUT': 30,
+}
+
+# Code exercise grading: sandbox processes per web worker and their limits
+GRADING = {
+    'POOL_SIZE': 4,
+    'CPU_SECONDS': 2,
+    'WALL_SECONDS': 5,
+    'MEMORY_MB': 256,
+    'OUTPUT_CHARS': 10000,
+    'CACHE_TIMEOUT': 24 * 3600,
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -122,6 +161,31 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10
 }
 
+# Shared cache (token authentication, catalog facets, grading results). The default
+# local-memory backend is private to each process: with several workers, set
+# CACHE_URL (e.g. redis://localhost:6379/0) so they share entries and invalidations.
+if os.environ.get('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Token authentication cache: per-process LRU in front of the shared Django cache.
+# LOCAL_TTL bounds how long another process may keep using a revoked token.
+TOKEN_AUTH_CACHE = {
+    'LOCAL_MAXSIZE': 10000,
+    'LOCAL_TTL': 30,
+    'SHARED_TTL': 300,
+}
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:8080",
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+class CoursesConfig(AppConfig):
+    name = 'courses'
+    verbose_name = "Cours"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,74 @@
+"""
+Section completion bitsets.
+
+Each section gets a slot number, unique within its course and never
+reused, and a user's completed sections are stored as one bitset per
+(user, course) where bit N is the section in slot N. Slots are assigned
+once, so reordering sections or modules leaves stored bitsets valid. The
+course keeps a mask of the slots of its live sections: progress is
+popcount(completed & mask) / popcount(mask), which ignores the bits of
+deleted sections.
+
+Bitsets are little-endian byte strings (bit N is bit N % 8 of byte N // 8).
+"""
+
+from django.db import transaction
+
+def to_int(bits):
+    return int.from_bytes(bytes(bits or b''), 'little')
+
+def to_bytes(value):
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+def popcount(value):
+    return bin(value).count('1')
+
+def slots(value):
+    """
+    Slot numbers of the bits set in `value`.
+    """
+    slot = 0
+    while value:
+        if value & 1:
+            yield slot
+        value >>= 1
+        slot += 1
+
+def progress_from_bits(bits, mask):
+    """
+    (progress_percentage, completed) for a user bitset and a course mask.
+    """
+    mask = to_int(mask)
+    total = popcount(mask)
+    if not total:
+        return 0, False
+    done = popcount(to_int(bits) & mask)
+    return done * 100 // total, done == total
+
+def allocate_slot(course_id):
+    """
+    Reserve the next slot of a course and add it to the course mask.
+    """
+    from .models import Course
+
+    with transaction.atomic():
+        course = Course.objects.select_for_update().only('section_slots', 'section_mask').get(pk=course_id)
+        slot = course.section_slots
+        Course.objects.filter(pk=course_id).update(
+            section_slots=slot + 1,
+            section_mask=to_bytes(to_int(course.section_mask) | 1 << slot),
+        )
+    return slot
+
+def release_slot(course_id, slot):
+    """
+    Drop a deleted section's slot from the course mask (the slot is not reused).
+    """
+    from .models import Course
+
+    with transaction.atomic():
+        course = Course.objects.select_for_update().only('section_mask').filter(pk=course_id).first()
+        if course is not None:
+            Course.objects.filter(pk=course_id).update(
+                section_mask=to_bytes(to_int(course.section_mask) & ~(1 << slot))
+            )
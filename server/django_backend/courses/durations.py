@@ -0,0 +1,38 @@
+import re
+
+# A number followed by an optional unit word: "10 heures", "1h30", "45min", "1,5 h"
+_DURATION_TOKEN = re.compile(r'(\d+(?:[.,]\d+)?)\s*([a-zé]*)', re.IGNORECASE)
+
+_HOUR_UNITS = {'h', 'hr', 'hrs', 'heure', 'heures', 'hour', 'hours'}
+_MINUTE_UNITS = {'', 'm', 'mn', 'min', 'mins', 'minute', 'minutes'}
+
+
+def parse_duration_minutes(value):
+    """
+    Convert a free-text duration ("10 heures", "1h30", "45min") to minutes.
+
+    A bare number is read as minutes, which also covers the "30" of "1h30".
+    Tokens with an unknown unit are ignored; unparseable values give 0.
+    """
+    if not value:
+        return 0
+    total = 0.0
+    for number, unit in _DURATION_TOKEN.findall(str(value)):
+        amount = float(number.replace(',', '.'))
+        unit = unit.lower()
+        if unit in _HOUR_UNITS:
+            total += amount * 60
+        elif unit in _MINUTE_UNITS:
+            total += amount
+    return int(round(total))
+
+
+def format_duration(minutes):
+    """
+    Format a number of minutes the way durations are displayed in the catalog.
+    """
+    hours, minutes = divmod(minutes or 0, 60)
+    if not hours:
+        return f"{minutes} min"
+    label = f"{hours} heure" if hours == 1 else f"{hours} heures"
+    return f"{label} {minutes:02d} min" if minutes else label
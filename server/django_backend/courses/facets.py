@@ -0,0 +1,65 @@
+import hashlib
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Course
+from .search import search_courses, search_index, tokenize
+
+FACETS_CACHE_TIMEOUT = 300
+FACETS_VERSION_KEY = 'courses:facets:version'
+
+def _cache_key(search, language, level):
+    # Bumping the version (on any course, module or section change) orphans every cached signature
+    version = cache.get_or_set(FACETS_VERSION_KEY, 1, timeout=None)
+    signature = hashlib.sha1(f"{search}\x00{language}\x00{level}".encode()).hexdigest()
+    return f"courses:facets:{version}:{signature}"
+
+def invalidate_facets():
+    try:
+        cache.incr(FACETS_VERSION_KEY)
+    except ValueError:
+        cache.set(FACETS_VERSION_KEY, 1, timeout=None)
+
+def course_facets(search='', language='', level=''):
+    """
+    Published course counts per language and per level, from one GROUP BY.
+
+    Each facet is counted with the other facet's filter applied but not its
+    own, so the sidebar shows how many results every option would give.
+    """
+    search, language, level = search.strip(), language.strip().lower(), level.strip().lower()
+    key = _cache_key(search, language, level)
+    facets = cache.get(key)
+    if facets is not None:
+        return facets
+
+    if tokenize(search):
+        # Indexed search: the index holds the language and level of every match
+        counts = search_index.facet_counts(search).items()
+    else:
+        queryset = Course.objects.filter(is_published=True)
+        if search:
+            queryset, _ = search_courses(queryset, search)
+        rows = queryset.order_by().values('language', 'level').annotate(count=Count('id'))
+        counts = (((row['language'], row['level']), row['count']) for row in rows)
+
+    languages, levels, total = Counter(), Counter(), 0
+    for (row_language, row_level), count in counts:
+        language_match = not language or row_language.lower() == language
+        level_match = not level or row_level.lower() == level
+        if level_match:
+            languages[row_language] += count
+        if language_match:
+            levels[row_level] += count
+        if language_match and level_match:
+            total += count
+
+    facets = {
+        'language': dict(languages.most_common()),
+        'level': dict(levels.most_common()),
+        'total': total,
+    }
+    cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,324 @@
+"""
+Grading of code exercises.
+
+A submission (learner Python code) is run against the ExerciseTest rows of
+its section in a pair of sandbox processes from GradingPool: one runs the
+learner code, the other runs the tests and only exchanges plain data with
+it over a socket (see grading_worker.py), so the learner code cannot reach
+the interpreter that decides and reports the outcome. Pairs are started
+ahead of time and each grades a single job, so a submission only waits for
+the job itself, not for interpreter start. Each process runs with CPU-time,
+memory, file-size and process-count limits; the pool kills both when the
+wall-clock limit is exceeded.
+
+Results are cached by (section, tests version, code hash): resubmitting
+the same code, or the same answer from another learner, is answered
+without running anything. Editing a section's tests changes its version.
+
+Results come back from the tests process on a dedicated pipe the
+submission process never holds. The parent checks them against the tests
+it sent and computes the status itself; anything malformed is reported as
+'crashed' and never cached.
+
+Run the grading hosts as an unprivileged user (root ignores the
+process-count limit and can reach any process) in a container without
+network access.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import selectors
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grading_worker.py')
+
+# Longest accepted submission
+MAX_CODE_CHARS = 20000
+
+# Largest result accepted from a worker, on top of the captured output
+RESULT_OVERHEAD_BYTES = 1024 * 1024
+
+CRASHED = {'status': 'crashed', 'error': "Le programme s'est arrêté de façon inattendue", 'tests': [], 'output': ''}
+
+def _setting(name, default):
+    return getattr(settings, 'GRADING', {}).get(name, default)
+
+class Sandbox:
+    """
+    The two processes grading one job, and the read end of the result pipe.
+    """
+
+    def __init__(self, tests, submission, result_fd):
+        self.tests = tests
+        self.submission = submission
+        self.result_fd = result_fd
+
+    def alive(self):
+        return self.tests.poll() is None and self.submission.poll() is None
+
+    def kill(self):
+        for process in (self.tests, self.submission):
+            # A reaped process keeps its return code and its pid may be reused
+            if process.poll() is None:
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except (ProcessLookupError, PermissionError):
+                    pass
+                process.wait()
+
+    def close(self):
+        self.kill()
+        os.close(self.result_fd)
+
+class GradingPool:
+    """
+    Pre-started one-shot sandboxes; at most `size` jobs run at a time.
+
+    Waiting submissions are served in arrival order: a finished job hands its
+    slot directly to the oldest waiter, so busy clients cannot starve others.
+    """
+
+    def __init__(self, size=4, limits=None):
+        self.size = size
+        self.limits = {
+            'cpu_seconds': 2,
+            'wall_seconds': 5,
+            'memory_mb': 256,
+            'output_chars': 10000,
+            **(limits or {}),
+        }
+        self._ready = queue.Queue()
+        self._running = 0
+        self._waiters = deque()
+        self._workdir = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _slot(self):
+        with self._lock:
+            if self._running < self.size and not self._waiters:
+                self._running += 1
+                turn = None
+            else:
+                turn = threading.Event()
+                self._waiters.append(turn)
+        if turn is not None:
+            turn.wait()
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._waiters:
+                    self._waiters.popleft().set()
+                else:
+                    self._running -= 1
+
+    def _start(self, role, *fds):
+        return subprocess.Popen(
+            [sys.executable, '-I', '-S', WORKER_PATH, role, *map(str, fds)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            pass_fds=fds,
+            cwd=self._workdir,
+            env={'PYTHONIOENCODING': 'utf-8', 'PYTHONDONTWRITEBYTECODE': '1'},
+            start_new_session=True,
+        )
+
+    def _spawn(self):
+        with self._lock:
+            if self._workdir is None:
+                self._workdir = tempfile.mkdtemp(prefix='codelearn-grading-')
+        # The submission only gets its end of the channel; the result pipe goes to the tests process
+        tests_end, submission_end = socket.socketpair()
+        read_fd, write_fd = os.pipe()
+        started = []
+        try:
+            started.append(self._start('submission', submission_end.fileno()))
+            started.append(self._start('tests', tests_end.fileno(), write_fd))
+        except BaseException:
+            for process in started:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+            os.close(read_fd)
+            raise
+        finally:
+            tests_end.close()
+            submission_end.close()
+            os.close(write_fd)
+        submission, tests = started
+        return Sandbox(tests, submission, read_fd)
+
+    def warm(self):
+        """
+        Start sandboxes until `size` are waiting for a job.
+        """
+        while self._ready.qsize() < self.size:
+            self._ready.put(self._spawn())
+
+    def _take(self):
+        while True:
+            try:
+                sandbox = self._ready.get_nowait()
+            except queue.Empty:
+                return self._spawn()
+            if sandbox.alive():
+                return sandbox
+            sandbox.close()
+
+    @staticmethod
+    def _read_result(sandbox, timeout, limit):
+        # Everything written on the result pipe until the tests process closes it;
+        # None if it sends more than `limit` bytes
+        deadline = time.monotonic() + timeout
+        chunks, size = [], 0
+        with selectors.DefaultSelector() as selector:
+            selector.register(sandbox.result_fd, selectors.EVENT_READ)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    raise subprocess.TimeoutExpired(sandbox.tests.args, timeout)
+                chunk = os.read(sandbox.result_fd, 65536)
+                if not chunk:
+                    return b''.join(chunks)
+                size += len(chunk)
+                if size > limit:
+                    return None
+                chunks.append(chunk)
+
+    @staticmethod
+    def _send(process, job):
+        process.stdin.write(json.dumps(job).encode() + b'\n')
+        process.stdin.close()
+
+    def run(self, code, tests):
+        """
+        Grade `code` against `tests` ([{'name', 'code'}]) and return the result dict.
+        """
+        wall_seconds = self.limits['wall_seconds']
+        with self._slot():
+            sandbox = self._take()
+            # Replace it right away: the new pair boots while this job runs
+            self._ready.put(self._spawn())
+            deadline = time.monotonic() + wall_seconds
+            try:
+                try:
+                    self._send(sandbox.submission, {'code': code, 'limits': self.limits})
+                    self._send(sandbox.tests, {'tests': tests, 'limits': self.limits})
+                except BrokenPipeError:
+                    return dict(CRASHED)
+                output = self._read_result(
+                    sandbox, wall_seconds, self.limits['output_chars'] * 4 + RESULT_OVERHEAD_BYTES
+                )
+                sandbox.tests.wait(timeout=max(deadline - time.monotonic(), 0.1))
+                # The tests process closed the channel: a submission still running was out of time
+                sandbox.submission.wait(timeout=max(deadline - time.monotonic(), 0.1))
+            except subprocess.TimeoutExpired:
+                sandbox.kill()
+                return {'status': 'timeout', 'error': "Temps d'exécution dépassé", 'tests': [], 'output': ''}
+            finally:
+                sandbox.close()
+
+        if any(process.returncode in (-signal.SIGXCPU, -signal.SIGKILL)
+               for process in (sandbox.tests, sandbox.submission)):
+            return {'status': 'timeout', 'error': "Temps de calcul dépassé", 'tests': [], 'output': ''}
+        try:
+            result = json.loads(output) if output is not None else None
+        except ValueError:
+            result = None
+        return check_result(result, tests)
+
+    def close(self):
+        while True:
+            try:
+                sandbox = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            sandbox.close()
+        if self._workdir is not None:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+
+grading_pool = GradingPool(
+    size=_setting('POOL_SIZE', 4),
+    limits={
+        'cpu_seconds': _setting('CPU_SECONDS', 2),
+        'wall_seconds': _setting('WALL_SECONDS', 5),
+        'memory_mb': _setting('MEMORY_MB', 256),
+        'output_chars': _setting('OUTPUT_CHARS', 10000),
+    },
+)
+
+def check_result(result, tests):
+    """
+    Validate a worker result against the tests sent and derive its status.
+
+    Returns a result with status 'passed', 'failed' or 'error', or a 'crashed'
+    result if the worker output does not have the expected structure.
+    """
+    if not isinstance(result, dict):
+        return dict(CRASHED)
+    output, error, results = result.get('output'), result.get('error'), result.get('tests')
+    if not isinstance(output, str) or not isinstance(results, list):
+        return dict(CRASHED)
+    if error is not None:
+        if not isinstance(error, str) or results:
+            return dict(CRASHED)
+        return {'status': 'error', 'error': error, 'tests': [], 'output': output}
+    if len(results) != len(tests):
+        return dict(CRASHED)
+    checked = []
+    for test, item in zip(tests, results):
+        if (not isinstance(item, dict) or item.get('name') != test['name']
+                or not isinstance(item.get('passed'), bool) or not isinstance(item.get('message'), str)):
+            return dict(CRASHED)
+        checked.append({'name': test['name'], 'passed': item['passed'], 'message': item['message']})
+    status = 'passed' if all(item['passed'] for item in checked) else 'failed'
+    return {'status': status, 'tests': checked, 'output': output}
+
+def normalize_code(code):
+    # Trailing whitespace and line endings do not change the result
+    return '\n'.join(line.rstrip() for line in code.replace('\r\n', '\n').strip().split('\n'))
+
+def tests_version(tests):
+    return hashlib.sha1(json.dumps(tests, sort_keys=True).encode()).hexdigest()[:16]
+
+def grade_submission(section, code, pool=None):
+    """
+    Grade `code` for an exercise section, from the result cache when possible.
+
+    Returns the worker result (status 'passed', 'failed', 'error', 'timeout'
+    or 'crashed') plus 'passed' and 'total' counts and 'cached'. Timeouts and
+    crashes (including malformed worker output) are not cached.
+    """
+    rows = list(section.exercise_tests.order_by('order_num').values_list('name', 'code', 'is_hidden'))
+    tests = [{'name': name, 'code': test_code} for name, test_code, is_hidden in rows]
+    code = normalize_code(code)
+    key = 'grading:{}:{}:{}'.format(
+        section.pk, tests_version(tests), hashlib.sha256(code.encode()).hexdigest()
+    )
+    result = cache.get(key)
+    if result is not None:
+        return {**result, 'cached': True}
+
+    result = (pool or grading_pool).run(code, tests)
+    for test, (name, test_code, is_hidden) in zip(result['tests'], rows):
+        test['hidden'] = is_hidden
+    result['passed'] = sum(1 for test in result['tests'] if test['passed'])
+    result['total'] = len(tests)
+    if result['status'] in ('passed', 'failed', 'error'):
+        cache.set(key, result, _setting('CACHE_TIMEOUT', 24 * 3600))
+    return {**result, 'cached': False}
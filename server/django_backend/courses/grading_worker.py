@@ -0,0 +1,455 @@
+"""
+Grading sandbox processes, started in pairs by courses.grading.GradingPool.
+
+Runs standalone (python -I -S grading_worker.py ROLE ..., no Django). Each
+job uses two processes connected by a socket pair, and they never share an
+interpreter:
+
+    grading_worker.py submission CHANNEL_FD
+        runs the learner code, then answers requests on CHANNEL_FD
+    grading_worker.py tests CHANNEL_FD RESULT_FD
+        runs the exercise tests and writes the result on RESULT_FD
+
+The tests process sees the submission only through the channel: names,
+calls, attributes and items are requested there, and every answer comes
+back as plain data (None, bool, int, float, str, bytes, list, tuple, set,
+dict) or as an opaque handle on an object that stays in the submission.
+Comparisons and assertions therefore run on copies, in a process the
+learner code cannot reach, and the submission never sees the tests. Handles
+compare by identity; a test checks a learner object through its attributes
+or methods.
+
+Both processes are started ahead of time, block on stdin, grade exactly one
+job and exit, so no state leaks from one submission to the next. Before
+running any job code they lower their own resource limits (CPU time,
+address space, file size, process count); the parent enforces the
+wall-clock limit.
+
+Job (one JSON line on stdin):
+    submission: {"code": str, "limits": {...}}
+    tests:      {"tests": [{"name": str, "code": str}], "limits": {...}}
+Result (JSON on the pipe RESULT_FD, written by the tests process only):
+    {"tests": [{"name": str, "passed": bool, "message": str}], "output": str}
+    or {"error": str, "tests": [], "output": str} if the submission itself fails
+
+Channel messages are JSON lines. The tests process sends requests
+{"op": ..., ...}; the submission first sends {"ready": true} or
+{"error": str}, then one reply per request: {"value": ...}, {"missing": true}
+for an unknown name or {"raised": {"type": str, "message": str}}. Every
+message from the submission also carries the "output" it printed meanwhile.
+"""
+
+import builtins
+import contextlib
+import ctypes
+import io
+import json
+import os
+import resource
+import socket
+import sys
+import traceback
+
+# Containers are copied this deep; anything deeper stays in the submission as a handle
+MAX_DEPTH = 20
+
+PR_SET_DUMPABLE = 4
+
+def _limit(kind, value):
+    try:
+        resource.setrlimit(kind, (value, value))
+    except (ValueError, OSError):
+        pass
+
+def apply_limits(limits):
+    cpu = int(limits.get('cpu_seconds', 2))
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    _limit(resource.RLIMIT_AS, int(limits.get('memory_mb', 256)) * 1024 * 1024)
+    _limit(resource.RLIMIT_FSIZE, 0)
+    _limit(resource.RLIMIT_NPROC, 0)
+    _limit(resource.RLIMIT_CORE, 0)
+
+def _undumpable():
+    # Same user as the submission process: refuse ptrace and /proc/<pid>/mem access
+    try:
+        ctypes.CDLL(None).prctl(PR_SET_DUMPABLE, 0, 0, 0, 0)
+    except (OSError, AttributeError):
+        pass
+
+def _error_message(exc):
+    return ''.join(traceback.format_exception_only(type(exc), exc)).strip()
+
+def _max_message_bytes(limits):
+    return int(limits.get('output_chars', 10000)) * 4 + 1024 * 1024
+
+def _detach_stdio():
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+
+def _open_channel(fd):
+    return socket.socket(fileno=fd).makefile('rwb')
+
+# Bound before any job code runs: patching the json module does not change the channel format
+_dumps = json.dumps
+
+def _send(channel, message):
+    channel.write(_dumps(message).encode() + b'\n')
+    channel.flush()
+
+# Submission side
+
+def encode(value, handles, depth=0):
+    """
+    Plain data as tagged JSON; any other object becomes a handle in `handles`.
+
+    Exact types only: a subclass of int or list may redefine comparisons, so
+    it stays in the submission like any other object.
+    """
+    kind = type(value)
+    if value is None or kind in (bool, int, float, str):
+        return value
+    if depth < MAX_DEPTH:
+        if kind in (list, tuple, set, frozenset):
+            return {kind.__name__: [encode(item, handles, depth + 1) for item in value]}
+        if kind is dict:
+            return {'dict': [[encode(key, handles, depth + 1), encode(item, handles, depth + 1)]
+                             for key, item in value.items()]}
+        if kind is bytes:
+            return {'bytes': value.hex()}
+    handles.append(value)
+    return {'handle': len(handles) - 1}
+
+def decode_arguments(value, handles):
+    # Arguments sent by the tests: plain data, or handles this process gave out
+    if not isinstance(value, dict):
+        return value
+    (kind, items), = value.items()
+    if kind == 'handle':
+        return handles[items]
+    if kind == 'bytes':
+        return bytes.fromhex(items)
+    if kind == 'dict':
+        return {decode_arguments(key, handles): decode_arguments(item, handles) for key, item in items}
+    items = [decode_arguments(item, handles) for item in items]
+    return {'list': list, 'tuple': tuple, 'set': set, 'frozenset': frozenset}[kind](items)
+
+def _names(namespace):
+    return {name: value for name, value in namespace.items() if type(name) is str and not name.startswith('__')}
+
+def perform(request, namespace, handles):
+    # Raises KeyError for a name the submission does not define
+    op = request['op']
+    if op == 'names':
+        return _names(namespace)
+    if op == 'name':
+        if request['name'].startswith('__'):
+            raise KeyError(request['name'])
+        return namespace[request['name']]
+    target = handles[request['target']]
+    if op == 'call':
+        args = [decode_arguments(arg, handles) for arg in request['args']]
+        kwargs = {name: decode_arguments(arg, handles) for name, arg in request['kwargs'].items()}
+        return target(*args, **kwargs)
+    if op == 'getattr':
+        return getattr(target, request['name'])
+    if op == 'getitem':
+        return target[decode_arguments(request['key'], handles)]
+    if op == 'len':
+        return len(target)
+    if op == 'iter':
+        return list(target)
+    if op == 'str':
+        return str(target)
+    if op == 'repr':
+        return repr(target)
+    raise ValueError(f"Opération inconnue : {op}")
+
+def serve_submission(job, channel):
+    namespace = {'__name__': '__main__'}
+    handles = []
+    output = io.StringIO()
+
+    def reply(message):
+        message['output'] = output.getvalue()
+        output.seek(0)
+        output.truncate()
+        _send(channel, message)
+
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            exec(compile(job['code'], '<submission>', 'exec'), namespace)
+        except BaseException as exc:
+            reply({'error': _error_message(exc)})
+            return
+    reply({'ready': True})
+
+    for line in channel:
+        request = json.loads(line)
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                message = {'value': encode(perform(request, namespace, handles), handles)}
+            except KeyError as exc:
+                if request['op'] != 'name':
+                    message = {'raised': {'type': 'KeyError', 'message': str(exc)}}
+                else:
+                    message = {'missing': True}
+            except BaseException as exc:
+                message = {'raised': {'type': type(exc).__name__, 'message': str(exc)}}
+        reply(message)
+
+# Tests side
+
+class SubmissionLost(BaseException):
+    """
+    The submission stopped answering or sent something malformed.
+
+    Not an Exception, so that `except Exception` in a test cannot swallow it.
+    """
+
+class SubmissionError(Exception):
+    """
+    The submission raised an exception of its own class.
+    """
+
+class Submission:
+    """
+    The tests' end of the channel.
+    """
+
+    def __init__(self, channel, limits):
+        self.channel = channel
+        self.max_bytes = _max_message_bytes(limits)
+        self.output_chars = int(limits.get('output_chars', 10000))
+        self.output = []
+        self.output_size = 0
+        self.lost = None
+
+    def receive(self):
+        if self.lost is not None:
+            raise SubmissionLost(self.lost)
+        line = self.channel.readline(self.max_bytes)
+        try:
+            if not line.endswith(b'\n'):
+                raise ValueError
+            message = json.loads(line)
+            if not isinstance(message, dict) or not isinstance(message.get('output', ''), str):
+                raise ValueError
+        except ValueError:
+            self.lost = "La soumission s'est arrêtée de façon inattendue" if not line else "Réponse invalide de la soumission"
+            raise SubmissionLost(self.lost)
+        self.write(message.get('output', ''))
+        return message
+
+    def write(self, text):
+        if self.output_size < self.output_chars:
+            self.output.append(text[:self.output_chars - self.output_size])
+            self.output_size += len(self.output[-1])
+
+    def request(self, op, **fields):
+        try:
+            _send(self.channel, {'op': op, **fields})
+        except (OSError, ValueError):
+            self.lost = "La soumission s'est arrêtée de façon inattendue"
+            raise SubmissionLost(self.lost)
+        message = self.receive()
+        if 'value' in message:
+            return self.decode(message['value'])
+        if message.get('missing') is True and op == 'name':
+            raise KeyError(fields['name'])
+        raised = message.get('raised')
+        if not isinstance(raised, dict):
+            self.lost = "Réponse invalide de la soumission"
+            raise SubmissionLost(self.lost)
+        kind, text = str(raised.get('type')), str(raised.get('message'))
+        exception = getattr(builtins, kind, None)
+        # Only ordinary built-in exceptions are raised as such (never SystemExit and the like)
+        if isinstance(exception, type) and issubclass(exception, Exception):
+            raise exception(text)
+        raise SubmissionError(f"{kind}: {text}")
+
+    def decode(self, value):
+        try:
+            return self._decode(value, 0)
+        except (ValueError, TypeError, KeyError, RecursionError):
+            self.lost = "Réponse invalide de la soumission"
+            raise SubmissionLost(self.lost)
+
+    def _decode(self, value, depth):
+        if value is None or type(value) in (bool, int, float, str):
+            return value
+        if not isinstance(value, dict) or len(value) != 1 or depth > MAX_DEPTH:
+            raise ValueError
+        (kind, items), = value.items()
+        if kind == 'handle':
+            if type(items) is not int:
+                raise ValueError
+            return Remote(self, items)
+        if kind == 'bytes':
+            return bytes.fromhex(items)
+        if kind == 'dict':
+            return {self._decode(key, depth + 1): self._decode(item, depth + 1) for key, item in items}
+        items = [self._decode(item, depth + 1) for item in items]
+        return {'list': list, 'tuple': tuple, 'set': set, 'frozenset': frozenset}[kind](items)
+
+    def encode(self, value, depth=0):
+        # Arguments of a call: plain data, or handles received from the submission
+        kind = type(value)
+        if value is None or kind in (bool, int, float, str):
+            return value
+        if kind is Remote and value._submission is self:
+            return {'handle': value._handle}
+        if depth < MAX_DEPTH:
+            if kind in (list, tuple, set, frozenset):
+                return {kind.__name__: [self.encode(item, depth + 1) for item in value]}
+            if kind is dict:
+                return {'dict': [[self.encode(key, depth + 1), self.encode(item, depth + 1)]
+                                 for key, item in value.items()]}
+            if kind is bytes:
+                return {'bytes': value.hex()}
+        raise TypeError(f"Valeur non transmissible à la soumission : {kind.__name__}")
+
+class Remote:
+    """
+    An object of the submission (function, class, instance), used by the tests.
+    """
+    __slots__ = ('_submission', '_handle')
+
+    def __init__(self, submission, handle):
+        self._submission = submission
+        self._handle = handle
+
+    def _request(self, op, **fields):
+        return self._submission.request(op, target=self._handle, **fields)
+
+    def __call__(self, *args, **kwargs):
+        submission = self._submission
+        return self._request('call', args=[submission.encode(arg) for arg in args],
+                             kwargs={name: submission.encode(arg) for name, arg in kwargs.items()})
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return self._request('getattr', name=name)
+
+    def __getitem__(self, key):
+        return self._request('getitem', key=self._submission.encode(key))
+
+    def __len__(self):
+        length = self._request('len')
+        if type(length) is not int:
+            raise TypeError("len() doit renvoyer un entier")
+        return length
+
+    def __iter__(self):
+        return iter(self._request('iter'))
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        # Identity only: the submission must not decide the outcome of a comparison
+        return type(other) is Remote and other._handle == self._handle
+
+    def __hash__(self):
+        return hash(self._handle)
+
+    def __str__(self):
+        return str(self._request('str'))
+
+    def __repr__(self):
+        return str(self._request('repr'))
+
+class SubmissionNamespace(dict):
+    """
+    Local names of the test code: what the test does not define itself is
+    read from the submission at each use.
+    """
+
+    def __init__(self, submission, globals_):
+        super().__init__()
+        self.submission = submission
+        self.globals = globals_
+
+    def __setitem__(self, name, value):
+        super().__setitem__(name, value)
+        # Functions defined by the test look names up in its globals
+        self.globals[name] = value
+
+    def __missing__(self, name):
+        if name.startswith('__'):
+            raise KeyError(name)
+        return self.submission.request('name', name=name)
+
+def run_tests(job, submission):
+    ready = submission.receive()
+    if 'error' in ready:
+        return {'error': str(ready['error']), 'tests': []}
+    if ready.get('ready') is not True:
+        raise SubmissionLost("Réponse invalide de la soumission")
+
+    results = []
+    local_names = {}
+    for test in job['tests']:
+        namespace = None
+        try:
+            # Fresh snapshot of the submission's names for functions and comprehensions of the test
+            names = submission.request('names')
+            if type(names) is not dict or not all(type(name) is str for name in names):
+                raise SubmissionLost("Réponse invalide de la soumission")
+            globals_ = {'__name__': '__main__', **names, **local_names}
+            namespace = SubmissionNamespace(submission, globals_)
+            namespace.update(local_names)
+            exec(compile(test['code'], f"<test {test['name']}>", 'exec'), globals_, namespace)
+            results.append({'name': test['name'], 'passed': True, 'message': ''})
+        except AssertionError as exc:
+            results.append({'name': test['name'], 'passed': False, 'message': str(exc) or 'Assertion échouée'})
+        except SubmissionLost as exc:
+            results.append({'name': test['name'], 'passed': False, 'message': str(exc)})
+        except BaseException as exc:
+            results.append({'name': test['name'], 'passed': False, 'message': _error_message(exc)})
+        # Names set by a test stay visible to the next ones
+        if namespace is not None:
+            local_names.update(dict.items(namespace))
+    return {'tests': results}
+
+def grade(job, submission):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            result = run_tests(job, submission)
+        except SubmissionLost as exc:
+            result = {'error': str(exc), 'tests': []}
+    submission.write(output.getvalue())
+    result['output'] = ''.join(submission.output)
+    return result
+
+def main():
+    role, channel_fd = sys.argv[1], int(sys.argv[2])
+    job = json.loads(sys.stdin.readline())
+    if role == 'tests':
+        _undumpable()
+        result_fd = int(sys.argv[3])
+        os.set_inheritable(result_fd, False)
+    _detach_stdio()
+    channel = _open_channel(channel_fd)
+    apply_limits(job['limits'])
+
+    if role == 'submission':
+        try:
+            serve_submission(job, channel)
+        except (MemoryError, BrokenPipeError, ConnectionError):
+            pass
+        return
+
+    submission = Submission(channel, job['limits'])
+    try:
+        result = grade(job, submission)
+    except MemoryError:
+        result = {'error': 'MemoryError: limite de mémoire dépassée', 'tests': [], 'output': ''}
+    with os.fdopen(result_fd, 'w') as result_stream:
+        result_stream.write(_dumps(result))
+
+if __name__ == '__main__':
+    main()
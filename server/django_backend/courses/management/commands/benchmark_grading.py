@@ -0,0 +1,64 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from courses.grading import GradingPool, grading_pool
+
+SAMPLE_CODE = """
+def fizzbuzz(n):
+    if n % 15 == 0:
+        return 'FizzBuzz'
+    if n % 3 == 0:
+        return 'Fizz'
+    if n % 5 == 0:
+        return 'Buzz'
+    return str(n)
+"""
+
+SAMPLE_TESTS = [
+    {'name': 'multiples de 3', 'code': "assert fizzbuzz(9) == 'Fizz'"},
+    {'name': 'multiples de 5', 'code': "assert fizzbuzz(10) == 'Buzz'"},
+    {'name': 'multiples de 15', 'code': "assert fizzbuzz(30) == 'FizzBuzz'"},
+    {'name': 'autres', 'code': "assert [fizzbuzz(i) for i in (1, 2, 4)] == ['1', '2', '4']"},
+]
+
+class Command(BaseCommand):
+    help = "Measure grading throughput and latency for concurrent submissions (no cache)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--pool-size', type=int, default=None,
+                            help="processus du bac à sable (par défaut GRADING['POOL_SIZE'])")
+
+    def handle(self, *args, **options):
+        pool = GradingPool(size=options['pool_size'] or grading_pool.size, limits=grading_pool.limits)
+        pool.warm()
+        time.sleep(0.5)  # let the pre-started processes finish booting
+
+        def submit(index):
+            started = time.perf_counter()
+            # A distinct comment per submission so that results could not be shared
+            result = pool.run(f"# {index}\n{SAMPLE_CODE}", SAMPLE_TESTS)
+            return time.perf_counter() - started, result['status']
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            outcomes = list(executor.map(submit, range(options['submissions'])))
+        elapsed = time.perf_counter() - started
+        pool.close()
+
+        latencies = sorted(latency * 1000 for latency, status in outcomes)
+        failures = sum(1 for latency, status in outcomes if status != 'passed')
+        self.stdout.write(
+            f"{len(outcomes)} soumissions en {elapsed:.2f} s : {len(outcomes) / elapsed:.1f} /s "
+            f"(pool {pool.size}, {options['concurrency']} clients)"
+        )
+        self.stdout.write(
+            f"latence ms : médiane {statistics.median(latencies):.1f}, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f}, max {latencies[-1]:.1f}"
+        )
+        if failures:
+            self.stdout.write(self.style.WARNING(f"{failures} soumissions non réussies"))
@@ -0,0 +1,59 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from courses.models import Course
+from courses.search import search_courses, search_index, tokenize
+
+class Command(BaseCommand):
+    help = "Compare catalog search latency: indexed search against the former icontains scan (first page and count)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*',
+                            help="requêtes à mesurer (par défaut, des mots tirés des titres de cours)")
+        parser.add_argument('--samples', type=int, default=50, help="nombre de requêtes tirées des titres")
+        parser.add_argument('--repeat', type=int, default=5, help="mesures par requête")
+        parser.add_argument('--page-size', type=int, default=10)
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or self._sample_queries(options['samples'])
+        if not queries:
+            self.stdout.write(self.style.WARNING("Aucun cours publié : rien à mesurer."))
+            return
+        search_index.ensure_built()
+        page_size = options['page_size']
+        published = Course.objects.filter(is_published=True)
+
+        def scan(query):
+            queryset = published.filter(Q(title__icontains=query) | Q(description__icontains=query))
+            return queryset.count(), list(queryset.order_by('id')[:page_size])
+
+        def indexed(query):
+            queryset, ranked_ids = search_courses(published, query)
+            if ranked_ids is None:
+                return queryset.count(), list(queryset.order_by('id')[:page_size])
+            return len(ranked_ids), list(published.in_bulk(ranked_ids[:page_size]).values())
+
+        for label, run in (('icontains', scan), ('index', indexed)):
+            latencies, matches = [], 0
+            for query in queries:
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    count, page = run(query)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                matches += count
+            latencies.sort()
+            self.stdout.write(
+                f"{label:10} {len(queries)} requêtes x {options['repeat']} : médiane {statistics.median(latencies):.2f} ms, "
+                f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f} ms, max {latencies[-1]:.2f} ms, "
+                f"{matches / len(queries):.0f} résultats en moyenne"
+            )
+
+    def _sample_queries(self, samples):
+        titles = list(Course.objects.filter(is_published=True).values_list('title', flat=True)[:5000])
+        words = sorted({token for title in titles for token in tokenize(title) if len(token) > 2 and token.isalpha()})
+        random.seed(0)
+        return random.sample(words, min(samples, len(words)))
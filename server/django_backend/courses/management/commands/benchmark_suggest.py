@@ -0,0 +1,82 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.search import tokenize
+from courses.suggest import SuggestIndex, suggest_index
+
+# Syllables of the generated titles, so that prefixes share long runs like real course titles
+SYLLABLES = ('py', 'thon', 'ja', 'va', 'script', 'da', 'ta', 'web', 'ré', 'seau', 'al', 'go',
+             'ri', 'thme', 'ba', 'se', 'sé', 'cu', 'ri', 'té', 'de', 'vops', 'cloud', 'mo', 'bile')
+
+class Command(BaseCommand):
+    help = "Measure title autocompletion latency (prefix lookups and typo fallback) on the suggest index."
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*',
+                            help="préfixes à mesurer (par défaut, des préfixes et fautes tirés des titres)")
+        parser.add_argument('--titles', type=int,
+                            help="indexer N titres générés au lieu des titres de la base")
+        parser.add_argument('--samples', type=int, default=200, help="nombre de requêtes tirées des titres")
+        parser.add_argument('--repeat', type=int, default=5, help="mesures par requête")
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        if options['titles']:
+            index, titles = self._synthetic_index(options['titles'])
+        else:
+            index = suggest_index
+            started = time.perf_counter()
+            index.rebuild()
+            self.stdout.write(f"Index construit en {(time.perf_counter() - started) * 1000:.0f} ms")
+            titles = [entry[0] for entry in index._entries.values()]
+        if not titles:
+            self.stdout.write(self.style.WARNING("Aucun titre indexé : rien à mesurer."))
+            return
+
+        if options['queries']:
+            groups = {'requêtes': options['queries']}
+        else:
+            words = sorted({token for title in titles for token in tokenize(title) if len(token) > 3})
+            sample = random.sample(words, min(options['samples'], len(words)))
+            groups = {
+                'préfixes': [word[:random.randint(2, len(word))] for word in sample],
+                'fautes': [self._typo(word) for word in sample],
+            }
+
+        for label, queries in groups.items():
+            latencies, matches = [], 0
+            for query in queries:
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    results = index.suggest(query, limit=options['limit'])
+                    latencies.append((time.perf_counter() - started) * 1000)
+                matches += len(results)
+            latencies.sort()
+            self.stdout.write(
+                f"{label:10} {len(queries)} requêtes x {options['repeat']} sur {len(titles)} titres : "
+                f"médiane {statistics.median(latencies):.3f} ms, "
+                f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.3f} ms, "
+                f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.3f} ms, max {latencies[-1]:.3f} ms, "
+                f"{matches / len(queries):.1f} suggestions en moyenne"
+            )
+
+    def _synthetic_index(self, count):
+        # Built in memory only: nothing is written to the database
+        index = SuggestIndex()
+        titles = []
+        for pk in range(1, count + 1):
+            words = [''.join(random.choices(SYLLABLES, k=random.randint(1, 4))) for _ in range(random.randint(2, 6))]
+            title = ' '.join(words).capitalize()
+            index.add('course', pk, title)
+            titles.append(title)
+        index._built_at = time.monotonic()
+        return index, titles
+
+    def _typo(self, word):
+        # Replace one letter of the word, keeping its first letter
+        position = random.randint(1, len(word) - 1)
+        return word[:position] + random.choice('abcdefghijklmnopqrstuvwxyz') + word[position + 1:]
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from courses.search import search_index
+
+class Command(BaseCommand):
+    help = "Rebuild the course full-text search index from the database."
+
+    def handle(self, *args, **options):
+        search_index.rebuild()
+        count = search_index._connection().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        self.stdout.write(self.style.SUCCESS(f"{count} cours indexés."))
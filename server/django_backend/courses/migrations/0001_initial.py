@@ -0,0 +1,110 @@
+# Generated by Django 4.2 on 2025-05-24 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Course',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255, verbose_name='Titre')),
+                ('description', models.TextField(verbose_name='Description')),
+                ('image', models.ImageField(blank=True, null=True, upload_to='course_images/', verbose_name='Image')),
+                ('language', models.CharField(max_length=50, verbose_name='Langage')),
+                ('level', models.CharField(choices=[('beginner', 'Débutant'), ('intermediate', 'Intermédiaire'), ('advanced', 'Avancé')], max_length=20, verbose_name='Niveau')),
+                ('duration', models.CharField(max_length=50, verbose_name='Durée')),
+                ('instructor', models.CharField(max_length=255, verbose_name='Instructeur')),
+                ('rating', models.DecimalField(decimal_places=2, default=0.0, max_digits=3, verbose_name='Note')),
+                ('reviews_count', models.PositiveIntegerField(default=0, verbose_name="Nombre d'avis")),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de mise à jour')),
+                ('is_published', models.BooleanField(default=False, verbose_name='Est publié')),
+                ('learning_objectives', models.JSONField(blank=True, null=True, verbose_name="Objectifs d'apprentissage")),
+            ],
+            options={
+                'verbose_name': 'Cours',
+                'verbose_name_plural': 'Cours',
+            },
+        ),
+        migrations.CreateModel(
+            name='LearningPath',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255, verbose_name='Titre')),
+                ('description', models.TextField(verbose_name='Description')),
+                ('image', models.ImageField(blank=True, null=True, upload_to='path_images/', verbose_name='Image')),
+                ('slug', models.SlugField(unique=True, verbose_name='Slug')),
+                ('skill_level', models.CharField(max_length=50, verbose_name='Niveau de compétence')),
+                ('overview', models.TextField(verbose_name="Vue d'ensemble")),
+                ('benefits', models.JSONField(blank=True, null=True, verbose_name='Avantages')),
+            ],
+            options={
+                'verbose_name': "Parcours d'apprentissage",
+                'verbose_name_plural': "Parcours d'apprentissage",
+            },
+        ),
+        migrations.CreateModel(
+            name='Module',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255, verbose_name='Titre')),
+                ('description', models.TextField(blank=True, verbose_name='Description')),
+                ('order_num', models.PositiveIntegerField(verbose_name='Ordre')),
+                ('duration', models.CharField(max_length=50, verbose_name='Durée')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='modules', to='courses.course', verbose_name='Cours')),
+            ],
+            options={
+                'verbose_name': 'Module',
+                'verbose_name_plural': 'Modules',
+                'ordering': ['order_num'],
+                'unique_together': {('course', 'order_num')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PathCourse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='Ordre')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.course', verbose_name='Cours')),
+                ('learning_path', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.learningpath', verbose_name="Parcours d'apprentissage")),
+            ],
+            options={
+                'verbose_name': 'Cours du parcours',
+                'verbose_name_plural': 'Cours du parcours',
+                'ordering': ['order'],
+                'unique_together': {('learning_path', 'course')},
+            },
+        ),
+        migrations.AddField(
+            model_name='learningpath',
+            name='courses',
+            field=models.ManyToManyField(related_name='learning_paths', through='courses.PathCourse', to='courses.course', verbose_name='Cours'),
+        ),
+        migrations.CreateModel(
+            name='Section',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255, verbose_name='Titre')),
+                ('type', models.CharField(choices=[('video', 'Vidéo'), ('exercise', 'Exercice'), ('quiz', 'Quiz')], max_length=20, verbose_name='Type')),
+                ('content', models.TextField(blank=True, verbose_name='Contenu')),
+                ('duration', models.CharField(max_length=50, verbose_name='Durée')),
+                ('order_num', models.PositiveIntegerField(verbose_name='Ordre')),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sections', to='courses.module', verbose_name='Module')),
+            ],
+            options={
+                'verbose_name': 'Section',
+                'verbose_name_plural': 'Sections',
+                'ordering': ['order_num'],
+                'unique_together': {('module', 'order_num')},
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+import re
+
+from django.db import migrations, models
+
+# Copie figée de courses.durations.parse_duration_minutes : une migration ne dépend pas du code de l'application
+_DURATION_TOKEN = re.compile(r'(\d+(?:[.,]\d+)?)\s*([a-zé]*)', re.IGNORECASE)
+_HOUR_UNITS = {'h', 'hr', 'hrs', 'heure', 'heures', 'hour', 'hours'}
+_MINUTE_UNITS = {'', 'm', 'mn', 'min', 'mins', 'minute', 'minutes'}
+
+def parse_duration_minutes(value):
+    if not value:
+        return 0
+    total = 0.0
+    for number, unit in _DURATION_TOKEN.findall(str(value)):
+        amount = float(number.replace(',', '.'))
+        unit = unit.lower()
+        if unit in _HOUR_UNITS:
+            total += amount * 60
+        elif unit in _MINUTE_UNITS:
+            total += amount
+    return int(round(total))
+
+def fill_duration_minutes(apps, schema_editor):
+    # Convertir les durées texte existantes ("10 heures", "1h30", ...) en minutes
+    for model_name in ('Course', 'Module', 'Section'):
+        Model = apps.get_model('courses', model_name)
+        batch = []
+        for obj in Model.objects.only('id', 'duration').iterator(chunk_size=1000):
+            obj.duration_minutes = parse_duration_minutes(obj.duration)
+            batch.append(obj)
+            if len(batch) >= 1000:
+                Model.objects.bulk_update(batch, ['duration_minutes'])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, ['duration_minutes'])
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Durée (minutes)'),
+        ),
+        migrations.AddField(
+            model_name='module',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Durée (minutes)'),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Durée (minutes)'),
+        ),
+        migrations.RunPython(fill_duration_minutes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations, models
+
+def assign_section_slots(apps, schema_editor):
+    # Numéroter les sections existantes de chaque cours dans l'ordre du programme
+    Course = apps.get_model('courses', 'Course')
+    Section = apps.get_model('courses', 'Section')
+    for course in Course.objects.only('id').iterator(chunk_size=500):
+        sections = list(
+            Section.objects.filter(module__course_id=course.id)
+            .order_by('module__order_num', 'order_num', 'id').only('id')
+        )
+        for slot, section in enumerate(sections):
+            section.slot = slot
+        Section.objects.bulk_update(sections, ['slot'], batch_size=1000)
+        mask = (1 << len(sections)) - 1
+        Course.objects.filter(pk=course.id).update(
+            section_slots=len(sections),
+            section_mask=mask.to_bytes((mask.bit_length() + 7) // 8, 'little'),
+        )
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('courses', '0002_duration_minutes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='section_mask',
+            field=models.BinaryField(default=b'', verbose_name='Emplacements des sections actives'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='section_slots',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Emplacements de sections attribués'),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='slot',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Emplacement de complétion'),
+        ),
+        migrations.RunPython(assign_section_slots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('courses', '0003_section_completion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExerciseTest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Nom')),
+                ('code', models.TextField(verbose_name='Code du test (assertions exécutées après le code soumis)')),
+                ('order_num', models.PositiveIntegerField(verbose_name='Ordre')),
+                ('is_hidden', models.BooleanField(default=False, verbose_name='Test caché')),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercise_tests', to='courses.section', verbose_name='Section')),
+            ],
+            options={
+                'verbose_name': "Test d'exercice",
+                'verbose_name_plural': "Tests d'exercice",
+                'ordering': ['order_num'],
+                'unique_together': {('section', 'order_num')},
+            },
+        ),
+    ]
@@ -1,7 +1,20 @@
 
-from django.db import models
+from django.db import models, transaction
+from .durations import parse_duration_minutes
+from .completion import allocate_slot, release_slot
 
-class Course(models.Model):
+class DurationMinutesMixin:
+    """
+    Keep the numeric duration_minutes in sync with the free-text duration.
+    """
+    def save(self, *args, **kwargs):
+        self.duration_minutes = parse_duration_minutes(self.duration)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'duration' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'duration_minutes'}
+        super().save(*args, **kwargs)
+
+class Course(DurationMinutesMixin, models.Model):
     """
     Model for storing course information.
     """
@@ -17,6 +30,7 @@ class Course(models.Model):
     language = models.CharField(max_length=50, verbose_name="Langage")
     level = models.CharField(max_length=20, choices=LEVEL_CHOICES, verbose_name="Niveau")
     duration = models.CharField(max_length=50, verbose_name="Durée")
+    duration_minutes = models.PositiveIntegerField(default=0, editable=False, verbose_name="Durée (minutes)")
     instructor = models.CharField(max_length=255, verbose_name="Instructeur")
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.0, verbose_name="Note")
     reviews_count = models.PositiveIntegerField(default=0, verbose_name="Nombre d'avis")
@@ -24,6 +38,9 @@ class Course(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de mise à jour")
     is_published = models.BooleanField(default=False, verbose_name="Est publié")
     learning_objectives = models.JSONField(null=True, blank=True, verbose_name="Objectifs d'apprentissage")
+    # Emplacements des sections pour le suivi de complétion (voir completion.py)
+    section_slots = models.PositiveIntegerField(default=0, editable=False, verbose_name="Emplacements de sections attribués")
+    section_mask = models.BinaryField(default=b'', editable=False, verbose_name="Emplacements des sections actives")
     
     class Meta:
         verbose_name = "Cours"
@@ -32,7 +49,7 @@ class Course(models.Model):
     def __str__(self):
         return self.title
 
-class Module(models.Model):
+class Module(DurationMinutesMixin, models.Model):
     """
     Model for course modules.
     """
@@ -41,6 +58,7 @@ class Module(models.Model):
     description = models.TextField(blank=True, verbose_name="Description")
     order_num = models.PositiveIntegerField(verbose_name="Ordre")
     duration = models.CharField(max_length=50, verbose_name="Durée")
+    duration_minutes = models.PositiveIntegerField(default=0, editable=False, verbose_name="Durée (minutes)")
     
     class Meta:
         verbose_name = "Module"
@@ -51,7 +69,7 @@ class Module(models.Model):
     def __str__(self):
         return f"{self.course.title} - Module {self.order_num}: {self.title}"
 
-class Section(models.Model):
+class Section(DurationMinutesMixin, models.Model):
     """
     Model for module sections.
     """
@@ -66,7 +84,10 @@ class Section(models.Model):
     type = models.CharField(max_length=20, choices=SECTION_TYPE_CHOICES, verbose_name="Type")
     content = models.TextField(blank=True, verbose_name="Contenu")
     duration = models.CharField(max_length=50, verbose_name="Durée")
+    duration_minutes = models.PositiveIntegerField(default=0, editable=False, verbose_name="Durée (minutes)")
     order_num = models.PositiveIntegerField(verbose_name="Ordre")
+    # Bit de la section dans les bitsets de complétion, stable si les sections sont réordonnées
+    slot = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Emplacement de complétion")
     
     class Meta:
         verbose_name = "Section"
@@ -76,6 +97,50 @@ class Section(models.Model):
     
     def __str__(self):
         return f"{self.module.title} - Section {self.order_num}: {self.title}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_module_id = instance.__dict__.get('module_id')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # A new section, or one moved to another course, takes the next free slot of its course.
+        # Same transaction as the row itself, so a failed save does not leave a slot in the mask.
+        with transaction.atomic():
+            loaded_module_id = getattr(self, '_loaded_module_id', None)
+            if self.slot is None or loaded_module_id not in (None, self.module_id):
+                course_ids = Module.objects.values_list('course_id', flat=True)
+                course_id = course_ids.get(pk=self.module_id)
+                old_course_id = course_ids.filter(pk=loaded_module_id).first() if self.slot is not None else None
+                if self.slot is None or old_course_id != course_id:
+                    if old_course_id is not None:
+                        release_slot(old_course_id, self.slot)
+                    self.slot = allocate_slot(course_id)
+                    update_fields = kwargs.get('update_fields')
+                    if update_fields is not None:
+                        kwargs['update_fields'] = set(update_fields) | {'slot'}
+            super().save(*args, **kwargs)
+        self._loaded_module_id = self.module_id
+
+class ExerciseTest(models.Model):
+    """
+    Test case run against learner submissions for an exercise section.
+    """
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='exercise_tests', verbose_name="Section")
+    name = models.CharField(max_length=255, verbose_name="Nom")
+    code = models.TextField(verbose_name="Code du test (assertions exécutées après le code soumis)")
+    order_num = models.PositiveIntegerField(verbose_name="Ordre")
+    is_hidden = models.BooleanField(default=False, verbose_name="Test caché")
+    
+    class Meta:
+        verbose_name = "Test d'exercice"
+        verbose_name_plural = "Tests d'exercice"
+        ordering = ['order_num']
+        unique_together = ['section', 'order_num']
+    
+    def __str__(self):
+        return f"{self.section.title} - Test {self.order_num}: {self.name}"
 
 class LearningPath(models.Model):
     """
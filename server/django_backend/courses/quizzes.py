@@ -0,0 +1,161 @@
+"""
+Quiz scoring.
+
+A quiz section stores its questions as JSON in Section.content:
+
+    {"pass_ratio": 0.7,
+     "questions": [{"id": "q1", "text": "...", "choices": ["...", "..."],
+                    "answer": 1, "points": 1},
+                   {"id": "q2", ..., "answer": [0, 2]}]}
+
+"answer" is a choice index, or a list of indexes for multiple-answer
+questions (all of them, and only them, must be selected). The answer key
+is compiled once per section version into one byte per question (the bit
+mask of the correct choices), so an answer sheet encoded the same way is
+scored by comparing two byte strings position by position at C speed,
+without per-question Python logic. Compiled keys are cached in memory,
+keyed by the section and its content.
+
+Learners receive the content without the answers (public_content).
+"""
+
+import json
+import operator
+from collections import namedtuple
+from functools import lru_cache
+from itertools import compress
+
+# One byte per question holds the selected choices
+MAX_CHOICES = 8
+
+# Largest number of answer sheets accepted in one bulk scoring request
+MAX_BULK_SUBMISSIONS = 5000
+
+class QuizError(ValueError):
+    """
+    The quiz content or an answer sheet is malformed.
+    """
+
+AnswerKey = namedtuple('AnswerKey', 'question_ids positions choice_counts key points total pass_score')
+
+def _mask(answer, choice_count, question_id):
+    indexes = answer if isinstance(answer, list) else [answer]
+    mask = 0
+    for index in indexes:
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < choice_count:
+            raise QuizError(f"Réponse invalide pour la question {question_id}")
+        mask |= 1 << index
+    return mask
+
+def _points(question, question_id):
+    points = question.get('points', 1)
+    if not isinstance(points, int) or isinstance(points, bool) or points < 0:
+        raise QuizError(f"Points invalides pour la question {question_id}")
+    return points
+
+@lru_cache(maxsize=512)
+def _compile(section_id, content):
+    try:
+        quiz = json.loads(content)
+        questions = quiz['questions']
+        pass_ratio = float(quiz.get('pass_ratio', 0.7))
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise QuizError("Le contenu de la section n'est pas un quiz valide")
+    if not isinstance(questions, list) or not 0 <= pass_ratio <= 1:
+        raise QuizError("Le contenu de la section n'est pas un quiz valide")
+    if not questions:
+        raise QuizError("Le quiz ne contient aucune question")
+
+    question_ids, choice_counts, key, points = [], [], bytearray(), []
+    for position, question in enumerate(questions):
+        if not isinstance(question, dict):
+            raise QuizError(f"La question {position} n'est pas un objet")
+        question_id = str(question.get('id', position))
+        if question_id in question_ids:
+            raise QuizError(f"La question {question_id} apparaît plusieurs fois")
+        choices = question.get('choices')
+        if not isinstance(choices, list) or not 0 < len(choices) <= MAX_CHOICES:
+            raise QuizError(f"La question {question_id} doit avoir entre 1 et {MAX_CHOICES} choix")
+        mask = _mask(question.get('answer'), len(choices), question_id)
+        if not mask:
+            # An empty key byte would match an unanswered question
+            raise QuizError(f"La question {question_id} n'a aucune bonne réponse")
+        question_ids.append(question_id)
+        choice_counts.append(len(choices))
+        key.append(mask)
+        points.append(_points(question, question_id))
+
+    total = sum(points)
+    return AnswerKey(
+        question_ids=tuple(question_ids),
+        positions={question_id: position for position, question_id in enumerate(question_ids)},
+        choice_counts=tuple(choice_counts),
+        key=bytes(key),
+        # None when every question is worth one point: the score is then a plain count
+        points=None if all(point == 1 for point in points) else tuple(points),
+        total=total,
+        pass_score=total * pass_ratio,
+    )
+
+def answer_key(section):
+    """
+    Compiled answer key of a quiz section (cached until its content changes).
+    """
+    return _compile(section.pk, section.content)
+
+@lru_cache(maxsize=512)
+def public_content(content):
+    """
+    Quiz content with the answers removed; content that is not a quiz is returned as is.
+    """
+    try:
+        quiz = json.loads(content)
+        questions = [{k: v for k, v in question.items() if k != 'answer'} for question in quiz['questions']]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return content
+    return json.dumps({**quiz, 'questions': questions}, ensure_ascii=False)
+
+def encode_answers(key, answers):
+    """
+    Encode {question_id: choice index or list of indexes} like the answer key.
+
+    Unanswered questions encode as 0, which never matches a key byte: the key
+    of every question has at least one correct choice (checked by _compile).
+    """
+    if not isinstance(answers, dict):
+        raise QuizError("answers doit être un objet {question: réponse}")
+    sheet = bytearray(len(key.key))
+    for question_id, answer in answers.items():
+        position = key.positions.get(str(question_id))
+        if position is None:
+            raise QuizError(f"Question inconnue : {question_id}")
+        sheet[position] = _mask(answer, key.choice_counts[position], question_id)
+    return bytes(sheet)
+
+def score_sheet(key, sheet):
+    matches = map(operator.eq, key.key, sheet)
+    if key.points is None:
+        return sum(matches)
+    return sum(compress(key.points, matches))
+
+def score(key, answers):
+    """
+    Score one submission: {'score', 'max_score', 'passed', 'correct'} (correct question ids).
+    """
+    sheet = encode_answers(key, answers)
+    correct = [question_id for question_id, expected, given in zip(key.question_ids, key.key, sheet)
+               if expected == given]
+    points = score_sheet(key, sheet)
+    return {'score': points, 'max_score': key.total, 'passed': points >= key.pass_score, 'correct': correct}
+
+def score_many(key, answer_sheets):
+    """
+    Score many submissions of the same quiz; returns (score, passed) per sheet, in order.
+
+    Sheets must already be encoded with encode_answers.
+    """
+    results = []
+    for sheet in answer_sheets:
+        points = score_sheet(key, sheet)
+        results.append((points, points >= key.pass_score))
+    return results
@@ -0,0 +1,289 @@
+"""
+Full-text search index for published courses.
+
+An inverted index (term -> course postings) stored in a local SQLite file,
+so catalog search needs no external service. Text is accent-folded and
+lowercased before tokenizing, results are ranked with BM25, and the last
+query term matches as a prefix to support search-as-you-type.
+
+Each indexed course also records its language and level, so filtered
+searches and their facet counts are answered by the index alone: the
+catalog database only loads the page of courses being displayed.
+"""
+
+import math
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+
+# Field weights: a hit in a title counts more than one in section content
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'module_title': 2.0,
+    'description': 1.0,
+    'section_content': 1.0,
+}
+
+STOP_WORDS = {
+    'a', 'au', 'aux', 'avec', 'ce', 'ces', 'dans', 'de', 'des', 'du', 'en', 'et',
+    'il', 'la', 'le', 'les', 'leur', 'ou', 'par', 'pour', 'qui', 'que', 'sur',
+    'un', 'une', 'vos', 'votre', 'l', 'd', 'an', 'and', 'for', 'in', 'of', 'on',
+    'the', 'to', 'with',
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+def fold(text):
+    """
+    Lowercase and strip accents ("Débutants" -> "debutants").
+    """
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+def tokenize(text):
+    text = fold(text).replace('c++', 'cpp').replace('c#', 'csharp')
+    return [token for token in _TOKEN.findall(text) if token not in STOP_WORDS]
+
+class SearchIndex:
+    """
+    Inverted index over course titles, descriptions, module titles and section content.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._ready = False
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    course_id INTEGER NOT NULL,
+                    weight REAL NOT NULL,
+                    PRIMARY KEY (term, course_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS postings_course ON postings (course_id);
+                CREATE TABLE IF NOT EXISTS documents (
+                    course_id INTEGER PRIMARY KEY,
+                    length REAL NOT NULL,
+                    language TEXT NOT NULL DEFAULT '',
+                    level TEXT NOT NULL DEFAULT ''
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+            """)
+            self._upgrade(conn)
+            self._local.conn = conn
+        return conn
+
+    def _upgrade(self, conn):
+        # Index files written before documents had language and level: add the
+        # columns and mark the index as not built, so that ensure_built refills them
+        def columns():
+            return {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+
+        if 'language' in columns():
+            return
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have upgraded the file meanwhile
+                if 'language' not in columns():
+                    conn.execute("ALTER TABLE documents ADD COLUMN language TEXT NOT NULL DEFAULT ''")
+                    conn.execute("ALTER TABLE documents ADD COLUMN level TEXT NOT NULL DEFAULT ''")
+                    conn.execute("DELETE FROM meta WHERE key = 'built'")
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    @staticmethod
+    def _course_terms(course):
+        # Weighted term frequencies for one course and its modules/sections
+        terms = Counter()
+        fields = [
+            ('title', course.title),
+            ('description', course.description),
+        ]
+        for module in course.modules.all():
+            fields.append(('module_title', module.title))
+            for section in module.sections.all():
+                fields.append(('section_content', section.title))
+                fields.append(('section_content', section.content))
+        for field, text in fields:
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                terms[token] += weight
+        return terms
+
+    def _write_course(self, conn, course):
+        conn.execute("DELETE FROM postings WHERE course_id = ?", (course.id,))
+        conn.execute("DELETE FROM documents WHERE course_id = ?", (course.id,))
+        terms = self._course_terms(course)
+        conn.executemany(
+            "INSERT INTO postings (term, course_id, weight) VALUES (?, ?, ?)",
+            [(term, course.id, weight) for term, weight in terms.items()]
+        )
+        conn.execute(
+            "INSERT INTO documents (course_id, length, language, level) VALUES (?, ?, ?, ?)",
+            (course.id, sum(terms.values()), course.language, course.level)
+        )
+
+    def index_course(self, course):
+        """
+        (Re)index one course; unpublished courses are removed from the index.
+        """
+        if not course.is_published:
+            self.remove_course(course.id)
+            return
+        conn = self._connection()
+        with self._write_lock, conn:
+            self._write_course(conn, course)
+
+    def remove_course(self, course_id):
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM postings WHERE course_id = ?", (course_id,))
+            conn.execute("DELETE FROM documents WHERE course_id = ?", (course_id,))
+
+    def rebuild(self):
+        """
+        Rebuild the whole index from the database.
+        """
+        from .models import Course
+
+        courses = Course.objects.filter(is_published=True).prefetch_related('modules__sections')
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM postings")
+            conn.execute("DELETE FROM documents")
+            for course in courses.iterator(chunk_size=200):
+                self._write_course(conn, course)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', '1')")
+        self._ready = True
+
+    def ensure_built(self):
+        if self._ready:
+            return
+        # Concurrent first searches wait for a single build
+        with self._build_lock:
+            if self._ready:
+                return
+            row = self._connection().execute("SELECT value FROM meta WHERE key = 'built'").fetchone()
+            if row is None:
+                self.rebuild()
+            self._ready = True
+
+    def _matches(self, conn, terms, attributes=False):
+        """
+        Postings of every query term, and the ids of the courses matching all
+        of them; with `attributes`, a dict of those ids to their (language, level).
+        """
+        *exact_terms, last = terms
+        groups = [
+            conn.execute(
+                "SELECT p.course_id, p.weight, d.length FROM postings p "
+                "JOIN documents d ON d.course_id = p.course_id WHERE p.term = ?",
+                (term,)
+            ).fetchall()
+            for term in dict.fromkeys(exact_terms)
+        ]
+        # The last term is matched as a prefix (search-as-you-type)
+        columns = ", d.language, d.level" if attributes else ""
+        groups.append(conn.execute(
+            f"SELECT p.course_id, SUM(p.weight), d.length{columns} FROM postings p "
+            "JOIN documents d ON d.course_id = p.course_id "
+            "WHERE p.term >= ? AND p.term < ? GROUP BY p.course_id",
+            (last, last + '\uffff')
+        ).fetchall())
+        matching = set.intersection(*({row[0] for row in rows} for rows in groups))
+        if attributes:
+            matching = {row[0]: (row[3], row[4]) for row in groups[-1] if row[0] in matching}
+        return groups, matching
+
+    def search(self, query, language='', level=''):
+        """
+        Return the ids of all courses matching every query term, best match first.
+
+        `language` and `level` keep only the courses with that language or
+        level (case-insensitive), as the catalog filters do.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        self.ensure_built()
+        conn = self._connection()
+
+        total_docs, avg_length = conn.execute(
+            "SELECT COUNT(*), COALESCE(AVG(length), 0) FROM documents"
+        ).fetchone()
+        if not total_docs:
+            return []
+
+        language, level = language.lower(), level.lower()
+        groups, matching = self._matches(conn, terms, attributes=bool(language or level))
+        if language or level:
+            # Document frequencies (idf) stay those of the whole index: filters only drop results
+            matching = {
+                course_id for course_id, (course_language, course_level) in matching.items()
+                if (not language or course_language.lower() == language)
+                and (not level or course_level.lower() == level)
+            }
+        if not matching:
+            return []
+
+        scores = defaultdict(float)
+        for rows in groups:
+            idf = math.log(1 + (total_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            for course_id, weight, length, *course_attributes in rows:
+                if course_id in matching:
+                    norm = K1 * (1 - B + B * length / (avg_length or 1))
+                    scores[course_id] += idf * weight * (K1 + 1) / (weight + norm)
+
+        return sorted(scores, key=lambda course_id: (-scores[course_id], course_id))
+
+    def facet_counts(self, query):
+        """
+        Number of courses matching `query` per (language, level) pair.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return Counter()
+        self.ensure_built()
+        groups, matching = self._matches(self._connection(), terms, attributes=True)
+        return Counter(matching.values())
+
+search_index = SearchIndex(settings.SEARCH_INDEX_PATH)
+
+def search_courses(queryset, query, language='', level=''):
+    """
+    Search published courses for `query`; returns (queryset, ranked ids).
+
+    The index answers the search with the language and level filters: the
+    queryset comes back unchanged and callers page through the ranked ids,
+    loading one page at a time (queryset.in_bulk(page)). A query made only of
+    stop words ("le", "the") has no indexed term: it falls back to a
+    title/description substring match on the queryset, and the ranked ids
+    are None.
+    """
+    query = query.strip()
+    if not tokenize(query):
+        return queryset.filter(Q(title__icontains=query) | Q(description__icontains=query)), None
+    return queryset, search_index.search(query, language=language, level=level)
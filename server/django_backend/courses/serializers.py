@@ -1,18 +1,28 @@
 
 from rest_framework import serializers
 from .models import Course, Module, Section, LearningPath, PathCourse
+from .durations import format_duration
+from .quizzes import public_content
 
 class SectionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Section
-        fields = ['id', 'title', 'type', 'content', 'duration', 'order_num']
+        fields = ['id', 'title', 'type', 'content', 'duration', 'duration_minutes', 'order_num']
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Quiz answers are only shown to admins
+        request = self.context.get('request')
+        if instance.type == 'quiz' and not (request and request.user.is_authenticated and request.user.is_admin):
+            data['content'] = public_content(instance.content)
+        return data
 
 class ModuleSerializer(serializers.ModelSerializer):
     sections = SectionSerializer(many=True, read_only=True)
     
     class Meta:
         model = Module
-        fields = ['id', 'title', 'description', 'order_num', 'duration', 'sections']
+        fields = ['id', 'title', 'description', 'order_num', 'duration', 'duration_minutes', 'sections']
 
 class CourseSerializer(serializers.ModelSerializer):
     modules = ModuleSerializer(many=True, read_only=True)
@@ -21,11 +31,14 @@ class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = ['id', 'title', 'description', 'image', 'language', 'level', 
-                  'duration', 'instructor', 'rating', 'reviews_count', 
+                  'duration', 'duration_minutes', 'instructor', 'rating', 'reviews_count', 
                   'created_at', 'updated_at', 'is_published', 
                   'learning_objectives', 'modules', 'modules_count']
     
     def get_modules_count(self, obj):
+        # Annotated by CourseViewSet.get_queryset on detail reads
+        if hasattr(obj, 'modules_count'):
+            return obj.modules_count
         return obj.modules.count()
 
 class CourseListSerializer(serializers.ModelSerializer):
@@ -35,7 +48,7 @@ class CourseListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = ['id', 'title', 'description', 'image', 'language', 'level', 
-                 'duration', 'rating', 'reviews_count', 'is_published']
+                 'duration', 'duration_minutes', 'rating', 'reviews_count', 'is_published']
 
 class PathCourseSerializer(serializers.ModelSerializer):
     course_details = CourseListSerializer(source='course', read_only=True)
@@ -55,6 +68,9 @@ class LearningPathSerializer(serializers.ModelSerializer):
                   'courses', 'courses_count']
     
     def get_courses_count(self, obj):
+        # Annotated by LearningPathViewSet.get_queryset on detail reads
+        if hasattr(obj, 'courses_count'):
+            return obj.courses_count
         return obj.courses.count()
 
 class LearningPathListSerializer(serializers.ModelSerializer):
@@ -63,16 +79,24 @@ class LearningPathListSerializer(serializers.ModelSerializer):
     """
     courses_count = serializers.SerializerMethodField()
     total_duration = serializers.SerializerMethodField()
+    total_duration_minutes = serializers.SerializerMethodField()
     
     class Meta:
         model = LearningPath
         fields = ['id', 'title', 'description', 'image', 'slug', 
-                 'skill_level', 'courses_count', 'total_duration']
+                 'skill_level', 'courses_count', 'total_duration',
+                 'total_duration_minutes']
     
     def get_courses_count(self, obj):
+        # Annotated by LearningPathViewSet.get_queryset on listings
+        if hasattr(obj, 'courses_count'):
+            return obj.courses_count
         return obj.courses.count()
     
+    def get_total_duration_minutes(self, obj):
+        if hasattr(obj, 'total_duration_minutes'):
+            return obj.total_duration_minutes or 0
+        return sum(obj.courses.values_list('duration_minutes', flat=True))
+    
     def get_total_duration(self, obj):
-        # This is a simple estimation based on course durations
-        # In a real app, you might need more complex logic
-        return f"{obj.courses.count() * 8} heures"
+        return format_duration(self.get_total_duration_minutes(obj))
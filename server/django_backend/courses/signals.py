@@ -0,0 +1,69 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Course, Module, Section, LearningPath
+from .search import search_index
+from .suggest import suggest_index
+from .facets import invalidate_facets
+from .completion import release_slot
+from users.progress import schedule_progress_refresh
+
+logger = logging.getLogger(__name__)
+
+def reindex_course(course_id):
+    """
+    Refresh the search index entry of one course once the transaction commits,
+    then drop the cached facets, which count the matches of the index.
+    """
+    def reindex():
+        try:
+            course = Course.objects.prefetch_related('modules__sections').filter(pk=course_id).first()
+            if course is None:
+                search_index.remove_course(course_id)
+            else:
+                search_index.index_course(course)
+        except Exception:
+            logger.exception("Search index update failed for course %s", course_id)
+        invalidate_facets()
+
+    transaction.on_commit(reindex)
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    # Deleting clears instance.pk before the transaction commits: bind it now
+    pk, title = instance.pk, instance.title
+    reindex_course(pk)
+    if instance.is_published and kwargs['signal'] is post_save:
+        transaction.on_commit(lambda: suggest_index.add('course', pk, title))
+    else:
+        transaction.on_commit(lambda: suggest_index.remove('course', pk))
+
+@receiver([post_save, post_delete], sender=Module)
+def module_changed(sender, instance, **kwargs):
+    reindex_course(instance.course_id)
+
+@receiver([post_save, post_delete], sender=Section)
+def section_changed(sender, instance, **kwargs):
+    course_id = Module.objects.filter(pk=instance.module_id).values_list('course_id', flat=True).first()
+    if course_id is None:
+        return
+    reindex_course(course_id)
+    deleted = kwargs['signal'] is post_delete
+    if deleted and instance.slot is not None:
+        release_slot(course_id, instance.slot)
+    if deleted or kwargs.get('created'):
+        # The course has a different number of sections: rescale the stored percentages
+        schedule_progress_refresh(course_id)
+
+@receiver(post_save, sender=LearningPath)
+def learning_path_saved(sender, instance, **kwargs):
+    pk, title, slug = instance.pk, instance.title, instance.slug
+    transaction.on_commit(lambda: suggest_index.add('learning_path', pk, title, slug=slug))
+
+@receiver(post_delete, sender=LearningPath)
+def learning_path_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: suggest_index.remove('learning_path', pk))
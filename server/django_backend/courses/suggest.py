@@ -0,0 +1,364 @@
+"""
+In-memory autocomplete index over course and learning path titles.
+
+Titles are accent-folded and tokenized like the full-text index. Each
+query token is looked up as a prefix in a trie; tokens with no prefix hit
+(typos) fall back to trigram similarity. The index is updated in place
+from model signals and fully refreshed every SUGGEST_INDEX_MAX_AGE seconds
+so that other worker processes converge. Refreshes run in a background
+thread and are swapped in when complete: requests keep answering from the
+current index, and only the very first lookup of a process waits for a build.
+
+Lookups stay around a millisecond or below on large catalogs: each trie
+node keeps its best TOP_KEYS titles so a short prefix is answered without
+scanning every title under it, and typo candidates are filtered by
+trigram count before any similarity is computed (only the rarest trigrams
+of the token are scanned, in the size buckets that can still match).
+"""
+
+import bisect
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .search import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Minimum trigram similarity for a typo to still match a title word
+MIN_SIMILARITY = 0.4
+
+# Similarities tried first for a typo before falling back to MIN_SIMILARITY
+FUZZY_START_THRESHOLDS = (0.8, 0.65, 0.5)
+
+# Best titles kept on each trie node, enough for the largest page of suggestions
+TOP_KEYS = 50
+
+class _TrieNode:
+    __slots__ = ('children', 'keys', 'top', 'exact_top')
+
+    def __init__(self):
+        self.children = {}
+        self.keys = set()
+        # The TOP_KEYS best keys of the node, and of the titles having its word
+        # as a whole word, as sorted (rank, key) pairs
+        self.top = []
+        self.exact_top = []
+
+def _add_top(top, item):
+    if len(top) < TOP_KEYS or item < top[-1]:
+        bisect.insort(top, item)
+        del top[TOP_KEYS:]
+
+def _remove_top(top, item):
+    # True if the list lost an item and may need a refill
+    index = bisect.bisect_left(top, item)
+    if index < len(top) and top[index] == item:
+        del top[index]
+        return True
+    return False
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SuggestIndex:
+    """
+    Prefix trie plus trigram index of titles, keyed by (kind, id).
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._built_at = None
+        self._rebuilding = False
+        # Changes received while a rebuild runs, replayed on the new index before the swap
+        self._changes = None
+        self._reset()
+
+    def _reset(self):
+        self._entries = {}
+        self._root = _TrieNode()
+        self._words = defaultdict(set)
+        # trigram -> number of trigrams of the word -> words
+        self._trigrams = defaultdict(lambda: defaultdict(set))
+        self._word_grams = {}
+
+    def _rank(self, key):
+        # Shorter titles first among titles matching equally well
+        return (len(self._entries[key][0]), key)
+
+    def _insert(self, key, title, payload):
+        words = set(tokenize(title))
+        self._entries[key] = (title, words, payload)
+        item = (self._rank(key), key)
+        for word in words:
+            node = self._root
+            for char in word:
+                node = node.children.setdefault(char, _TrieNode())
+                if key not in node.keys:
+                    node.keys.add(key)
+                    _add_top(node.top, item)
+            _add_top(node.exact_top, item)
+            self._words[word].add(key)
+            if word not in self._word_grams:
+                grams = frozenset(trigrams(word))
+                self._word_grams[word] = grams
+                for gram in grams:
+                    self._trigrams[gram][len(grams)].add(word)
+
+    def _delete(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        item = (self._rank(key), key)
+        for word in entry[1]:
+            path, node = [], self._root
+            for char in word:
+                child = node.children.get(char)
+                if child is None:
+                    break
+                child.keys.discard(key)
+                path.append((node, char, child))
+                node = child
+            self._words[word].discard(key)
+            # Refill the best lists from the remaining keys when they fall short
+            for parent, char, child in path:
+                if _remove_top(child.top, item) and len(child.top) < min(len(child.keys), TOP_KEYS):
+                    child.top = heapq.nsmallest(TOP_KEYS, ((self._rank(other), other) for other in child.keys))
+            if len(path) == len(word):
+                exact_top = node.exact_top
+                if _remove_top(exact_top, item) and len(exact_top) < min(len(self._words[word]), TOP_KEYS):
+                    node.exact_top = heapq.nsmallest(
+                        TOP_KEYS, ((self._rank(other), other) for other in self._words[word])
+                    )
+            # Prune the nodes no other title goes through
+            for parent, char, child in reversed(path):
+                if child.keys or child.children:
+                    break
+                del parent.children[char]
+            if not self._words[word]:
+                del self._words[word]
+                grams = self._word_grams.pop(word, ())
+                for gram in grams:
+                    buckets = self._trigrams.get(gram)
+                    if buckets is None:
+                        continue
+                    words = buckets.get(len(grams))
+                    if words is not None:
+                        words.discard(word)
+                        if not words:
+                            del buckets[len(grams)]
+                    if not buckets:
+                        del self._trigrams[gram]
+        del self._entries[key]
+
+    def _apply(self, key, title, payload):
+        self._delete(key)
+        if title is not None:
+            self._insert(key, title, payload)
+
+    def add(self, kind, pk, title, **extra):
+        key = (kind, pk)
+        payload = {'type': kind, 'id': pk, 'title': title, **extra}
+        with self._lock:
+            self._apply(key, title, payload)
+            if self._changes is not None:
+                self._changes.append((key, title, payload))
+
+    def remove(self, kind, pk):
+        with self._lock:
+            self._apply((kind, pk), None, None)
+            if self._changes is not None:
+                self._changes.append(((kind, pk), None, None))
+
+    def rebuild(self):
+        """
+        Reload every title from the database, then swap the new structures in.
+
+        Changes made through add/remove while the titles are being read are
+        replayed on the new structures, so the swap does not undo them.
+        """
+        from .models import Course, LearningPath
+
+        with self._lock:
+            self._changes = []
+        try:
+            fresh = SuggestIndex(self.max_age)
+            for pk, title in Course.objects.filter(is_published=True).values_list('id', 'title').iterator():
+                fresh._insert(('course', pk), title, {'type': 'course', 'id': pk, 'title': title})
+            for pk, title, slug in LearningPath.objects.values_list('id', 'title', 'slug').iterator():
+                fresh._insert(('learning_path', pk), title,
+                              {'type': 'learning_path', 'id': pk, 'title': title, 'slug': slug})
+
+            with self._lock:
+                for change in self._changes:
+                    fresh._apply(*change)
+                self._entries = fresh._entries
+                self._root = fresh._root
+                self._words = fresh._words
+                self._trigrams = fresh._trigrams
+                self._word_grams = fresh._word_grams
+                self._built_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._changes = None
+
+    def _rebuild_in_background(self):
+        def run():
+            try:
+                self.rebuild()
+            except Exception:
+                logger.exception("Suggest index refresh failed")
+            finally:
+                close_old_connections()
+                with self._lock:
+                    self._rebuilding = False
+
+        threading.Thread(target=run, name='suggest-rebuild', daemon=True).start()
+
+    def _ensure_fresh(self):
+        with self._lock:
+            if self._built_at is not None:
+                # Stale: refresh in the background and keep answering from the current index
+                if time.monotonic() - self._built_at > self.max_age and not self._rebuilding:
+                    self._rebuilding = True
+                    self._rebuild_in_background()
+                return
+            # Nothing to answer from yet: the first lookup builds the index
+            self.rebuild()
+
+    def _prefix_node(self, token):
+        node = self._root
+        for char in token:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _fuzzy_scores(self, token, limit=None):
+        """
+        Title keys whose words share enough trigrams with the (misspelled) token.
+
+        Word sizes (trigram counts) are visited from the most to the least
+        similar possible; only the rarest trigrams of the token are scanned, as
+        many as a match must contain one of. With `limit`, the threshold rises
+        to the limit-th best similarity found, so fewer sizes and trigrams remain.
+        """
+        grams = trigrams(token)
+        size = len(grams)
+
+        def bound(count):
+            # Best Dice coefficient 2c / (size + count), reached when c = min(size, count)
+            return 2 * min(size, count) / (size + count)
+
+        counts = range(math.ceil(size * MIN_SIMILARITY / (2 - MIN_SIMILARITY)),
+                       math.floor(size * (2 - MIN_SIMILARITY) / MIN_SIMILARITY) + 1)
+        counts = sorted(counts, key=bound, reverse=True)
+        # Close matches are found with few trigrams scanned: look for `limit` of them
+        # first, and lower the threshold only when there are not enough
+        starts = [start for start in FUZZY_START_THRESHOLDS if start > MIN_SIMILARITY] if limit else []
+        # Words compared and titles found by a pass stay valid for the next ones
+        similarities, scores = {}, {}
+        for start in starts + [MIN_SIMILARITY]:
+            threshold = start
+            for count in counts:
+                if bound(count) < threshold:
+                    break
+                # A match shares at least `needed` trigrams, hence one of any size - needed + 1 of them
+                needed = math.ceil(threshold * (size + count) / 2 - 1e-9)
+                postings = sorted((self._trigrams[gram].get(count, ()) if gram in self._trigrams else ()
+                                   for gram in grams), key=len)
+                candidates = set().union(*postings[:size - needed + 1])
+                for word in candidates:
+                    similarity = similarities.get(word)
+                    if similarity is None:
+                        similarity = similarities[word] = 2 * len(grams & self._word_grams[word]) / (size + count)
+                    if similarity >= threshold:
+                        for key in self._words[word]:
+                            if similarity > scores.get(key, 0):
+                                scores[key] = similarity
+                if limit is not None and len(scores) >= limit:
+                    threshold = max(threshold, heapq.nlargest(limit, scores.values())[-1])
+            if limit is not None and len(scores) >= limit:
+                break
+        return {key: score for key, score in scores.items() if score >= threshold}
+
+    def _fuzzy_score(self, grams, key):
+        # Best similarity between the token trigrams and a word of the title, 0 below the minimum
+        best = 0
+        for word in self._entries[key][1]:
+            word_grams = self._word_grams[word]
+            similarity = 2 * len(grams & word_grams) / (len(grams) + len(word_grams))
+            if similarity >= MIN_SIMILARITY and similarity > best:
+                best = similarity
+        return best
+
+    def _token_matches(self, token, limit=None):
+        """
+        Scores of the titles matching one token: exact word 1.5, prefix 1.0, or
+        trigram similarity when nothing starts with the token.
+
+        With `limit`, a prefix only contributes the best titles of its node and
+        of its whole word: enough for a single-token query, ranked on these.
+        """
+        node = self._prefix_node(token)
+        if node is None or not node.keys:
+            return self._fuzzy_scores(token, limit)
+        if limit is not None and limit <= TOP_KEYS:
+            scores = {key: 1.0 for rank, key in node.top[:limit]}
+            scores.update((key, 1.5) for rank, key in node.exact_top[:limit])
+        else:
+            scores = dict.fromkeys(node.keys, 1.0)
+            scores.update(dict.fromkeys(self._words.get(token, ()), 1.5))
+        return scores
+
+    def suggest(self, query, limit=10):
+        """
+        Titles matching every query token (by prefix, or by similarity for typos).
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        self._ensure_fresh()
+        with self._lock:
+            if len(tokens) == 1:
+                scores = self._token_matches(tokens[0], limit)
+            else:
+                # Start from the prefix with the fewest titles (typos last), then
+                # score the other tokens on those titles only
+                nodes = [self._prefix_node(token) for token in tokens]
+                order = sorted(
+                    range(len(tokens)),
+                    key=lambda index: len(nodes[index].keys) if nodes[index] is not None and nodes[index].keys
+                    else math.inf
+                )
+                scores = self._token_matches(tokens[order[0]])
+                for index in order[1:]:
+                    if not scores:
+                        break
+                    node, exact = nodes[index], self._words.get(tokens[index], ())
+                    if node is None or not node.keys:
+                        grams = trigrams(tokens[index])
+                        fuzzy = {key: self._fuzzy_score(grams, key) for key in scores}
+                        scores = {key: score + fuzzy[key] for key, score in scores.items() if fuzzy[key]}
+                    else:
+                        scores = {
+                            key: score + (1.5 if key in exact else 1.0)
+                            for key, score in scores.items() if key in node.keys
+                        }
+            if not scores:
+                return []
+
+            ranked = heapq.nsmallest(
+                limit, scores, key=lambda key: (-scores[key], len(self._entries[key][0]), key)
+            )
+            return [self._entries[key][2] for key in ranked]
+
+suggest_index = SuggestIndex(max_age=settings.SUGGEST_INDEX_MAX_AGE)
@@ -0,0 +1,328 @@
+import os
+import tempfile
+import threading
+import time
+import warnings
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APITestCase
+
+from users.models import User, UserCourseProgress
+from .facets import course_facets
+from .grading import GradingPool
+from .models import Course, Module, Section, LearningPath, PathCourse
+from .search import SearchIndex, search_index
+from .suggest import suggest_index
+
+class CatalogQueryCountTests(APITestCase):
+    """
+    Course and learning path reads run a fixed number of queries, whatever the
+    number of courses, modules and sections they serialize: every test runs its
+    request again, with the same budget, after the fixtures have grown.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='lecteur', email='lecteur@example.com', password='secret')
+        cls.courses = [cls.create_course(number) for number in range(3)]
+        cls.paths = []
+        for number in range(2):
+            path = LearningPath.objects.create(
+                title=f"Parcours {number}", description="Description", slug=f"parcours-{number}",
+                skill_level='beginner', overview="Vue d'ensemble"
+            )
+            for order, course in enumerate(cls.courses):
+                PathCourse.objects.create(learning_path=path, course=course, order=order)
+            cls.paths.append(path)
+
+    @classmethod
+    def create_course(cls, number, modules=3, sections=3):
+        course = Course.objects.create(
+            title=f"Cours {number}", description="Description", language='python', level='beginner',
+            duration='2h', instructor="Instructeur", is_published=True
+        )
+        cls.create_modules(course, range(modules), sections)
+        return course
+
+    @staticmethod
+    def create_modules(course, numbers, sections):
+        for module_number in numbers:
+            module = Module.objects.create(
+                course=course, title=f"Module {module_number}", order_num=module_number, duration='30 min'
+            )
+            for section_number in range(sections):
+                Section.objects.create(
+                    module=module, title=f"Section {section_number}", type='video', content="Contenu",
+                    duration='10', order_num=section_number
+                )
+
+    def grow_fixtures(self):
+        # Three more modules of five sections on every course, and three more courses in every path
+        for course in self.courses:
+            self.create_modules(course, range(3, 6), 5)
+        for number in range(3, 6):
+            course = self.create_course(number, modules=6, sections=5)
+            for path in self.paths:
+                PathCourse.objects.create(learning_path=path, course=course, order=number)
+        LearningPath.objects.create(
+            title="Parcours 2", description="Description", slug='parcours-2',
+            skill_level='beginner', overview="Vue d'ensemble"
+        )
+
+    def get_twice(self, url, queries):
+        """
+        GET url before and after grow_fixtures(), in the same number of queries.
+        """
+        responses = []
+        for grown in (False, True):
+            if grown:
+                self.grow_fixtures()
+            with self.assertNumQueries(queries):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            responses.append(response.data)
+        return responses
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_course_list(self):
+        # Page count, then the page (ordered: no UnorderedObjectListWarning)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UnorderedObjectListWarning)
+            before, after = self.get_twice('/api/courses/courses/', 2)
+        self.assertEqual((before['count'], after['count']), (3, 6))
+
+    def test_course_detail(self):
+        # Course with its modules count, then its modules, then their sections
+        before, after = self.get_twice(f'/api/courses/courses/{self.courses[0].pk}/', 3)
+        self.assertEqual((len(before['modules']), len(after['modules'])), (3, 6))
+        self.assertEqual((len(before['modules'][0]['sections']), len(after['modules'][-1]['sections'])), (3, 5))
+
+    def test_learning_path_list(self):
+        # Page count, then the page with its aggregated counts and durations
+        before, after = self.get_twice('/api/courses/learning-paths/', 2)
+        self.assertEqual((before['count'], after['count']), (2, 3))
+
+    def test_learning_path_detail(self):
+        # Path with its courses count, then its path courses joined with their course
+        before, after = self.get_twice(f'/api/courses/learning-paths/{self.paths[0].pk}/', 2)
+        self.assertEqual((len(before['courses']), len(after['courses'])), (3, 6))
+
+class CourseSearchTests(APITestCase):
+    """
+    Searches page through the ranked ids of the index and load one page of courses.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='chercheur', email='chercheur@example.com', password='secret')
+        for number in range(12):
+            Course.objects.create(
+                title=f"Python {number}", description="Description", language='python',
+                level='advanced' if number % 2 else 'beginner', duration='2h', instructor="Instructeur",
+                is_published=True
+            )
+        for number in range(3):
+            Course.objects.create(
+                title=f"Java {number}", description="Description", language='java', level='beginner',
+                duration='2h', instructor="Instructeur", is_published=True
+            )
+
+    def setUp(self):
+        # A private index file, rebuilt from the test database
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for name, value in (('path', os.path.join(directory.name, 'index.sqlite3')),
+                            ('_local', threading.local()), ('_ready', False)):
+            patcher = mock.patch.object(search_index, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        search_index.rebuild()
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_search_loads_one_page(self):
+        # The page of courses only: the count comes from the ranking
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/courses/courses/', {'search': 'python'})
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_search_applies_language_and_level(self):
+        response = self.client.get('/api/courses/courses/', {'search': 'description', 'level': 'Advanced'})
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual({course['level'] for course in response.data['results']}, {'advanced'})
+        response = self.client.get('/api/courses/courses/', {'search': 'description', 'language': 'java'})
+        self.assertEqual([course['title'] for course in response.data['results']], ["Java 0", "Java 1", "Java 2"])
+
+    def test_search_facets_come_from_the_index(self):
+        with self.assertNumQueries(0):
+            facets = course_facets(search='description', level='beginner')
+        self.assertEqual(facets, {'language': {'python': 6, 'java': 3}, 'level': {'beginner': 9, 'advanced': 6},
+                                  'total': 9})
+
+    def test_concurrent_first_searches_build_once(self):
+        with tempfile.TemporaryDirectory() as directory:
+            index = SearchIndex(os.path.join(directory, 'index.sqlite3'))
+            builds = []
+
+            def rebuild():
+                builds.append(1)
+                time.sleep(0.05)
+
+            with mock.patch.object(index, 'rebuild', rebuild):
+                threads = [threading.Thread(target=index.ensure_built) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            self.assertEqual(len(builds), 1)
+
+    def test_module_and_section_changes_refresh_the_facets(self):
+        course = Course.objects.get(title="Java 0")
+        self.assertEqual(course_facets(search='graphes')['total'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            module = Module.objects.create(course=course, title="Graphes", order_num=0, duration='30 min')
+        self.assertEqual(course_facets(search='graphes')['language'], {'java': 1})
+        self.assertEqual(course_facets(search='dijkstra')['total'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Section.objects.create(module=module, title="Dijkstra", type='video', content="Contenu",
+                                   duration='10', order_num=0)
+        self.assertEqual(course_facets(search='dijkstra')['total'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            module.delete()
+        self.assertEqual(course_facets(search='graphes')['total'], 0)
+
+class SuggestSignalTests(TestCase):
+    """
+    Deleted courses and learning paths leave the suggest index once committed.
+    """
+
+    def test_deleted_course_is_removed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(
+                title="Rust avancé", description="Description", language='rust', level='advanced',
+                duration='2h', instructor="Instructeur", is_published=True
+            )
+        pk = course.pk
+        self.assertIn(('course', pk), suggest_index._entries)
+        with self.captureOnCommitCallbacks(execute=True):
+            course.delete()
+        self.assertNotIn(('course', pk), suggest_index._entries)
+
+    def test_deleted_learning_path_is_removed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            path = LearningPath.objects.create(
+                title="Parcours Rust", description="Description", slug='parcours-rust',
+                skill_level='advanced', overview="Vue d'ensemble"
+            )
+        pk = path.pk
+        self.assertIn(('learning_path', pk), suggest_index._entries)
+        with self.captureOnCommitCallbacks(execute=True):
+            path.delete()
+        self.assertNotIn(('learning_path', pk), suggest_index._entries)
+
+class SectionProgressRefreshTests(TestCase):
+    """
+    Adding or removing sections rescales the stored percentages of a course
+    once per transaction.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='apprenant', email='apprenant@example.com', password='secret')
+        cls.course = Course.objects.create(
+            title="Cours", description="Description", language='python', level='beginner',
+            duration='2h', instructor="Instructeur", is_published=True
+        )
+        cls.module = Module.objects.create(course=cls.course, title="Module", order_num=0, duration='30 min')
+
+    def create_sections(self, count, start=0):
+        return [
+            Section.objects.create(
+                module=self.module, title=f"Section {number}", type='video', content="Contenu",
+                duration='10', order_num=number
+            )
+            for number in range(start, start + count)
+        ]
+
+    def test_sections_added_together_refresh_once(self):
+        with mock.patch('users.progress.refresh_course_progress') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                sections = self.create_sections(5)
+            refresh.assert_called_once_with(self.course.pk)
+            refresh.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                for section in sections:
+                    section.delete()
+            refresh.assert_called_once_with(self.course.pk)
+
+    def test_refresh_survives_a_rolled_back_savepoint(self):
+        with mock.patch('users.progress.refresh_course_progress') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(ValueError):
+                    with transaction.atomic():
+                        self.create_sections(1)
+                        raise ValueError
+                self.create_sections(1, start=1)
+        refresh.assert_called_once_with(self.course.pk)
+
+    def test_percentages_are_rescaled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sections = self.create_sections(2)
+        progress = UserCourseProgress.objects.create(
+            user=self.user, course=self.course, progress_percentage=100,
+            completed_sections=bytes([1 << sections[0].slot | 1 << sections[1].slot])
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_sections(2, start=2)
+        progress.refresh_from_db()
+        self.assertEqual(progress.progress_percentage, 50)
+
+class GradingSandboxTests(SimpleTestCase):
+    """
+    Learner code cannot change the outcome of the tests it is graded against.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pool = GradingPool(size=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+        super().tearDownClass()
+
+    def test_results_follow_the_tests(self):
+        result = self.pool.run(
+            "def add(a, b):\n    return a + b",
+            [{'name': 't1', 'code': "assert add(1, 2) == 3"}, {'name': 't2', 'code': "assert add(1, 2) == 4"}]
+        )
+        self.assertEqual(result['status'], 'failed')
+        self.assertEqual([test['passed'] for test in result['tests']], [True, False])
+
+    def test_patched_json_cannot_fake_a_pass(self):
+        code = ("import json; _d=json.dumps; json.dumps=lambda o,*a,**k:_d({**o,'tests':[{**t,'passed':True,"
+                "'message':''} for t in o['tests']]},*a,**k)")
+        result = self.pool.run(code, [{'name': 't1', 'code': "assert 1 == 2"}])
+        self.assertEqual(result['status'], 'failed')
+        self.assertFalse(result['tests'][0]['passed'])
+
+    def test_forged_result_written_to_open_descriptors_is_rejected(self):
+        forged = '{"tests": [{"name": "t1", "passed": true, "message": ""}], "output": ""}'
+        code = (f"import os\nfor fd in range(3, 256):\n    try:\n        os.write(fd, {forged!r}.encode())\n"
+                "    except OSError:\n        pass")
+        result = self.pool.run(code, [{'name': 't1', 'code': "assert 1 == 2"}])
+        self.assertNotEqual(result['status'], 'passed')
+
+    def test_objects_compare_by_identity_only(self):
+        code = "class Anything:\n    def __eq__(self, other):\n        return True\nvalue = Anything()"
+        result = self.pool.run(code, [{'name': 't1', 'code': "assert value == 42"}])
+        self.assertEqual(result['status'], 'failed')
@@ -2,7 +2,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested.routers import NestedSimpleRouter
-from .views import CourseViewSet, ModuleViewSet, SectionViewSet, LearningPathViewSet
+from .views import CourseViewSet, ModuleViewSet, SectionViewSet, LearningPathViewSet, SuggestView
 
 # Main router
 router = DefaultRouter()
@@ -18,6 +18,7 @@ modules_router = NestedSimpleRouter(courses_router, r'modules', lookup='module')
 modules_router.register(r'sections', SectionViewSet, basename='module-section')
 
 urlpatterns = [
+    path('suggest/', SuggestView.as_view(), name='course-suggest'),
     path('', include(router.urls)),
     path('', include(courses_router.urls)),
     path('', include(modules_router.urls)),
@@ -1,16 +1,28 @@
 
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Course, Module, Section, LearningPath
+from rest_framework.views import APIView
+from django.db.models import Count, FilteredRelation, Prefetch, Q, Sum
+from .models import Course, Module, Section, LearningPath, PathCourse
+from .search import search_courses
+from .suggest import suggest_index
+from .facets import course_facets
+from .grading import MAX_CODE_CHARS, grade_submission
+from .quizzes import MAX_BULK_SUBMISSIONS, QuizError, answer_key, encode_answers, score, score_many
 from .serializers import (
     CourseSerializer, CourseListSerializer,
     ModuleSerializer, SectionSerializer,
     LearningPathSerializer, LearningPathListSerializer
 )
 from django.shortcuts import get_object_or_404
-from users.models import UserCourseProgress
+from users.models import User, UserCourseProgress
 from users.serializers import UserCourseProgressSerializer
+from users.progress import (
+    MAX_BULK_ITEMS, apply_progress_updates, completed_section_ids, mark_section,
+    record_quiz_results,
+)
+from users.heartbeats import heartbeat_journal
 
 class CourseViewSet(viewsets.ModelViewSet):
     """
@@ -25,7 +37,8 @@ class CourseViewSet(viewsets.ModelViewSet):
         return CourseSerializer
     
     def get_queryset(self):
-        queryset = Course.objects.filter(is_published=True)
+        # Ordered by id so that pages do not overlap or skip courses
+        queryset = Course.objects.filter(is_published=True).order_by('id')
         
         # Filter by language if provided
         language = self.request.query_params.get('language', None)
@@ -37,13 +50,49 @@ class CourseViewSet(viewsets.ModelViewSet):
         if level:
             queryset = queryset.filter(level__iexact=level)
         
-        # Search by title or description
+        # Full-text search over titles, descriptions, modules and sections, best match first
+        # (list() pages through the ranking, already restricted to the language and level)
+        self.search_ranking = None
         search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(title__icontains=search) | queryset.filter(description__icontains=search)
+        if search and self.action == 'list':
+            queryset, self.search_ranking = search_courses(
+                queryset, search, language=language or '', level=level or ''
+            )
+        
+        # Detail reads serialize the whole modules -> sections tree
+        if self.action in ('retrieve', 'update', 'partial_update'):
+            queryset = queryset.annotate(
+                modules_count=Count('modules', distinct=True)
+            ).prefetch_related('modules__sections')
         
         return queryset
     
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        if self.search_ranking is None:
+            return super().list(request, *args, **kwargs)
+        # Paginate the ranked ids, then load only that page (the filters still apply, in case
+        # the index lags behind a course change)
+        page = self.paginate_queryset(self.search_ranking)
+        ids = self.search_ranking if page is None else page
+        courses = queryset.in_bulk(ids)
+        serializer = self.get_serializer([courses[course_id] for course_id in ids if course_id in courses], many=True)
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Course counts per language and per level for the current filters and search.
+        """
+        params = request.query_params
+        return Response(course_facets(
+            search=params.get('search', ''),
+            language=params.get('language', ''),
+            level=params.get('level', '')
+        ))
+    
     @action(detail=True, methods=['get'])
     def progress(self, request, pk=None):
         """
@@ -52,35 +101,88 @@ class CourseViewSet(viewsets.ModelViewSet):
         course = self.get_object()
         try:
             progress = UserCourseProgress.objects.get(user=request.user, course=course)
-            serializer = UserCourseProgressSerializer(progress)
-            return Response(serializer.data)
+            data = UserCourseProgressSerializer(progress).data
+            data['completed_sections'] = completed_section_ids(progress)
+            return Response(data)
         except UserCourseProgress.DoesNotExist:
-            return Response({'progress_percentage': 0, 'completed': False})
+            return Response({'progress_percentage': 0, 'completed': False, 'completed_sections': []})
+    
+    @action(detail=True, methods=['post'])
+    def heartbeat(self, request, pk=None):
+        """
+        Learning-time ping sent by the player while a section of this course is open.
+        
+        Body: {"seconds": <time since the previous ping>}. One query checks that the
+        course exists; the time is journaled and added to the user's total_learning_time
+        by a periodic flush.
+        """
+        self.get_object()
+        try:
+            seconds = int(request.data.get('seconds', 0))
+        except (TypeError, ValueError):
+            return Response({'error': 'seconds doit être un entier'}, status=status.HTTP_400_BAD_REQUEST)
+        credited = heartbeat_journal.record(request.user.pk, seconds)
+        return Response({'credited_seconds': credited})
+    
+    @action(detail=True, methods=['post'])
+    def complete_section(self, request, pk=None):
+        """
+        Mark one section of this course as done (or not done with "completed": false).
+        
+        The course progress percentage and completion are derived from the completed sections.
+        """
+        try:
+            section_id = int(request.data.get('section_id'))
+        except (TypeError, ValueError):
+            return Response({'error': 'section_id est requis'}, status=status.HTTP_400_BAD_REQUEST)
+        section = get_object_or_404(
+            Section.objects.select_related('module__course'),
+            pk=section_id, module__course_id=pk, module__course__is_published=True
+        )
+        done = request.data.get('completed', True) not in (False, 'false', '0', 0)
+        
+        progress = mark_section(request.user, section, done)
+        data = UserCourseProgressSerializer(progress).data
+        data['completed_sections'] = completed_section_ids(progress)
+        return Response(data)
     
     @action(detail=True, methods=['post'])
     def update_progress(self, request, pk=None):
         """
         Update the current user's progress for this course.
+        
+        Body: {"progress_percentage", "completed", "timestamp"}, one item of
+        bulk_update_progress: the change is stored with the client's timestamp and only
+        applied when newer than the stored one, so online updates and queued offline
+        updates are ordered by the same clocks. Returns the stored progress.
         """
         course = self.get_object()
-        progress, created = UserCourseProgress.objects.get_or_create(
-            user=request.user, 
-            course=course
-        )
-        
-        # Update the progress percentage if provided
-        percentage = request.data.get('progress_percentage', None)
-        if percentage is not None:
-            progress.progress_percentage = int(percentage)
-            
-        # Update the completed status if provided
-        completed = request.data.get('completed', None)
-        if completed is not None:
-            progress.completed = completed
-        
-        progress.save()
+        item = {
+            field: request.data[field]
+            for field in ('progress_percentage', 'completed', 'timestamp') if field in request.data
+        }
+        result, = apply_progress_updates(request.user, [{**item, 'course': course.pk}])
+        if result['status'] == 'error':
+            return Response(result['errors'], status=status.HTTP_400_BAD_REQUEST)
+        progress = UserCourseProgress.objects.get(user=request.user, course=course)
         serializer = UserCourseProgressSerializer(progress)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_update_progress(self, request):
+        """
+        Apply many progress updates of the current user at once.
+        
+        Body: {"items": [{"course", "progress_percentage", "completed", "timestamp"}, ...]}.
+        The newest timestamp wins per course; the response holds one result per item.
+        """
+        items = request.data.get('items')
+        if not isinstance(items, list):
+            return Response({'error': 'items doit être une liste'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BULK_ITEMS:
+            return Response({'error': f'{MAX_BULK_ITEMS} éléments au maximum par requête'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': apply_progress_updates(request.user, items)})
 
 class ModuleViewSet(viewsets.ModelViewSet):
     """
@@ -91,7 +193,7 @@ class ModuleViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         course_id = self.kwargs.get('course_pk')
-        return Module.objects.filter(course_id=course_id)
+        return Module.objects.filter(course_id=course_id).prefetch_related('sections')
 
 class SectionViewSet(viewsets.ModelViewSet):
     """
@@ -102,7 +204,99 @@ class SectionViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         module_id = self.kwargs.get('module_pk')
-        return Section.objects.filter(module_id=module_id)
+        return Section.objects.filter(module_id=module_id).select_related('module__course')
+    
+    @action(detail=True, methods=['post'])
+    def submit(self, request, course_pk=None, module_pk=None, pk=None):
+        """
+        Grade the learner's answer for an exercise or quiz section.
+        
+        Exercises: `code` is run against the section's tests; messages of
+        hidden tests are not returned. Quizzes: `answers` maps question ids
+        to a choice index (or a list of indexes) and the score is stored.
+        The section is marked as completed when every test passes or the
+        quiz is passed.
+        """
+        section = self.get_object()
+        if section.type == 'quiz':
+            return self._submit_quiz(request, section)
+        if section.type != 'exercise':
+            return Response({'error': "Cette section n'est pas un exercice"}, status=status.HTTP_400_BAD_REQUEST)
+        code = request.data.get('code')
+        if not isinstance(code, str) or not code.strip():
+            return Response({'error': 'code est requis'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(code) > MAX_CODE_CHARS:
+            return Response({'error': f'{MAX_CODE_CHARS} caractères au maximum'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        result = grade_submission(section, code)
+        if result['total'] and result['status'] == 'passed':
+            mark_section(request.user, section)
+        result['tests'] = [
+            {**test, 'message': ''} if test.get('hidden') else test
+            for test in result['tests']
+        ]
+        return Response(result)
+    
+    def _submit_quiz(self, request, section):
+        try:
+            key = answer_key(section)
+            result = score(key, request.data.get('answers'))
+        except QuizError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        record_quiz_results(section, {request.user.pk: (result['score'], result['passed'])}, key.total)
+        return Response(result)
+    
+    @action(detail=True, methods=['post'])
+    def score_quiz(self, request, course_pk=None, module_pk=None, pk=None):
+        """
+        Score the answer sheets of a whole class for a quiz section (admin only).
+        
+        Body: {"submissions": [{"user": id, "answers": {...}}, ...]}. Returns
+        one result per submission, in order; valid ones are stored in batches.
+        """
+        if not request.user.is_admin:
+            return Response({"error": "Permission refusée"}, status=status.HTTP_403_FORBIDDEN)
+        section = self.get_object()
+        if section.type != 'quiz':
+            return Response({'error': "Cette section n'est pas un quiz"}, status=status.HTTP_400_BAD_REQUEST)
+        submissions = request.data.get('submissions')
+        if not isinstance(submissions, list) or not submissions:
+            return Response({'error': 'submissions doit être une liste non vide'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(submissions) > MAX_BULK_SUBMISSIONS:
+            return Response({'error': f'{MAX_BULK_SUBMISSIONS} soumissions au maximum par requête'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            key = answer_key(section)
+        except QuizError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = [None] * len(submissions)
+        user_ids, sheets = [], []
+        for index, submission in enumerate(submissions):
+            user_id = submission.get('user') if isinstance(submission, dict) else None
+            try:
+                if not isinstance(user_id, int) or isinstance(user_id, bool):
+                    raise QuizError('user est requis')
+                sheets.append(encode_answers(key, submission.get('answers')))
+            except QuizError as exc:
+                results[index] = {'user': user_id, 'status': 'error', 'error': str(exc)}
+                continue
+            user_ids.append((index, user_id))
+        
+        known = set(User.objects.filter(pk__in=[user_id for index, user_id in user_ids]).values_list('pk', flat=True))
+        scores = {}
+        for (index, user_id), (points, passed) in zip(user_ids, score_many(key, sheets)):
+            if user_id not in known:
+                results[index] = {'user': user_id, 'status': 'error', 'error': 'Utilisateur introuvable'}
+                continue
+            # The last sheet of a user in the request is the one stored
+            scores[user_id] = (points, passed)
+            results[index] = {'user': user_id, 'status': 'scored', 'score': points,
+                              'max_score': key.total, 'passed': passed}
+        record_quiz_results(section, scores, key.total)
+        return Response({'results': results})
 
 class LearningPathViewSet(viewsets.ModelViewSet):
     """
@@ -116,6 +310,26 @@ class LearningPathViewSet(viewsets.ModelViewSet):
             return LearningPathListSerializer
         return LearningPathSerializer
     
+    def get_queryset(self):
+        queryset = LearningPath.objects.all()
+        
+        # Listings get counts and summed durations from one aggregated query
+        if self.action == 'list':
+            queryset = queryset.annotate(
+                courses_count=Count('courses', distinct=True),
+                total_duration_minutes=Sum('courses__duration_minutes'),
+            ).order_by('id')
+        
+        # Detail reads serialize every path course with its course details
+        if self.action in ('retrieve', 'update', 'partial_update'):
+            queryset = queryset.annotate(
+                courses_count=Count('courses', distinct=True)
+            ).prefetch_related(
+                Prefetch('pathcourse_set', queryset=PathCourse.objects.select_related('course'))
+            )
+        
+        return queryset
+    
     @action(detail=True, methods=['get'])
     def courses(self, request, pk=None):
         """
@@ -126,35 +340,84 @@ class LearningPathViewSet(viewsets.ModelViewSet):
         serializer = CourseListSerializer(courses, many=True)
         return Response(serializer.data)
     
+    def _path_courses_with_progress(self, user):
+        """
+        Published path courses joined with the user's progress, as flat rows.
+        """
+        return PathCourse.objects.filter(
+            course__is_published=True
+        ).annotate(
+            user_progress=FilteredRelation(
+                'course__user_progresses',
+                condition=Q(course__user_progresses__user=user)
+            )
+        ).values(
+            'learning_path_id', 'learning_path__title', 'course_id', 'course__title',
+            'user_progress__progress_percentage', 'user_progress__completed'
+        ).order_by('learning_path_id', 'order')
+    
+    @staticmethod
+    def _progress_summary(rows):
+        courses_progress = [{
+            'course_id': row['course_id'],
+            'course_title': row['course__title'],
+            'progress_percentage': row['user_progress__progress_percentage'] or 0,
+            'completed': bool(row['user_progress__completed'])
+        } for row in rows]
+        
+        # Calculate average progress for all courses
+        total_progress = sum(course['progress_percentage'] for course in courses_progress)
+        avg_progress = total_progress // len(courses_progress) if courses_progress else 0
+        
+        return {
+            'courses_progress': courses_progress,
+            'total_progress': avg_progress
+        }
+    
     @action(detail=True, methods=['get'])
     def progress(self, request, pk=None):
         """
         Get the current user's progress for all courses in this learning path.
         """
         path = self.get_object()
-        courses = path.courses.filter(is_published=True)
-        
-        progress_data = []
-        total_progress = 0
-        
-        for course in courses:
-            try:
-                progress = UserCourseProgress.objects.get(user=request.user, course=course)
-                total_progress += progress.progress_percentage
-            except UserCourseProgress.DoesNotExist:
-                progress = None
-            
-            progress_data.append({
-                'course_id': course.id,
-                'course_title': course.title,
-                'progress_percentage': progress.progress_percentage if progress else 0,
-                'completed': progress.completed if progress else False
-            })
+        rows = self._path_courses_with_progress(request.user).filter(learning_path=path)
+        return Response(self._progress_summary(rows))
+    
+    @action(detail=False, methods=['get'])
+    def progress_overview(self, request):
+        """
+        Get the current user's progress for every learning path they have started.
+        """
+        started_paths = PathCourse.objects.filter(
+            course__user_progresses__user=request.user
+        ).values('learning_path_id')
+        rows = self._path_courses_with_progress(request.user).filter(
+            learning_path_id__in=started_paths
+        )
         
-        # Calculate average progress for all courses
-        avg_progress = total_progress // len(courses) if courses else 0
+        paths = {}
+        for row in rows:
+            paths.setdefault(row['learning_path_id'], []).append(row)
         
-        return Response({
-            'courses_progress': progress_data,
-            'total_progress': avg_progress
-        })
+        return Response([
+            {
+                'learning_path_id': path_id,
+                'learning_path_title': path_rows[0]['learning_path__title'],
+                **self._progress_summary(path_rows)
+            }
+            for path_id, path_rows in paths.items()
+        ])
+
+class SuggestView(APIView):
+    """
+    API endpoint autocompleting course and learning path titles for the search box.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 50)
+        except ValueError:
+            limit = 10
+        return Response(suggest_index.suggest(query, limit=limit))
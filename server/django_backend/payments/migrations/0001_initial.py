@@ -0,0 +1,63 @@
+# Generated by Django 4.2 on 2026-10-18 12:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Montant')),
+                ('currency', models.CharField(default='EUR', max_length=3, verbose_name='Devise')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('completed', 'Terminé'), ('failed', 'Échoué'), ('refunded', 'Remboursé')], default='pending', max_length=20, verbose_name='Statut')),
+                ('payment_method', models.CharField(choices=[('card', 'Carte bancaire'), ('orange', 'Orange Money'), ('airtel', 'Airtel Money'), ('telma', 'Mvola (Telma)')], max_length=20, verbose_name='Méthode de paiement')),
+                ('transaction_id', models.CharField(blank=True, max_length=100, null=True, verbose_name='ID de transaction')),
+                ('payment_date', models.DateTimeField(auto_now_add=True, verbose_name='Date de paiement')),
+            ],
+            options={
+                'verbose_name': 'Paiement',
+                'verbose_name_plural': 'Paiements',
+            },
+        ),
+        migrations.CreateModel(
+            name='SubscriptionPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nom')),
+                ('description', models.TextField(verbose_name='Description')),
+                ('price_monthly', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Prix mensuel')),
+                ('price_annual', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Prix annuel')),
+                ('features', models.JSONField(verbose_name='Fonctionnalités')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Actif')),
+            ],
+            options={
+                'verbose_name': "Plan d'abonnement",
+                'verbose_name_plural': "Plans d'abonnement",
+            },
+        ),
+        migrations.CreateModel(
+            name='Subscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateTimeField(verbose_name='Date de début')),
+                ('end_date', models.DateTimeField(verbose_name='Date de fin')),
+                ('status', models.CharField(choices=[('active', 'Actif'), ('expired', 'Expiré'), ('cancelled', 'Annulé')], default='active', max_length=20, verbose_name='Statut')),
+                ('auto_renew', models.BooleanField(default=True, verbose_name='Renouvellement automatique')),
+                ('payment', models.OneToOneField(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subscription', to='payments.payment', verbose_name='Paiement')),
+                ('plan', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subscriptions', to='payments.subscriptionplan', verbose_name='Plan')),
+            ],
+            options={
+                'verbose_name': 'Abonnement',
+                'verbose_name_plural': 'Abonnements',
+            },
+        ),
+    ]
@@ -55,6 +55,10 @@ class Payment(models.Model):
     class Meta:
         verbose_name = "Paiement"
         verbose_name_plural = "Paiements"
+        indexes = [
+            # Historique des paiements paginé par curseur (PaymentPagination)
+            models.Index(fields=['user', 'payment_date', 'id'], name='payment_user_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.plan.name if self.plan else 'Plan supprimé'} - {self.amount} {self.currency}"
@@ -80,6 +84,9 @@ class Subscription(models.Model):
     class Meta:
         verbose_name = "Abonnement"
         verbose_name_plural = "Abonnements"
+        indexes = [
+            models.Index(fields=['user', 'start_date', 'id'], name='subscription_user_start_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.plan.name if self.plan else 'Plan supprimé'} - {self.status}"
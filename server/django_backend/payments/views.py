@@ -5,6 +5,15 @@ from rest_framework.response import Response
 from .models import SubscriptionPlan, Payment, Subscription
 from .serializers import SubscriptionPlanSerializer, PaymentSerializer, SubscriptionSerializer
 from datetime import datetime, timedelta
+from codelearn.pagination import PaymentPagination, SubscriptionPagination
+from codelearn.exports import export_response, parse_export_params
+
+class IsAdminUser(permissions.BasePermission):
+    """
+    Permission pour les administrateurs uniquement.
+    """
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.is_admin
 
 class SubscriptionPlanViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -20,13 +29,43 @@ class PaymentViewSet(viewsets.ModelViewSet):
     """
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PaymentPagination
     
     def get_queryset(self):
-        return Payment.objects.filter(user=self.request.user).order_by('-payment_date')
+        return Payment.objects.filter(user=self.request.user).select_related('plan').order_by('-payment_date', '-id')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Stream the payments of all users as CSV or NDJSON (admin only).
+        
+        Filters: user_id, plan_id, status, payment_method, since/until (payment date).
+        """
+        try:
+            export_format, conditions = parse_export_params(
+                request.query_params, 'payment_date',
+                {'user_id': 'user_id', 'plan_id': 'plan_id', 'status': 'status', 'payment_method': 'payment_method'},
+            )
+            queryset = Payment.objects.filter(**conditions)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return export_response(queryset, [
+            ('id', 'id'),
+            ('user_id', 'user_id'),
+            ('user_email', 'user__email'),
+            ('plan', 'plan__name'),
+            ('amount', 'amount'),
+            ('currency', 'currency'),
+            ('status', 'status'),
+            ('payment_method', 'payment_method'),
+            ('transaction_id', 'transaction_id'),
+            ('payment_date', 'payment_date'),
+        ], export_format, 'payments')
+    
     @action(detail=True, methods=['post'])
     def process_mobile_payment(self, request, pk=None):
         """
@@ -58,7 +97,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
             
             # Update user's premium status
             request.user.is_premium = True
-            request.user.save()
+            request.user.save(update_fields=['is_premium'])
         
         return Response({'status': 'success', 'message': 'Paiement traité avec succès'})
 
@@ -68,9 +107,10 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
     """
     serializer_class = SubscriptionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SubscriptionPagination
     
     def get_queryset(self):
-        return Subscription.objects.filter(user=self.request.user).order_by('-start_date')
+        return Subscription.objects.filter(user=self.request.user).select_related('plan', 'payment').order_by('-start_date', '-id')
     
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
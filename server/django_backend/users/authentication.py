@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+SHARED_KEY_PREFIX = 'auth:token:'
+SHARED_USER_PREFIX = 'auth:user-token:'
+
+def _setting(name, default):
+    return getattr(settings, 'TOKEN_AUTH_CACHE', {}).get(name, default)
+
+def freeze_credentials(user, token):
+    """
+    Column values of the user and token, as cached.
+
+    Attributes set on the instances after loading (post_init snapshots such as
+    _stats_is_premium, related object caches) are left out: they would be
+    stale by the time another request reads the entry.
+    """
+    return (
+        {field.attname: getattr(user, field.attname) for field in user._meta.concrete_fields},
+        {field.attname: getattr(token, field.attname) for field in token._meta.concrete_fields},
+    )
+
+def thaw_credentials(frozen):
+    """
+    Fresh (user, token) instances built from cached column values, as if just
+    loaded from the database (post_init runs again).
+    """
+    user_values, token_values = frozen
+    user = get_user_model().from_db(DEFAULT_DB_ALIAS, list(user_values), list(user_values.values()))
+    token = Token.from_db(DEFAULT_DB_ALIAS, list(token_values), list(token_values.values()))
+    token.user = user
+    return user, token
+
+class LocalTokenCache:
+    """
+    Per-process LRU of token key -> frozen credentials, with a short TTL.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            credentials, user_id, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return credentials
+
+    def set(self, key, user_id, credentials):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (credentials, user_id, time.monotonic() + self.ttl)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            user_id = entry[1]
+            keys = self._keys_by_user.get(user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[user_id]
+
+    def invalidate(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._pop(key)
+
+local_tokens = LocalTokenCache(
+    maxsize=_setting('LOCAL_MAXSIZE', 10000),
+    ttl=_setting('LOCAL_TTL', 30),
+)
+
+def invalidate_token(key):
+    """
+    Forget a token in this process and in the shared cache.
+    """
+    local_tokens.invalidate(key)
+    cache.delete(SHARED_KEY_PREFIX + key)
+
+def invalidate_user_tokens(user_id):
+    """
+    Forget the cached credentials of a user (after logout or a profile change).
+
+    Other processes drop their local copy when its LOCAL_TTL expires.
+    """
+    invalidate_users_tokens([user_id])
+
+def invalidate_users_tokens(user_ids):
+    """
+    invalidate_user_tokens for many users, with one cache read and one delete.
+
+    Needed after queryset.update() on users (counters), which sends no post_save.
+    """
+    for user_id in user_ids:
+        local_tokens.invalidate_user(user_id)
+    user_keys = [SHARED_USER_PREFIX + str(user_id) for user_id in user_ids]
+    keys = cache.get_many(user_keys)
+    if keys:
+        cache.delete_many([SHARED_KEY_PREFIX + key for key in keys.values()] + list(keys))
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that skips the Token + User query on cache hits.
+
+    Lookups go through a per-process LRU, then the shared Django cache, and
+    only then the database.
+    """
+
+    def authenticate_credentials(self, key):
+        frozen = local_tokens.get(key)
+        if frozen is None:
+            frozen = cache.get(SHARED_KEY_PREFIX + key)
+            if frozen is None:
+                user, token = super().authenticate_credentials(key)
+                frozen = freeze_credentials(user, token)
+                cache.set_many({
+                    SHARED_KEY_PREFIX + key: frozen,
+                    SHARED_USER_PREFIX + str(user.pk): key,
+                }, _setting('SHARED_TTL', 300))
+            local_tokens.set(key, frozen[1]['user_id'], frozen)
+
+        # New instances on every request: views may modify request.user freely
+        return thaw_credentials(frozen)
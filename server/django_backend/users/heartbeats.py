@@ -0,0 +1,183 @@
+"""
+Learning-time heartbeats.
+
+The course player pings every few seconds while a section is open. Pings
+are not written to the main database one by one: they are coalesced into
+one pending row per user in a local SQLite journal (shared by the worker
+processes of a host, like the search index), and a periodic flush adds the
+accumulated whole minutes to User.total_learning_time with one
+F()-expression UPDATE per distinct amount. Since pending time is on disk,
+a worker restart loses nothing; the next flush (from any worker, or
+`manage.py flush_heartbeats`) picks it up. Only a process killed during a
+flush, between the journal and the database writes, drops the minutes that
+flush had taken.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .authentication import invalidate_users_tokens
+
+logger = logging.getLogger(__name__)
+
+class HeartbeatJournal:
+    """
+    Pending learning seconds per user, flushed into User.total_learning_time.
+    """
+
+    def __init__(self, path, flush_interval=60, max_seconds=120):
+        self.path = str(path)
+        self.flush_interval = flush_interval
+        self.max_seconds = max_seconds
+        self._local = threading.local()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pending (
+                    user_id INTEGER PRIMARY KEY,
+                    seconds INTEGER NOT NULL,
+                    last_ping REAL
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(pending)")}
+            if 'last_ping' not in columns:
+                # Journal written before pings were timed
+                conn.execute("ALTER TABLE pending ADD COLUMN last_ping REAL")
+            self._local.conn = conn
+        return conn
+
+    def record(self, user_id, seconds):
+        """
+        Add the time elapsed since the previous ping; returns the seconds credited.
+
+        The client's `seconds` is only an upper bound: a ping credits at most the
+        wall-clock time since the user's previous ping (and max_seconds), so
+        pinging in a loop gains nothing. The first ping of a user starts the
+        clock and credits nothing. Up to max_seconds of unclaimed time carries
+        over, so rounding and network jitter do not lose seconds.
+        """
+        now = time.time()
+        seconds = max(0, min(int(seconds), self.max_seconds))
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT last_ping FROM pending WHERE user_id = ?", (user_id,)).fetchone()
+            if row is None or row[0] is None:
+                credited, last_ping = 0, now
+            else:
+                # Time not yet credited, at most max_seconds of it
+                since = max(row[0], now - self.max_seconds)
+                credited = max(0, min(seconds, int(now - since)))
+                last_ping = since + credited
+            conn.execute(
+                "INSERT INTO pending (user_id, seconds, last_ping) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET seconds = seconds + excluded.seconds, "
+                "last_ping = excluded.last_ping",
+                (user_id, credited, last_ping)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush_in_background()
+        return credited
+
+    def _flush_in_background(self):
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        self._last_flush = time.monotonic()
+
+        def run():
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Learning time flush failed")
+            finally:
+                close_old_connections()
+                self._flush_lock.release()
+
+        threading.Thread(target=run, name='heartbeat-flush', daemon=True).start()
+
+    def flush(self):
+        """
+        Move every pending whole minute into User.total_learning_time.
+
+        The minutes are first taken out of the journal in one short SQLite
+        transaction, so pings are not blocked while the database is written;
+        concurrent flushes cannot take the same seconds twice. If the database
+        update fails, the minutes are given back to the journal. Leftover
+        seconds (under a minute) stay pending. Returns the number of users
+        credited.
+        """
+        from .models import User
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT user_id, seconds FROM pending WHERE seconds >= 60").fetchall()
+            conn.executemany(
+                "UPDATE pending SET seconds = seconds % 60 WHERE user_id = ?",
+                [(user_id,) for user_id, seconds in rows]
+            )
+            # Users idle for longer than max_seconds start a new session on their next ping
+            conn.execute("DELETE FROM pending WHERE seconds = 0 AND last_ping < ?", (time.time() - self.max_seconds,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._last_flush = time.monotonic()
+        if not rows:
+            return 0
+
+        by_minutes = defaultdict(list)
+        for user_id, seconds in rows:
+            by_minutes[seconds // 60].append(user_id)
+        try:
+            with transaction.atomic():
+                for minutes, user_ids in by_minutes.items():
+                    User.objects.filter(pk__in=user_ids).update(
+                        total_learning_time=F('total_learning_time') + minutes
+                    )
+        except BaseException:
+            self._restore(rows)
+            raise
+        # The UPDATEs send no post_save: drop the cached copies of these users
+        credited = [user_id for user_id, seconds in rows]
+        transaction.on_commit(lambda: invalidate_users_tokens(credited))
+        return len(rows)
+
+    def _restore(self, rows):
+        # Give back the whole minutes taken by a flush whose database update failed
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO pending (user_id, seconds) VALUES (?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET seconds = seconds + excluded.seconds",
+                [(user_id, seconds - seconds % 60) for user_id, seconds in rows]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+heartbeat_journal = HeartbeatJournal(
+    settings.HEARTBEAT_JOURNAL_PATH,
+    flush_interval=settings.HEARTBEAT_FLUSH_INTERVAL,
+    max_seconds=settings.HEARTBEAT_MAX_SECONDS,
+)
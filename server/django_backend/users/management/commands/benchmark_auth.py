@@ -0,0 +1,73 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.client import RequestFactory
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+
+from users.authentication import CachedTokenAuthentication, invalidate_token
+from users.models import User
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = ("Load test token authentication: database round trips and latency per request, "
+            "uncached TokenAuthentication against CachedTokenAuthentication.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help="comptes de test (supprimés à la fin)")
+        parser.add_argument('--requests', type=int, default=5000, help="requêtes authentifiées par mesure")
+
+    def handle(self, *args, **options):
+        # The test accounts only live inside this transaction
+        try:
+            with transaction.atomic():
+                self._run(options['users'], options['requests'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, user_count, request_count):
+        users = User.objects.bulk_create(
+            User(username=f'benchmark-auth-{number}', email=f'benchmark-auth-{number}@example.com')
+            for number in range(user_count)
+        )
+        if users[0].pk is None:
+            # Backends without RETURNING (MySQL): read the keys back
+            users = list(User.objects.filter(username__startswith='benchmark-auth-'))
+        keys = [token.key for token in Token.objects.bulk_create(
+            Token(key=Token.generate_key(), user=user) for user in users
+        )]
+        random.seed(0)
+        # Requests spread over the users, as concurrent sessions would be
+        sequence = [random.choice(keys) for _ in range(request_count)]
+        factory = RequestFactory()
+
+        for label, authentication in (('base', TokenAuthentication()), ('cache', CachedTokenAuthentication())):
+            for key in keys:
+                invalidate_token(key)
+            latencies, queries = [], []
+
+            def count(execute, sql, params, many, context):
+                queries.append(sql)
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count):
+                for key in sequence:
+                    request = Request(factory.get('/', HTTP_AUTHORIZATION=f'Token {key}'))
+                    started = time.perf_counter()
+                    authentication.authenticate(request)
+                    latencies.append((time.perf_counter() - started) * 1000)
+            latencies.sort()
+            self.stdout.write(
+                f"{label:6} {request_count} requêtes, {user_count} jetons : "
+                f"{len(queries) / request_count:.3f} requête(s) SQL par requête, "
+                f"médiane {statistics.median(latencies):.3f} ms, p95 {latencies[int(len(latencies) * 0.95) - 1]:.3f} ms"
+            )
+        for key in keys:
+            invalidate_token(key)
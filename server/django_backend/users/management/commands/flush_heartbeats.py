@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from users.heartbeats import heartbeat_journal
+
+class Command(BaseCommand):
+    help = "Add the journaled learning-time heartbeats to the users' total learning time."
+
+    def handle(self, *args, **options):
+        count = heartbeat_journal.flush()
+        self.stdout.write(self.style.SUCCESS(f"Temps d'apprentissage crédité pour {count} utilisateurs."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from users.stats import reconcile
+
+class Command(BaseCommand):
+    help = "Recount the admin dashboard statistics from the source tables."
+
+    def handle(self, *args, **options):
+        counts = reconcile()
+        for name, value in counts.items():
+            self.stdout.write(f"{name}: {value}")
+        self.stdout.write(self.style.SUCCESS("Statistiques du tableau de bord recalculées."))
@@ -0,0 +1,68 @@
+# Generated by Django 4.2 on 2026-10-18 12:43
+
+from django.conf import settings
+import django.contrib.auth.models
+import django.contrib.auth.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('username', models.CharField(error_messages={'unique': 'A user with that username already exists.'}, help_text='Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.', max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator()], verbose_name='username')),
+                ('first_name', models.CharField(blank=True, max_length=150, verbose_name='first name')),
+                ('last_name', models.CharField(blank=True, max_length=150, verbose_name='last name')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+                ('email', models.EmailField(max_length=254, unique=True, verbose_name='Adresse e-mail')),
+                ('bio', models.TextField(blank=True, verbose_name='Biographie')),
+                ('profile_picture', models.ImageField(blank=True, null=True, upload_to='profile_pictures/', verbose_name='Photo de profil')),
+                ('date_joined', models.DateTimeField(auto_now_add=True, verbose_name="Date d'inscription")),
+                ('is_premium', models.BooleanField(default=False, verbose_name='Utilisateur premium')),
+                ('is_admin', models.BooleanField(default=False, verbose_name='Administrateur')),
+                ('language_preference', models.CharField(default='fr', max_length=10, verbose_name='Langue préférée')),
+                ('total_learning_time', models.PositiveIntegerField(default=0, verbose_name="Temps total d'apprentissage (minutes)")),
+                ('courses_completed', models.PositiveIntegerField(default=0, verbose_name='Cours terminés')),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
+            ],
+            options={
+                'verbose_name': 'Utilisateur',
+                'verbose_name_plural': 'Utilisateurs',
+            },
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserCourseProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('progress_percentage', models.PositiveIntegerField(default=0, verbose_name='Pourcentage de progression')),
+                ('last_accessed', models.DateTimeField(auto_now=True, verbose_name='Dernier accès')),
+                ('completed', models.BooleanField(default=False, verbose_name='Terminé')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_progresses', to='courses.course', verbose_name='Cours')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_progresses', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Progression de cours',
+                'verbose_name_plural': 'Progressions de cours',
+                'unique_together': {('user', 'course')},
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+def fill_dashboard_counters(apps, schema_editor):
+    # Compter une première fois les données existantes ; les signaux prennent le relais ensuite
+    # (même calcul que users.stats.reconcile, sur les modèles historiques)
+    User = apps.get_model('users', 'User')
+    DashboardCounter = apps.get_model('users', 'DashboardCounter')
+    DailyCounter = apps.get_model('users', 'DailyCounter')
+    Course = apps.get_model('courses', 'Course')
+    Certificate = apps.get_model('certificates', 'Certificate')
+    Subscription = apps.get_model('payments', 'Subscription')
+
+    totals = {
+        'total_users': User.objects.count(),
+        'premium_users': User.objects.filter(is_premium=True).count(),
+        'total_courses': Course.objects.count(),
+        'total_certificates': Certificate.objects.count(),
+        'active_subscriptions': Subscription.objects.filter(status='active').count(),
+    }
+    DashboardCounter.objects.bulk_create([
+        DashboardCounter(name=name, value=value) for name, value in totals.items()
+    ])
+
+    # Les 30 derniers jours des compteurs journaliers
+    first_day = timezone.localdate() - timedelta(days=29)
+    for name, Model, field in (('signups', User, 'date_joined'), ('certificates_issued', Certificate, 'issue_date')):
+        counts = (
+            Model.objects.filter(**{f'{field}__date__gte': first_day})
+            .annotate(day=TruncDate(field))
+            .values('day')
+            .annotate(count=Count('id'))
+            .values_list('day', 'count')
+        )
+        DailyCounter.objects.bulk_create([
+            DailyCounter(name=name, day=day, value=count) for day, count in counts
+        ])
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '0002_create_default_admin'),
+        ('courses', '0001_initial'),
+        ('certificates', '0002_initial'),
+        ('payments', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='date_joined',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Date d'inscription"),
+        ),
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Nom')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Valeur')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Mis à jour le')),
+            ],
+            options={
+                'verbose_name': 'Compteur du tableau de bord',
+                'verbose_name_plural': 'Compteurs du tableau de bord',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Nom')),
+                ('day', models.DateField(verbose_name='Jour')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Valeur')),
+            ],
+            options={
+                'verbose_name': 'Compteur journalier',
+                'verbose_name_plural': 'Compteurs journaliers',
+                'unique_together': {('name', 'day')},
+            },
+        ),
+        migrations.RunPython(fill_dashboard_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,13 @@
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '0003_dashboard_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usercourseprogress',
+            index=models.Index(fields=['user', 'id'], name='progress_user_id_idx'),
+        ),
+    ]
@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '0004_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercourseprogress',
+            name='updated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Mis à jour le'),
+        ),
+    ]
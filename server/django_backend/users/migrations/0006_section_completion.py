@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '0005_progress_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercourseprogress',
+            name='completed_sections',
+            field=models.BinaryField(default=b'', verbose_name='Sections terminées'),
+        ),
+    ]
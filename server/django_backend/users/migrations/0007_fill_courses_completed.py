@@ -0,0 +1,23 @@
+from django.db import migrations
+from django.db.models import Count
+
+def fill_courses_completed(apps, schema_editor):
+    # Le compteur n'était jamais mis à jour : le recalculer une fois, les signaux prennent le relais
+    User = apps.get_model('users', 'User')
+    UserCourseProgress = apps.get_model('users', 'UserCourseProgress')
+    counts = (
+        UserCourseProgress.objects.filter(completed=True)
+        .values('user_id').annotate(total=Count('id')).values_list('user_id', 'total')
+    )
+    User.objects.update(courses_completed=0)
+    for user_id, total in counts.iterator():
+        User.objects.filter(pk=user_id).update(courses_completed=total)
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '0006_section_completion'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_courses_completed, migrations.RunPython.noop),
+    ]
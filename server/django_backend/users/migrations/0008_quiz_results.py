@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('courses', '0004_exercise_tests'),
+        ('users', '0007_fill_courses_completed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField(verbose_name='Score')),
+                ('max_score', models.PositiveIntegerField(verbose_name='Score maximal')),
+                ('passed', models.BooleanField(default=False, verbose_name='Réussi')),
+                ('attempts', models.PositiveIntegerField(default=1, verbose_name='Tentatives')),
+                ('submitted_at', models.DateTimeField(verbose_name='Soumis le')),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_results', to='courses.section', verbose_name='Section')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_results', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Résultat de quiz',
+                'verbose_name_plural': 'Résultats de quiz',
+                'unique_together': {('user', 'section')},
+            },
+        ),
+    ]
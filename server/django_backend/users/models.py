@@ -9,7 +9,7 @@ class User(AbstractUser):
     email = models.EmailField(unique=True, verbose_name="Adresse e-mail")
     bio = models.TextField(blank=True, verbose_name="Biographie")
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True, verbose_name="Photo de profil")
-    date_joined = models.DateTimeField(auto_now_add=True, verbose_name="Date d'inscription")
+    date_joined = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Date d'inscription")
     is_premium = models.BooleanField(default=False, verbose_name="Utilisateur premium")
     is_admin = models.BooleanField(default=False, verbose_name="Administrateur")
     
@@ -39,11 +39,70 @@ class UserCourseProgress(models.Model):
     progress_percentage = models.PositiveIntegerField(default=0, verbose_name="Pourcentage de progression")
     last_accessed = models.DateTimeField(auto_now=True, verbose_name="Dernier accès")
     completed = models.BooleanField(default=False, verbose_name="Terminé")
+    # Moment de la mise à jour côté client : la plus récente l'emporte lors d'un rejeu hors ligne
+    updated_at = models.DateTimeField(null=True, blank=True, verbose_name="Mis à jour le")
+    # Bitset des sections terminées, indexé par Section.slot (voir courses/completion.py)
+    completed_sections = models.BinaryField(default=b'', editable=False, verbose_name="Sections terminées")
     
     class Meta:
         verbose_name = "Progression de cours"
         verbose_name_plural = "Progressions de cours"
         unique_together = ['user', 'course']
+        indexes = [
+            # Pagination par curseur (ProgressPagination) filtrée par utilisateur
+            models.Index(fields=['user', 'id'], name='progress_user_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.course.title} - {self.progress_percentage}%"
+
+class QuizResult(models.Model):
+    """
+    Latest score of a user on a quiz section (see courses/quizzes.py).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_results', verbose_name="Utilisateur")
+    section = models.ForeignKey('courses.Section', on_delete=models.CASCADE, related_name='quiz_results', verbose_name="Section")
+    score = models.PositiveIntegerField(verbose_name="Score")
+    max_score = models.PositiveIntegerField(verbose_name="Score maximal")
+    passed = models.BooleanField(default=False, verbose_name="Réussi")
+    attempts = models.PositiveIntegerField(default=1, verbose_name="Tentatives")
+    submitted_at = models.DateTimeField(verbose_name="Soumis le")
+
+    class Meta:
+        verbose_name = "Résultat de quiz"
+        verbose_name_plural = "Résultats de quiz"
+        unique_together = ['user', 'section']
+
+    def __str__(self):
+        return f"{self.user.email} - {self.section.title} - {self.score}/{self.max_score}"
+
+class DashboardCounter(models.Model):
+    """
+    Running total shown on the admin dashboard, maintained by users.stats.
+    """
+    name = models.CharField(max_length=50, unique=True, verbose_name="Nom")
+    value = models.BigIntegerField(default=0, verbose_name="Valeur")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Mis à jour le")
+
+    class Meta:
+        verbose_name = "Compteur du tableau de bord"
+        verbose_name_plural = "Compteurs du tableau de bord"
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+class DailyCounter(models.Model):
+    """
+    Per-day count (signups, certificates issued) shown on the admin dashboard.
+    """
+    name = models.CharField(max_length=50, verbose_name="Nom")
+    day = models.DateField(verbose_name="Jour")
+    value = models.BigIntegerField(default=0, verbose_name="Valeur")
+
+    class Meta:
+        verbose_name = "Compteur journalier"
+        verbose_name_plural = "Compteurs journaliers"
+        unique_together = ['name', 'day']
+
+    def __str__(self):
+        return f"{self.name} {self.day} = {self.value}"
@@ -0,0 +1,367 @@
+"""
+Course progress updates: per-section completion, quiz results and batched
+client updates.
+
+Section completion is kept as a bitset per (user, course), see
+courses/completion.py; progress_percentage and completed are derived from it.
+
+Offline-capable clients queue progress changes and replay them later,
+possibly out of order and from several devices. Each item carries the
+client timestamp of the change; an item only overwrites the stored row
+when it is newer than the last applied change (last write wins).
+"""
+
+import logging
+import threading
+
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from courses.completion import allocate_slot, progress_from_bits, slots, to_bytes, to_int
+from courses.models import Course, Section
+
+from .authentication import invalidate_users_tokens
+from .models import QuizResult, User, UserCourseProgress
+from .serializers import ProgressUpdateSerializer
+
+logger = logging.getLogger(__name__)
+
+# Largest number of items accepted in one bulk request
+MAX_BULK_ITEMS = 500
+
+# Rows rewritten per query when a course's sections change
+REFRESH_BATCH_SIZE = 1000
+
+# Users written per transaction when recording quiz results
+QUIZ_BATCH_SIZE = 500
+
+def credit_completions(deltas):
+    """
+    Adjust User.courses_completed by {user_id: delta}, one UPDATE per distinct delta.
+
+    Used by the bulk paths, which bypass the post_save signal that handles single
+    saves; rows carry the completed value they were loaded with (users/signals.py).
+    """
+    users_by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            users_by_delta[delta].append(user_id)
+    for delta, user_ids in users_by_delta.items():
+        User.objects.filter(pk__in=user_ids).update(courses_completed=F('courses_completed') + delta)
+    credited = [user_id for user_ids in users_by_delta.values() for user_id in user_ids]
+    if credited:
+        transaction.on_commit(lambda: invalidate_users_tokens(credited))
+
+def _ensure_slot(section):
+    # Sections written without Section.save (bulk_create, raw SQL) have no slot yet:
+    # assign it on first use and reload the loaded course's mask, which gained the slot
+    if section.slot is not None:
+        return
+    course = section.module.course
+    with transaction.atomic():
+        slot = Section.objects.select_for_update().values_list('slot', flat=True).get(pk=section.pk)
+        if slot is None:
+            slot = allocate_slot(course.pk)
+            Section.objects.filter(pk=section.pk).update(slot=slot)
+            # The course has one more section: rescale the stored percentages
+            schedule_progress_refresh(course.pk)
+        section.slot = slot
+        course.section_mask = Course.objects.values_list('section_mask', flat=True).get(pk=course.pk)
+
+def apply_client_progress(progress, mask, percentage=None, completed=None):
+    """
+    Apply a client's progress_percentage / completed to a progress row.
+
+    For a course whose sections are tracked (non-empty mask) both values are
+    derived from the row's bitset and the client's are ignored; completion
+    stays sticky. Courses without sections keep the client's values.
+    """
+    if to_int(mask):
+        percentage, done = progress_from_bits(progress.completed_sections, mask)
+        progress.progress_percentage = percentage
+        progress.completed = progress.completed or done
+        return
+    if percentage is not None:
+        progress.progress_percentage = percentage
+    if completed is not None:
+        progress.completed = completed
+
+def mark_section(user, section, done=True):
+    """
+    Set or clear one section in the user's bitset and derive the course progress.
+
+    Touches only the user's row for that course. `section` must have
+    module__course loaded (for the course mask). Completion is sticky: a
+    course stays completed if sections are later added or unchecked.
+    """
+    _ensure_slot(section)
+    course = section.module.course
+    with transaction.atomic():
+        rows = UserCourseProgress.objects.select_for_update().filter(user=user, course=course)
+        progress = rows.first()
+        if progress is None:
+            UserCourseProgress.objects.get_or_create(user=user, course=course)
+            progress = rows.get()
+        progress.course = course
+        bits = to_int(progress.completed_sections)
+        if done:
+            bits |= 1 << section.slot
+        else:
+            bits &= ~(1 << section.slot)
+        progress.completed_sections = to_bytes(bits)
+        progress.progress_percentage, completed = progress_from_bits(progress.completed_sections, course.section_mask)
+        progress.completed = progress.completed or completed
+        progress.updated_at = timezone.now()
+        progress.save()
+    return progress
+
+def complete_section_for_users(section, user_ids):
+    """
+    Set one section in the bitsets of many users, with a constant number of queries.
+
+    The batch counterpart of mark_section(user, section): rows are locked,
+    missing ones created, and the changes written with bulk_create/bulk_update.
+    """
+    _ensure_slot(section)
+    course = section.module.course
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {
+            progress.user_id: progress
+            for progress in UserCourseProgress.objects.select_for_update().filter(
+                course=course, user_id__in=user_ids
+            )
+        }
+        to_create, to_update = [], []
+        for user_id in user_ids:
+            progress = existing.get(user_id)
+            if progress is None:
+                progress = UserCourseProgress(user_id=user_id, course=course)
+                to_create.append(progress)
+            elif to_int(progress.completed_sections) >> section.slot & 1:
+                continue
+            else:
+                to_update.append(progress)
+            progress.completed_sections = to_bytes(to_int(progress.completed_sections) | 1 << section.slot)
+            progress.progress_percentage, completed = progress_from_bits(progress.completed_sections, course.section_mask)
+            progress.completed = progress.completed or completed
+            progress.updated_at = now
+
+        UserCourseProgress.objects.bulk_create(to_create)
+        UserCourseProgress.objects.bulk_update(
+            to_update, ['completed_sections', 'progress_percentage', 'completed', 'updated_at']
+        )
+        credit_completions({
+            progress.user_id: int(progress.completed) - int(bool(progress._loaded_completed))
+            for progress in to_create + to_update
+        })
+
+def _record_quiz_batch(section, scores, max_score, submitted_at):
+    with transaction.atomic():
+        existing = {
+            result.user_id: result
+            for result in QuizResult.objects.select_for_update().filter(section=section, user_id__in=scores)
+        }
+        to_create, to_update = [], []
+        for user_id, (score, passed) in scores.items():
+            result = existing.get(user_id)
+            if result is None:
+                to_create.append(QuizResult(
+                    user_id=user_id, section=section, score=score, max_score=max_score,
+                    passed=passed, submitted_at=submitted_at,
+                ))
+                continue
+            result.score, result.max_score, result.passed = score, max_score, passed
+            result.attempts += 1
+            result.submitted_at = submitted_at
+            to_update.append(result)
+        QuizResult.objects.bulk_create(to_create)
+        QuizResult.objects.bulk_update(to_update, ['score', 'max_score', 'passed', 'attempts', 'submitted_at'])
+
+        passed_ids = [user_id for user_id, (score, passed) in scores.items() if passed]
+        if passed_ids:
+            complete_section_for_users(section, passed_ids)
+
+def record_quiz_results(section, scores, max_score):
+    """
+    Store quiz scores {user_id: (score, passed)} for a quiz section.
+
+    Each user's QuizResult keeps the latest attempt; users who passed get the
+    section completed in their course progress (completion is sticky, a later
+    failed attempt does not clear it). Written QUIZ_BATCH_SIZE users per
+    transaction, each with a constant number of queries. `section` must have
+    module__course loaded.
+    """
+    submitted_at = timezone.now()
+    user_ids = list(scores)
+    for start in range(0, len(user_ids), QUIZ_BATCH_SIZE):
+        batch = {user_id: scores[user_id] for user_id in user_ids[start:start + QUIZ_BATCH_SIZE]}
+        try:
+            _record_quiz_batch(section, batch, max_score, submitted_at)
+        except IntegrityError:
+            # A concurrent submission created one of the rows first: the retry sees it as existing
+            _record_quiz_batch(section, batch, max_score, submitted_at)
+
+def completed_section_ids(progress):
+    """
+    Ids of the live sections set in a progress row's bitset.
+    """
+    done = list(slots(to_int(progress.completed_sections)))
+    if not done:
+        return []
+    return list(Section.objects.filter(
+        module__course_id=progress.course_id, slot__in=done
+    ).order_by('id').values_list('id', flat=True))
+
+def refresh_course_progress(course_id):
+    """
+    Recompute the percentage of every section-tracked row of a course after
+    sections were added or removed, in batches of REFRESH_BATCH_SIZE rows.
+    """
+    mask = Course.objects.filter(pk=course_id).values_list('section_mask', flat=True).first()
+    if mask is None:
+        return
+    queryset = (
+        UserCourseProgress.objects.filter(course_id=course_id)
+        .exclude(completed_sections=b'')
+        .only('id', 'user_id', 'completed_sections', 'progress_percentage', 'completed')
+        .order_by('pk')
+    )
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:REFRESH_BATCH_SIZE])
+        changed = []
+        for progress in batch:
+            percentage, completed = progress_from_bits(progress.completed_sections, mask)
+            completed = progress.completed or completed
+            if (percentage, completed) != (progress.progress_percentage, progress.completed):
+                progress.progress_percentage, progress.completed = percentage, completed
+                changed.append(progress)
+        UserCourseProgress.objects.bulk_update(changed, ['progress_percentage', 'completed'])
+        credit_completions({
+            progress.user_id: int(progress.completed) - int(bool(progress._loaded_completed))
+            for progress in changed
+        })
+        if len(batch) < REFRESH_BATCH_SIZE:
+            return
+        last_pk = batch[-1].pk
+
+class _ProgressRefresh:
+    # on_commit callback refreshing every course collected during one transaction
+
+    def __init__(self):
+        self.course_ids = set()
+
+    def __call__(self):
+        if getattr(_pending_refresh, 'callback', None) is self:
+            _pending_refresh.callback = None
+        for course_id in sorted(self.course_ids):
+            try:
+                refresh_course_progress(course_id)
+            except Exception:
+                logger.exception("Progress refresh failed for course %s", course_id)
+
+_pending_refresh = threading.local()
+
+def schedule_progress_refresh(course_id):
+    """
+    Run refresh_course_progress(course_id) once the transaction commits.
+
+    A transaction that adds or removes many sections (an import, a module
+    deletion) refreshes each of their courses once: the course ids go into
+    the set of a single on_commit callback.
+    """
+    refresh = getattr(_pending_refresh, 'callback', None)
+    # None once run; no longer queued after a rollback (of the transaction or of a savepoint)
+    if refresh is None or not any(entry[1] is refresh for entry in transaction.get_connection().run_on_commit):
+        refresh = _pending_refresh.callback = _ProgressRefresh()
+        refresh.course_ids.add(course_id)
+        # Outside a transaction the callback runs right away
+        transaction.on_commit(refresh)
+    else:
+        refresh.course_ids.add(course_id)
+
+def _apply(user, updates, masks):
+    # updates: course_id -> (index, validated item), the newest item per course;
+    # masks: course_id -> section_mask. Returns index -> result.
+    results = {}
+    with transaction.atomic():
+        existing = {
+            progress.course_id: progress
+            for progress in UserCourseProgress.objects.select_for_update().filter(
+                user=user, course_id__in=updates
+            )
+        }
+        now = timezone.now()
+        to_create, to_update = [], []
+        for course_id, (index, item) in updates.items():
+            progress = existing.get(course_id)
+            if progress is None:
+                progress = UserCourseProgress(user=user, course_id=course_id)
+                to_create.append(progress)
+                status = 'created'
+            elif progress.updated_at is not None and progress.updated_at >= item['timestamp']:
+                results[index] = {'course': course_id, 'status': 'stale'}
+                continue
+            else:
+                to_update.append(progress)
+                status = 'updated'
+            results[index] = {'course': course_id, 'status': status}
+            apply_client_progress(progress, masks[course_id], item.get('progress_percentage'), item.get('completed'))
+            progress.updated_at = item['timestamp']
+            progress.last_accessed = now
+
+        UserCourseProgress.objects.bulk_create(to_create)
+        UserCourseProgress.objects.bulk_update(
+            to_update, ['progress_percentage', 'completed', 'updated_at', 'last_accessed']
+        )
+        credit_completions({user.pk: sum(
+            int(progress.completed) - int(bool(progress._loaded_completed))
+            for progress in to_create + to_update
+        )})
+    return results
+
+def apply_progress_updates(user, items):
+    """
+    Validate and apply a list of progress items for `user`.
+
+    Returns one result per item, in order: {'course', 'status'} where status
+    is 'created', 'updated', 'stale' (an equal or newer change is already
+    stored, or a newer item for the same course is in the batch) or
+    'error' (with 'errors'). Valid items are written with a constant number
+    of queries whatever the batch size.
+    """
+    results = [None] * len(items)
+    updates = {}
+    for index, data in enumerate(items):
+        serializer = ProgressUpdateSerializer(data=data)
+        if not serializer.is_valid():
+            results[index] = {'course': data.get('course') if isinstance(data, dict) else None,
+                              'status': 'error', 'errors': serializer.errors}
+            continue
+        item = serializer.validated_data
+        previous = updates.get(item['course'])
+        if previous is not None and previous[1]['timestamp'] >= item['timestamp']:
+            results[index] = {'course': item['course'], 'status': 'stale'}
+            continue
+        if previous is not None:
+            results[previous[0]] = {'course': item['course'], 'status': 'stale'}
+        updates[item['course']] = (index, item)
+
+    masks = dict(Course.objects.filter(id__in=updates, is_published=True).values_list('id', 'section_mask'))
+    for course_id in [course_id for course_id in updates if course_id not in masks]:
+        index, item = updates.pop(course_id)
+        results[index] = {'course': course_id, 'status': 'error', 'errors': {'course': ["Cours introuvable."]}}
+
+    if updates:
+        try:
+            applied = _apply(user, updates, masks)
+        except IntegrityError:
+            # A concurrent request created one of the rows first: the retry sees it as existing
+            applied = _apply(user, updates, masks)
+        for index, result in applied.items():
+            results[index] = result
+    return results
@@ -49,3 +49,12 @@ class LoginSerializer(serializers.Serializer):
         if not user.is_active:
             raise serializers.ValidationError("Ce compte a été désactivé.")
         return {'user': user}
+
+class ProgressUpdateSerializer(serializers.Serializer):
+    """
+    One item of a bulk progress update, as queued by an offline client.
+    """
+    course = serializers.IntegerField()
+    progress_percentage = serializers.IntegerField(min_value=0, max_value=100, required=False)
+    completed = serializers.BooleanField(required=False)
+    timestamp = serializers.DateTimeField()
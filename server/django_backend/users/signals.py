@@ -0,0 +1,112 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from certificates.models import Certificate
+from courses.models import Course
+from payments.models import Subscription
+
+from . import stats
+from .authentication import invalidate_token, invalidate_user_tokens
+from .models import User, UserCourseProgress
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Cached credentials carry the user row (is_admin, is_premium, is_active...).
+    # Deleting clears instance.pk before the transaction commits: bind it now.
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_user_tokens(pk))
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # The key is the token's primary key, cleared as well by delete()
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_token(key))
+
+# Dashboard counters. post_init remembers the loaded value of the fields whose
+# transitions are counted, so saves need no extra query to compute the delta.
+# Deferred fields are left alone (None): reading them here would cost a query per row.
+
+def _loaded(instance, field):
+    return instance.__dict__.get(field)
+
+@receiver(post_init, sender=User)
+def remember_premium(sender, instance, **kwargs):
+    # A new, unsaved user is not counted yet
+    instance._stats_is_premium = _loaded(instance, 'is_premium') if instance.pk else False
+
+@receiver(post_save, sender=User)
+def count_user_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.increment('total_users')
+        stats.increment_daily('signups', instance.date_joined)
+    if instance._stats_is_premium is not None:
+        stats.increment('premium_users', int(instance.is_premium) - int(instance._stats_is_premium))
+        instance._stats_is_premium = instance.is_premium
+
+@receiver(post_delete, sender=User)
+def count_user_deleted(sender, instance, **kwargs):
+    stats.increment('total_users', -1)
+    stats.increment_daily('signups', instance.date_joined, -1)
+    stats.increment('premium_users', -int(instance.is_premium))
+
+@receiver(post_save, sender=Course)
+def count_course_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.increment('total_courses')
+
+@receiver(post_delete, sender=Course)
+def count_course_deleted(sender, instance, **kwargs):
+    stats.increment('total_courses', -1)
+
+@receiver(post_save, sender=Certificate)
+def count_certificate_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.increment('total_certificates')
+        stats.increment_daily('certificates_issued', instance.issue_date)
+
+@receiver(post_delete, sender=Certificate)
+def count_certificate_deleted(sender, instance, **kwargs):
+    stats.increment('total_certificates', -1)
+    stats.increment_daily('certificates_issued', instance.issue_date, -1)
+
+@receiver(post_init, sender=Subscription)
+def remember_subscription_status(sender, instance, **kwargs):
+    status = _loaded(instance, 'status') if instance.pk else ''
+    instance._stats_active = None if status is None else status == 'active'
+
+@receiver(post_save, sender=Subscription)
+def count_subscription_saved(sender, instance, **kwargs):
+    if instance._stats_active is not None:
+        active = instance.status == 'active'
+        stats.increment('active_subscriptions', int(active) - int(instance._stats_active))
+        instance._stats_active = active
+
+@receiver(post_delete, sender=Subscription)
+def count_subscription_deleted(sender, instance, **kwargs):
+    stats.increment('active_subscriptions', -int(instance.status == 'active'))
+
+# User.courses_completed follows the completed flag of the user's progress rows.
+# Bulk writes (users/progress.py) bypass post_save and call credit_completions instead.
+
+@receiver(post_init, sender=UserCourseProgress)
+def remember_completed(sender, instance, **kwargs):
+    instance._loaded_completed = _loaded(instance, 'completed') if instance.pk else False
+
+@receiver(post_save, sender=UserCourseProgress)
+def count_completion(sender, instance, **kwargs):
+    if instance._loaded_completed is None:
+        return
+    delta = int(bool(instance.completed)) - int(bool(instance._loaded_completed))
+    if delta:
+        User.objects.filter(pk=instance.user_id).update(courses_completed=F('courses_completed') + delta)
+        transaction.on_commit(lambda: invalidate_user_tokens(instance.user_id))
+    instance._loaded_completed = instance.completed
+
+@receiver(post_delete, sender=UserCourseProgress)
+def uncount_completion(sender, instance, **kwargs):
+    if instance.completed:
+        User.objects.filter(pk=instance.user_id).update(courses_completed=F('courses_completed') - 1)
+        transaction.on_commit(lambda: invalidate_user_tokens(instance.user_id))
@@ -0,0 +1,132 @@
+"""
+Admin dashboard statistics kept in summary tables.
+
+Model signals (users/signals.py) adjust the counters inside the same
+transaction as the change they count, so the dashboard reads a handful of
+rows instead of running COUNT(*) over whole tables. `reconcile` recounts
+everything from the source tables to repair any drift (bulk updates and raw
+SQL bypass signals, subscriptions expire without being saved); run it
+periodically with `python manage.py reconcile_dashboard_stats`.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+TOTALS = (
+    'total_users',
+    'premium_users',
+    'total_courses',
+    'total_certificates',
+    'active_subscriptions',
+)
+DAILY = (
+    'signups',
+    'certificates_issued',
+)
+
+# Number of days of daily counters returned by the dashboard and recounted by reconcile
+RECENT_DAYS = 30
+
+def increment(name, delta=1):
+    from .models import DashboardCounter
+
+    if not delta:
+        return
+    updated = DashboardCounter.objects.filter(name=name).update(value=F('value') + delta)
+    if not updated:
+        DashboardCounter.objects.get_or_create(name=name)
+        DashboardCounter.objects.filter(name=name).update(value=F('value') + delta)
+
+def increment_daily(name, when, delta=1):
+    from .models import DailyCounter
+
+    if not delta:
+        return
+    day = timezone.localdate(when) if timezone.is_aware(when) else when.date()
+    updated = DailyCounter.objects.filter(name=name, day=day).update(value=F('value') + delta)
+    if not updated:
+        DailyCounter.objects.get_or_create(name=name, day=day)
+        DailyCounter.objects.filter(name=name, day=day).update(value=F('value') + delta)
+
+def dashboard_stats(days=RECENT_DAYS):
+    """
+    Current totals plus the last `days` days of daily counters.
+    """
+    from .models import DashboardCounter, DailyCounter
+
+    stats = dict.fromkeys(TOTALS, 0)
+    stats.update(DashboardCounter.objects.filter(name__in=TOTALS).values_list('name', 'value'))
+
+    today = timezone.localdate()
+    first_day = today - timedelta(days=days - 1)
+    per_day = {
+        (name, day): value
+        for name, day, value in DailyCounter.objects.filter(
+            name__in=DAILY, day__gte=first_day
+        ).values_list('name', 'day', 'value')
+    }
+    for name in DAILY:
+        stats[name] = [
+            {'date': day.isoformat(), 'count': per_day.get((name, day), 0)}
+            for day in (first_day + timedelta(days=offset) for offset in range(days))
+        ]
+    return stats
+
+def _daily_counts(queryset, field, first_day):
+    rows = (
+        queryset.filter(**{f'{field}__date__gte': first_day})
+        .annotate(day=TruncDate(field))
+        .values('day')
+        .annotate(count=Count('id'))
+        .values_list('day', 'count')
+    )
+    return dict(rows)
+
+def reconcile(days=RECENT_DAYS):
+    """
+    Recount every counter from the source tables and overwrite the stored values.
+    """
+    from certificates.models import Certificate
+    from courses.models import Course
+    from payments.models import Subscription
+    from .models import User, DashboardCounter, DailyCounter
+
+    first_day = timezone.localdate() - timedelta(days=days - 1)
+
+    with transaction.atomic():
+        for name in TOTALS:
+            DashboardCounter.objects.get_or_create(name=name)
+        # Lock the counters first: signal updates wait, so none is lost between count and write
+        list(DashboardCounter.objects.select_for_update().filter(name__in=TOTALS))
+        stored = {
+            (row.name, row.day): row.value
+            for row in DailyCounter.objects.select_for_update().filter(name__in=DAILY, day__gte=first_day)
+        }
+
+        totals = {
+            'total_users': User.objects.count(),
+            'premium_users': User.objects.filter(is_premium=True).count(),
+            'total_courses': Course.objects.count(),
+            'total_certificates': Certificate.objects.count(),
+            'active_subscriptions': Subscription.objects.filter(status='active').count(),
+        }
+        for name, value in totals.items():
+            DashboardCounter.objects.filter(name=name).update(value=value)
+
+        daily = {
+            'signups': _daily_counts(User.objects.all(), 'date_joined', first_day),
+            'certificates_issued': _daily_counts(Certificate.objects.all(), 'issue_date', first_day),
+        }
+        for name, counts in daily.items():
+            for day in {day for stored_name, day in stored if stored_name == name} | set(counts):
+                value = counts.get(day, 0)
+                if (name, day) not in stored:
+                    DailyCounter.objects.get_or_create(name=name, day=day)
+                elif stored[name, day] == value:
+                    continue
+                DailyCounter.objects.filter(name=name, day=day).update(value=value)
+    return {**totals, **{name: sum(counts.values()) for name, counts in daily.items()}}
@@ -0,0 +1,190 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APITestCase
+
+from courses.models import Course
+
+from .authentication import SHARED_KEY_PREFIX, CachedTokenAuthentication, local_tokens
+from .heartbeats import HeartbeatJournal
+from .models import DashboardCounter, User
+
+class CachedTokenAuthenticationTests(TestCase):
+    """
+    Cached credentials are served without queries and dropped when the token
+    or its user goes away.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='apprenant', email='apprenant@example.com', password='secret')
+        self.token = Token.objects.create(user=self.user)
+        self.authentication = CachedTokenAuthentication()
+
+    def tearDown(self):
+        local_tokens.invalidate_user(self.user.pk)
+
+    def test_miss_then_hit(self):
+        key = self.token.key
+        # Token joined with its user
+        with self.assertNumQueries(1):
+            user, token = self.authentication.authenticate_credentials(key)
+        with self.assertNumQueries(0):
+            cached_user, cached_token = self.authentication.authenticate_credentials(key)
+        self.assertEqual((cached_user.pk, cached_token.key), (self.user.pk, key))
+        self.assertEqual(cached_token.user, cached_user)
+
+    def test_shared_cache_hit(self):
+        key = self.token.key
+        self.authentication.authenticate_credentials(key)
+        # Another process: nothing in its local cache yet
+        local_tokens.invalidate(key)
+        with self.assertNumQueries(0):
+            user, token = self.authentication.authenticate_credentials(key)
+        self.assertEqual(user.username, 'apprenant')
+
+    def test_cached_entry_holds_column_values_only(self):
+        key = self.token.key
+        self.authentication.authenticate_credentials(key)
+        user_values, token_values = cache.get(SHARED_KEY_PREFIX + key)
+        self.assertEqual(set(user_values), {field.attname for field in User._meta.concrete_fields})
+        self.assertEqual(set(token_values), {'key', 'user_id', 'created'})
+
+    def test_changes_to_a_cached_user_do_not_leak(self):
+        key = self.token.key
+        user, token = self.authentication.authenticate_credentials(key)
+        user.is_premium = True
+        user._stats_is_premium = True
+        user, token = self.authentication.authenticate_credentials(key)
+        self.assertFalse(user.is_premium)
+        self.assertIs(user._stats_is_premium, False)
+
+    def test_saving_a_cached_user_counts_premium_once(self):
+        key = self.token.key
+        self.authentication.authenticate_credentials(key)
+        premium_users = DashboardCounter.objects.get(name='premium_users').value
+        for _ in range(2):
+            user, token = self.authentication.authenticate_credentials(key)
+            user.is_premium = True
+            with self.captureOnCommitCallbacks(execute=True):
+                user.save()
+        self.assertEqual(DashboardCounter.objects.get(name='premium_users').value, premium_users + 1)
+
+    def test_deleted_token_is_rejected(self):
+        key = self.token.key
+        self.authentication.authenticate_credentials(key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(key)
+
+    def test_deleted_user_is_rejected(self):
+        key = self.token.key
+        self.authentication.authenticate_credentials(key)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=self.user.pk).delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(key)
+
+class HeartbeatJournalTests(APITestCase):
+    """
+    Flushes move whole minutes without holding the journal during the database
+    update, and give them back when the update fails.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'heartbeats.sqlite3')
+        self.journal = HeartbeatJournal(self.path)
+        self.user = User.objects.create_user(username='apprenant', email='apprenant@example.com', password='secret')
+        self.journal._connection().execute(
+            "INSERT INTO pending (user_id, seconds, last_ping) VALUES (?, 150, NULL)", (self.user.pk,)
+        )
+
+    def pending_seconds(self):
+        return self.journal._connection().execute(
+            "SELECT seconds FROM pending WHERE user_id = ?", (self.user.pk,)
+        ).fetchone()[0]
+
+    def test_flush_credits_whole_minutes(self):
+        self.assertEqual(self.journal.flush(), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.total_learning_time, 2)
+        self.assertEqual(self.pending_seconds(), 30)
+
+    def test_journal_is_writable_during_the_database_update(self):
+        update = QuerySet.update
+
+        def write_journal(queryset, **kwargs):
+            # Another worker recording a ping while the database is written
+            conn = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("COMMIT")
+            conn.close()
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', write_journal):
+            self.journal.flush()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.total_learning_time, 2)
+
+    def test_failed_update_gives_the_minutes_back(self):
+        with mock.patch.object(QuerySet, 'update', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.journal.flush()
+        self.assertEqual(self.pending_seconds(), 150)
+        self.journal.flush()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.total_learning_time, 2)
+
+    def test_heartbeat_for_a_missing_course_is_rejected(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/courses/courses/0/heartbeat/', {'seconds': 10}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+class ProgressTimestampTests(APITestCase):
+    """
+    Single and bulk progress updates are ordered by the same client timestamps.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='apprenant', email='apprenant@example.com', password='secret')
+        self.course = Course.objects.create(
+            title="Cours", description="Description", language='python', level='beginner',
+            duration='2h', instructor="Instructeur", is_published=True
+        )
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/courses/courses/{self.course.pk}/update_progress/'
+
+    def test_older_queued_update_does_not_overwrite_an_online_one(self):
+        response = self.client.post(
+            self.url, {'progress_percentage': 60, 'timestamp': '2026-01-01T10:00:00Z'}, format='json'
+        )
+        self.assertEqual(response.data['progress_percentage'], 60)
+        response = self.client.post('/api/courses/courses/bulk_update_progress/', {'items': [
+            {'course': self.course.pk, 'progress_percentage': 20, 'timestamp': '2026-01-01T09:00:00Z'},
+        ]}, format='json')
+        self.assertEqual(response.data['results'][0]['status'], 'stale')
+
+    def test_older_online_update_does_not_overwrite_a_queued_one(self):
+        self.client.post('/api/courses/courses/bulk_update_progress/', {'items': [
+            {'course': self.course.pk, 'progress_percentage': 80, 'timestamp': '2026-01-01T10:00:00Z'},
+        ]}, format='json')
+        response = self.client.post(
+            self.url, {'progress_percentage': 40, 'timestamp': '2026-01-01T09:00:00Z'}, format='json'
+        )
+        self.assertEqual(response.data['progress_percentage'], 80)
+
+    def test_timestamp_is_required(self):
+        response = self.client.post(self.url, {'progress_percentage': 60}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('timestamp', response.data)
@@ -12,8 +12,9 @@ from .views import (
 )
 
 router = DefaultRouter()
-router.register(r'', UserViewSet, basename='user')
+# 'progress' must come first: the empty prefix would otherwise read it as a user id
 router.register(r'progress', UserCourseProgressViewSet, basename='user-progress')
+router.register(r'', UserViewSet, basename='user')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -7,8 +7,10 @@ from rest_framework.views import APIView
 from rest_framework.decorators import action
 from .models import User, UserCourseProgress
 from .serializers import UserSerializer, UserCourseProgressSerializer, RegisterSerializer, LoginSerializer
-from courses.models import Course
-from certificates.models import Certificate
+from .authentication import invalidate_user_tokens
+from .stats import dashboard_stats
+from codelearn.pagination import ProgressPagination
+from codelearn.exports import export_response, parse_export_params
 from django.shortcuts import get_object_or_404
 
 class IsAdminUser(permissions.BasePermission):
@@ -76,12 +78,13 @@ class UserCourseProgressViewSet(viewsets.ModelViewSet):
     API endpoint for managing user course progress.
     """
     serializer_class = UserCourseProgressSerializer
+    pagination_class = ProgressPagination
     
     def get_permissions(self):
         """
         Allow admins to view all progress, but regular users can only view their own.
         """
-        if self.action == 'list':
+        if self.action in ['list', 'export']:
             permission_classes = [IsAdminUser]
         else:
             permission_classes = [permissions.IsAuthenticated]
@@ -89,15 +92,44 @@ class UserCourseProgressViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
+        queryset = UserCourseProgress.objects.select_related('course')
         if user.is_admin:
             user_id = self.request.query_params.get('user_id')
             if user_id:
-                return UserCourseProgress.objects.filter(user_id=user_id)
-            return UserCourseProgress.objects.all()
-        return UserCourseProgress.objects.filter(user=user)
+                return queryset.filter(user_id=user_id)
+            return queryset
+        return queryset.filter(user=user)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every progress row as CSV or NDJSON (admin only).
+        
+        Filters: user_id, course_id, completed, since/until (last access).
+        """
+        try:
+            export_format, conditions = parse_export_params(
+                request.query_params, 'last_accessed',
+                {'user_id': 'user_id', 'course_id': 'course_id', 'completed': 'completed'},
+                boolean_filters=['completed'],
+            )
+            queryset = UserCourseProgress.objects.filter(**conditions)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return export_response(queryset, [
+            ('id', 'id'),
+            ('user_id', 'user_id'),
+            ('user_email', 'user__email'),
+            ('course_id', 'course_id'),
+            ('course_title', 'course__title'),
+            ('progress_percentage', 'progress_percentage'),
+            ('completed', 'completed'),
+            ('last_accessed', 'last_accessed'),
+        ], export_format, 'progress')
 
 class RegisterView(generics.CreateAPIView):
     """
@@ -145,6 +177,7 @@ class LogoutView(APIView):
             request.user.auth_token.delete()
         except (AttributeError, Token.DoesNotExist):
             pass
+        invalidate_user_tokens(request.user.pk)
         return Response({"detail": "Déconnexion réussie."}, status=status.HTTP_200_OK)
 
 class UserProfileView(generics.RetrieveUpdateAPIView):
@@ -155,7 +188,9 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        # request.user may come from the token cache: save a fresh row, not a stale copy
+        # that would overwrite counters updated in the meantime (learning time, completions)
+        return User.objects.get(pk=self.request.user.pk)
 
 class AdminDashboardView(APIView):
     """
@@ -164,18 +199,10 @@ class AdminDashboardView(APIView):
     permission_classes = [IsAdminUser]
     
     def get(self, request):
-        total_users = User.objects.count()
-        premium_users = User.objects.filter(is_premium=True).count()
-        total_courses = Course.objects.count()
-        total_certificates = Certificate.objects.count()
+        # Counters come from the summary tables kept up to date by users.stats
+        data = dashboard_stats()
         
         recent_users = User.objects.order_by('-date_joined')[:5]
-        recent_users_data = UserSerializer(recent_users, many=True).data
+        data['recent_users'] = UserSerializer(recent_users, many=True).data
         
-        return Response({
-            'total_users': total_users,
-            'premium_users': premium_users,
-            'total_courses': total_courses,
-            'total_certificates': total_certificates,
-            'recent_users': recent_users_data
-        })
+        return Response(data)
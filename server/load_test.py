@@ -0,0 +1,95 @@
+"""
+Comparaison de charge entre l'API Flask (app.py) et sa version ASGI (async_app.py).
+
+Lance les deux serveurs sur la même base, puis :
+
+    gunicorn -w 4 --threads 8 -b :5000 app:app
+    hypercorn -w 4 -b :5001 async_app:app
+    python load_test.py http://localhost:5000 http://localhost:5001 --path /api/courses/1 -c 64 -n 5000
+
+Chaque URL reçoit n requêtes GET, envoyées par c clients concurrents ; le
+script affiche le débit et les latences (p50, p95, p99) de chaque serveur.
+Utiliser une route non mise en cache (?stream=1, /api/certificates avec
+--token, un module) pour mesurer l'accès à la base plutôt que le cache.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch(url, headers):
+    request = urllib.request.Request(url, headers=headers)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    except OSError:
+        status = None
+    return time.perf_counter() - started, status
+
+
+def run(url, requests, concurrency, headers):
+    # Chaque client enchaîne ses requêtes, comme un navigateur en keep-alive
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+    results = []
+
+    def client():
+        timings = []
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    break
+            timings.append(fetch(url, headers))
+        return timings
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for timings in executor.map(lambda _: client(), range(concurrency)):
+            results.extend(timings)
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status is None or status >= 400)
+    centiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(results),
+        'errors': errors,
+        'rps': len(results) / elapsed,
+        'p50': centiles[49] * 1000,
+        'p95': centiles[94] * 1000,
+        'p99': centiles[98] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare le débit de plusieurs serveurs de l'API.")
+    parser.add_argument('servers', nargs='+', help="URL de base de chaque serveur")
+    parser.add_argument('--path', default='/api/courses', help="Route à appeler")
+    parser.add_argument('-n', '--requests', type=int, default=2000, help="Requêtes par serveur")
+    parser.add_argument('-c', '--concurrency', type=int, default=32, help="Clients concurrents")
+    parser.add_argument('--warmup', type=int, default=100, help="Requêtes ignorées avant la mesure")
+    parser.add_argument('--token', help="Jeton JWT envoyé en Authorization: Bearer")
+    args = parser.parse_args()
+
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    print(f"{'serveur':40} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erreurs':>8}")
+    for server in args.servers:
+        url = server.rstrip('/') + args.path
+        if args.warmup:
+            run(url, args.warmup, min(args.concurrency, args.warmup), headers)
+        result = run(url, args.requests, args.concurrency, headers)
+        print(f"{server:40} {result['rps']:9.1f} {result['p50']:9.2f} {result['p95']:9.2f} "
+              f"{result['p99']:9.2f} {result['errors']:8d}")
+
+
+if __name__ == '__main__':
+    main()
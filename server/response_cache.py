@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+
+CachedResponse = namedtuple('CachedResponse', ['etag', 'body', 'mimetype', 'expires_at'])
+
+
+class ResponseCache:
+    """
+    Cache LRU à durée de vie limitée pour les réponses GET publiques.
+
+    Chaque entrée garde le corps sérialisé et son ETag, ce qui permet de
+    répondre 200 ou 304 sans interroger la base tant que l'entrée est valide.
+    """
+
+    def __init__(self, maxsize=1000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, etag, body, mimetype):
+        entry = CachedResponse(etag, body, mimetype, time.time() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, *prefixes):
+        """Retire les entrées dont la clé commence par l'un des préfixes (toutes si aucun)."""
+        with self._lock:
+            if not prefixes:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k.startswith(prefixes)]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
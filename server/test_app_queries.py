@@ -0,0 +1,216 @@
+"""
+Requêtes SQL exécutées par les routes du catalogue de l'API Flask (app.py).
+
+La base est remplacée par un faux pool dont les curseurs comptent les
+appels à execute() : aucun serveur MySQL n'est nécessaire.
+
+    cd server && python -m pytest -q test_app_queries.py
+"""
+
+import datetime
+
+import pytest
+
+import api_common
+import app as api
+from api_common import COURSE_COLUMNS, COURSE_DETAIL_QUERY, COURSES_QUERY, MODULE_OUTLINE_COLUMNS, MODULE_QUERY
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def execute(self, query, params=None):
+        self.connection.queries.append((query, params))
+        self.rows = self.connection.results.get(query.replace(" LIMIT %s", ""), [])
+        if query.endswith(" LIMIT %s"):
+            self.rows = self.rows[:params[-1]]
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self)
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, results):
+        self.connection = FakeConnection(results)
+
+    def connect(self):
+        return self.connection
+
+
+UPDATED_AT = datetime.datetime(2024, 1, 1)
+
+
+def course_rows(module_count):
+    course = {col: None for col in COURSE_COLUMNS}
+    course.update(id=1, name='Python', updated_at=UPDATED_AT)
+    if not module_count:
+        return [{**course, **{f'module_{col}': None for col in MODULE_OUTLINE_COLUMNS}}]
+    return [
+        {**course, **{f'module_{col}': None for col in MODULE_OUTLINE_COLUMNS},
+         'module_id': number, 'module_title': f'Module {number}', 'module_order_num': number,
+         'module_updated_at': UPDATED_AT}
+        for number in range(1, module_count + 1)
+    ]
+
+
+@pytest.fixture
+def database(monkeypatch):
+    # Chaque test part d'un cache de réponses vide et d'une base factice
+    api.response_cache.invalidate()
+
+    def install(results):
+        pool = FakePool(results)
+        monkeypatch.setattr(api, 'db_pool', pool)
+        return pool.connection
+
+    return install
+
+
+@pytest.fixture
+def client():
+    return api.app.test_client()
+
+
+@pytest.mark.parametrize('module_count', [0, 1, 25])
+def test_course_detail_runs_one_query(database, client, module_count):
+    connection = database({COURSE_DETAIL_QUERY: course_rows(module_count)})
+
+    response = client.get('/api/courses/1')
+
+    assert response.status_code == 200
+    assert len(response.get_json()['course']['modules']) == module_count
+    assert connection.queries == [(COURSE_DETAIL_QUERY, (1,))]
+
+
+def test_course_detail_is_served_from_cache(database, client):
+    connection = database({COURSE_DETAIL_QUERY: course_rows(3)})
+
+    client.get('/api/courses/1')
+    response = client.get('/api/courses/1')
+
+    assert response.status_code == 200
+    assert len(connection.queries) == 1
+
+
+def test_missing_course_runs_one_query(database, client):
+    connection = database({})
+
+    response = client.get('/api/courses/1')
+
+    assert response.status_code == 404
+    assert len(connection.queries) == 1
+
+
+def test_module_runs_one_query(database, client):
+    module = {'id': 7, 'course_id': 1, 'title': 'Boucles', 'description': '', 'content': 'for ...',
+              'order_num': 2, 'duration': '10 min'}
+    connection = database({MODULE_QUERY: [module]})
+
+    response = client.get('/api/courses/1/modules/7')
+
+    assert response.status_code == 200
+    assert response.get_json()['module'] == module
+    assert connection.queries == [(MODULE_QUERY, (7, 1))]
+
+
+def listed_courses(count):
+    return [{**{col: None for col in COURSE_COLUMNS}, 'id': number, 'updated_at': UPDATED_AT}
+            for number in range(1, count + 1)]
+
+
+def test_course_list_without_pagination_params_uses_default_page_size(database, client):
+    connection = database({COURSES_QUERY: listed_courses(120)})
+
+    data = client.get('/api/courses').get_json()
+
+    assert len(data['courses']) == api.DEFAULT_PAGE_SIZE
+    assert data['next_after'] == api.DEFAULT_PAGE_SIZE
+    assert connection.queries == [(COURSES_QUERY + " LIMIT %s", (0, api.DEFAULT_PAGE_SIZE + 1))]
+
+
+def test_course_list_stream_returns_the_whole_list(database, client):
+    connection = database({COURSES_QUERY: listed_courses(120)})
+
+    response = client.get('/api/courses?stream=1')
+
+    assert len(response.get_json()['courses']) == 120
+    assert connection.queries == [(COURSES_QUERY, (0,))]
+
+
+def test_course_list_pages_with_limit(database, client):
+    connection = database({COURSES_QUERY: listed_courses(5)})
+
+    data = client.get('/api/courses?limit=2').get_json()
+
+    assert [course['id'] for course in data['courses']] == [1, 2]
+    assert data['next_after'] == 2
+    assert connection.queries == [(COURSES_QUERY + " LIMIT %s", (0, 3))]
+
+
+def test_course_list_after_alone_uses_default_page_size(database, client):
+    connection = database({COURSES_QUERY: listed_courses(120)})
+
+    data = client.get('/api/courses?after=0').get_json()
+
+    assert len(data['courses']) == api.DEFAULT_PAGE_SIZE
+    assert data['next_after'] == api.DEFAULT_PAGE_SIZE
+    assert connection.queries == [(COURSES_QUERY + " LIMIT %s", (0, api.DEFAULT_PAGE_SIZE + 1))]
+
+
+def test_catalog_invalidation_refreshes_cached_course(database, client, monkeypatch):
+    monkeypatch.setattr(api_common, 'CATALOG_ADMIN_KEY', 'cle')
+    connection = database({COURSE_DETAIL_QUERY: course_rows(1)})
+    client.get('/api/courses/1')
+
+    denied = client.post('/api/catalog/invalidate', json={'course_id': 1}, headers={'X-Catalog-Key': 'autre'})
+    client.get('/api/courses/1')
+    assert denied.status_code == 403
+    assert len(connection.queries) == 1
+
+    response = client.post('/api/catalog/invalidate', json={'course_id': 1}, headers={'X-Catalog-Key': 'cle'})
+    client.get('/api/courses/1')
+    assert response.status_code == 200
+    assert len(connection.queries) == 2
+
+
+def test_cache_stats_count_token_and_response_hits(database, client, monkeypatch):
+    monkeypatch.setattr(api_common, 'CATALOG_ADMIN_KEY', 'cle')
+    database({COURSE_DETAIL_QUERY: course_rows(1)})
+    headers = {'Authorization': f'Bearer {api_common.create_token(1)}'}
+    before = api_common.cache_stats()
+
+    client.get('/api/courses/1')
+    client.get('/api/courses/1')
+    client.get('/api/certificates', headers=headers)
+    client.get('/api/certificates', headers=headers)
+
+    assert client.get('/api/cache/stats', headers={'X-Catalog-Key': 'autre'}).status_code == 403
+    stats = client.get('/api/cache/stats', headers={'X-Catalog-Key': 'cle'}).get_json()
+    assert stats['responses']['hits'] - before['responses']['hits'] == 1
+    assert stats['responses']['misses'] - before['responses']['misses'] == 1
+    assert stats['tokens']['hits'] - before['tokens']['hits'] == 1
+    assert stats['tokens']['misses'] - before['tokens']['misses'] == 1
@@ -0,0 +1,43 @@
+"""
+Index de database/migrations et plans d'exécution des requêtes de lecture
+(database/check_explain.py).
+
+Le premier test n'a pas besoin de base ; le second lance la vérification
+EXPLAIN sur la base codelearn migrée, et est ignoré si MySQL n'est pas
+joignable.
+
+    cd server && python -m pytest -q test_explain_plans.py
+"""
+
+import pathlib
+import re
+
+import mysql.connector
+import pytest
+
+from api_common import DB_CONFIG
+from database.check_explain import QUERIES, check, table_aliases
+
+MIGRATIONS = pathlib.Path(__file__).parent / 'database' / 'migrations'
+INDEX_RE = re.compile(r"CALL create_index_if_missing\('(\w+)', '(\w+)', '([^']+)'\)")
+
+
+def migration_indexes():
+    for path in sorted(MIGRATIONS.glob('*.sql')):
+        for table, index, columns in INDEX_RE.findall(path.read_text(encoding='utf-8')):
+            yield table, index, [column.strip() for column in columns.split(',')]
+
+
+def test_every_index_serves_a_checked_query():
+    # Un index sur une table qu'aucune requête vérifiée ne lit ne fait que ralentir les écritures
+    read_tables = {table for name, query, params in QUERIES for table in table_aliases(query).values()}
+    unused = [index for table, index, columns in migration_indexes() if table not in read_tables]
+    assert unused == []
+
+
+def test_checked_queries_avoid_full_scans():
+    try:
+        mysql.connector.connect(**DB_CONFIG, connection_timeout=5).close()
+    except mysql.connector.Error:
+        pytest.skip("base MySQL codelearn non joignable")
+    assert check(min_rows=1000) == []
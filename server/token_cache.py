@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """
+    Cache LRU des jetons JWT déjà vérifiés.
+
+    La clé est le jeton brut ; une entrée expire au plus tard au champ `exp`
+    du jeton, pour que le cache n'accepte jamais un jeton expiré.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= now:
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return payload
+
+    def set(self, token, payload):
+        expires_at = time.time() + self.ttl
+        if 'exp' in payload:
+            expires_at = min(expires_at, payload['exp'])
+        with self._lock:
+            self._entries[token] = (payload, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, token=None):
+        """Retire un jeton du cache, ou vide tout le cache si aucun n'est donné."""
+        with self._lock:
+            if token is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(token, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }